@@ -1,10 +1,18 @@
 # api/app.py
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 # ↓ относительный импорт
-from routers.analysis import router as analysis_router
+from routers.analysis import router as analysis_router, compute_candles, pregenerate_analysis
+from routers.screener import router as screener_router
+from services.candle_stream import start_stream, stop_stream
+from services.http_client import start_http_client, close_http_client
+from services.llm_service import close_providers
+from services.metrics import ServerTimingMiddleware, render_metrics
+from services.warm_cache import start_warm_worker, stop_warm_worker
 
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
@@ -22,22 +30,49 @@ def verify_token(creds: HTTPAuthorizationCredentials = Depends(security)):
     except:
         raise HTTPException(401, "Invalid token")
 
-app = FastAPI(title="GeniusO4 API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # общий пул HTTP-соединений на всё время жизни приложения
+    await start_http_client()
+    # потоковые свечи в кольцевых буферах (STREAM_ENABLED)
+    start_stream()
+    # прогрев популярных пар после закрытия свечи (WARM_CACHE_ENABLED)
+    start_warm_worker(compute_candles, pregenerate_analysis)
+    yield
+    await stop_warm_worker()
+    await stop_stream()
+    await close_http_client()
+    await close_providers()
+
+app = FastAPI(title="GeniusO4 API", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], allow_methods=["*"], allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+# Заголовок Server-Timing с длительностями этапов (включается SERVER_TIMING=true)
+app.add_middleware(ServerTimingMiddleware)
 
 @app.get("/health")
 async def health():
     return {"status":"ok"}
 
+@app.get("/metrics")
+async def metrics():
+    # Текстовый формат Prometheus, без авторизации — для скрейпера
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # здесь подключаем анализ
 app.include_router(
     analysis_router,
     prefix="/api",
     dependencies=[Depends(verify_token)]
 )
+app.include_router(
+    screener_router,
+    prefix="/api",
+    dependencies=[Depends(verify_token)]
+)
 
 if __name__=="__main__":
     uvicorn.run(
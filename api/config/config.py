@@ -3,9 +3,8 @@
 import yaml
 import os
 import logging
+import threading
 from dotenv import load_dotenv
-from google.cloud import firestore
-import google.auth
 
 # Загрузка переменных окружения из файла .env (если используется)
 load_dotenv()
@@ -36,7 +35,8 @@ class Config:
             try:
                 with open(config_full_path, 'r', encoding='utf-8') as f:
                     self.config = yaml.safe_load(f) or {}
-                temp_logger.info(f"Конфигурация загружена из {config_full_path}: {self.config}")
+                temp_logger.info(f"Конфигурация загружена из {config_full_path}")
+                temp_logger.debug(f"Содержимое конфигурации: {self.config}")
             except yaml.YAMLError as e:
                 temp_logger.error(f"Ошибка при разборе YAML файла {config_full_path}: {e}")
                 self.config = {}
@@ -103,6 +103,11 @@ DEFAULT_DAYS = config.get('app', 'default_days', 15)
 # Инициализация Firestore клиента
 def get_firestore_client():
     try:
+        # SDK Google импортируется только при первом обращении к Firestore:
+        # сам импорт и поиск credentials занимают секунды
+        import google.auth
+        from google.cloud import firestore
+
         credentials, project = google.auth.default()
         db = firestore.Client(credentials=credentials, project=project)
         logger.info("Firestore Client успешно инициализирован с использованием default credentials.")
@@ -111,4 +116,24 @@ def get_firestore_client():
         logger.error(f"Ошибка инициализации Firestore Client: {e}")
         return None
 
-db = get_firestore_client()
+_db = None
+_db_initialized = False
+_db_lock = threading.Lock()
+
+
+def get_db():
+    """Клиент Firestore, создаётся при первом вызове. None, если инициализация не удалась."""
+    global _db, _db_initialized
+    if not _db_initialized:
+        with _db_lock:
+            if not _db_initialized:
+                _db = get_firestore_client()
+                _db_initialized = True
+    return _db
+
+
+def __getattr__(name):
+    # Совместимость с `from config.config import db`: клиент создаётся при обращении
+    if name == 'db':
+        return get_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,15 +1,25 @@
 # api/routers/analysis.py
 
 import os
-from typing import List
+from typing import Any, AsyncIterator, List, Literal, Optional, Union
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from services.crypto_compare_provider import fetch_ohlcv
+from services.candle_frame import CandleFrame
 from services.data_processor import DataProcessor
 from services.chatgpt_analyzer import ChatGPTAnalyzer
 from services.statistical_analysis import StatisticalAnalyzer
+from services.indicator_registry import required_warmup
+from services.concurrency import run_cpu_bound
+from services.llm_cache import INTERVAL_SECONDS, ttl_until_candle_close
+from services.analysis_validator import validate_analysis
+from services.serialization import FastJSONResponse, dumps
+from services.metrics import span
+from services.resampling import fetch_timeframes
+from services.warm_cache import WarmKey, get_warm, warm_key
 
 router = APIRouter()
 
@@ -20,39 +30,42 @@ class AnalyzeRequest(BaseModel):
     symbol: str
     interval: str
     limit: int
+    # пустой список — все индикаторы; иначе только перечисленные и их зависимости
     indicators: List[str] = []
     drop_na: bool = True
+    # records — список свечей-словарей; columnar — {"columns": [...], "data": {...}}
+    ohlc_format: Literal["records", "columnar"] = "records"
+    # дополнительные таймфреймы: строятся из одной загрузки самого мелкого интервала
+    timeframes: List[str] = []
 
 class AnalyzeResponse(BaseModel):
     analysis: dict
-    ohlc: List[dict]
+    ohlc: Union[List[dict], dict]
     indicators: List[str]
     invalid_chatgpt_response: bool = False
+    timeframes: Optional[dict] = None
 
 
-@router.post("/analyze", response_model=AnalyzeResponse)
-async def analyze(req: AnalyzeRequest):
-    # если пользователь оставил пустой символ — подставляем дефолт
-    symbol = req.symbol.strip().upper() or DEFAULT_SYMBOL
-
-    # 1. Получаем OHLCV с небольшим запасом, чтобы индикаторы успели "разогнаться"
-    extra_candles = 200
-    fetch_limit = req.limit + extra_candles
-    df = await fetch_ohlcv(symbol, req.interval, fetch_limit)
-    if df.empty:
-        raise HTTPException(404, f"No data for symbol {symbol}")
-
-    # 2. Расчёт всех индикаторов
-    processor = DataProcessor(df)
-    df_ind = processor.perform_full_processing(drop_na=req.drop_na)
-    ohlc = processor.get_ohlc_data(req.limit)
+def process_candles(
+    df, limit: int, drop_na: bool, ohlc_format: str = "records", indicators: Optional[List[str]] = None
+):
+    """
+    Синхронная CPU-часть анализа: индикаторы, паттерны, дивергенции.
+    Вызывается в пуле потоков, чтобы не блокировать event loop.
+    """
+    processor = DataProcessor(df, indicators=indicators)
+    df_ind = processor.perform_full_processing(drop_na=drop_na)
+    if ohlc_format == "columnar":
+        ohlc = processor.get_ohlc_columns(limit)
+    else:
+        ohlc = processor.get_ohlc_data(limit)
 
-    stat_analyzer = StatisticalAnalyzer(df_ind)
-    divergences = []
-    divergences.extend(stat_analyzer.find_divergences("RSI"))
-    divergences.extend(stat_analyzer.find_divergences("MACD"))
+    # Статистика читает те же массивы столбцов, без копии кадра
+    stat_analyzer = StatisticalAnalyzer(CandleFrame.from_pandas(df_ind))
+    with span("divergences"):
+        divergences = stat_analyzer.find_divergences_multi(["RSI", "MACD"])
     if hasattr(processor, 'get_candlestick_patterns'):
-        patterns = processor.get_candlestick_patterns(req.limit)
+        patterns = processor.get_candlestick_patterns(limit)
     else:
         patterns = []
 
@@ -63,17 +76,162 @@ async def analyze(req: AnalyzeRequest):
         'Taker Buy Base Asset Volume', 'Taker Buy Quote Asset Volume'
     ]
     indicator_cols = [c for c in df_ind.columns if c not in base_cols]
+    return ohlc, divergences, patterns, indicator_cols
+
+
+def process_timeframes(frames, limit: int, drop_na: bool, ohlc_format: str, indicators: List[str]):
+    """Расчёт всех таймфреймов одной задачей пула (пустые кадры пропускаются)."""
+    return {
+        interval: process_candles(df, limit, drop_na, ohlc_format, indicators)
+        for interval, df in frames.items()
+        if not df.empty
+    }
+
+
+async def compute_candles(key: WarmKey):
+    """Загружает свечи и считает индикаторы, паттерны и дивергенции (None — нет данных)."""
+    symbol, interval, limit, drop_na, ohlc_format, indicators = key
+    # 1. Получаем OHLCV с запасом на разгон самого "длинного" из запрошенных индикаторов
+    extra_candles = required_warmup(list(indicators))
+    fetch_limit = limit + extra_candles
+    with span("fetch"):
+        df = await fetch_ohlcv(symbol, interval, fetch_limit)
+    if df.empty:
+        return None
+
+    # 2. Расчёт всех индикаторов (в пуле потоков)
+    return await run_cpu_bound(
+        process_candles, df, limit, drop_na, ohlc_format, list(indicators)
+    )
+
+
+async def pregenerate_analysis(key: WarmKey, result) -> None:
+    """Прогрев: анализ LLM для прогретых свечей попадает в кеш до закрытия свечи."""
+    ohlc = result[0]
+    await ChatGPTAnalyzer().analyze({"ohlc": ohlc}, cache_ttl=ttl_until_candle_close(key[1]))
+
+
+async def prepare_candles(req: AnalyzeRequest):
+    """Свечи с индикаторами: из прогретого хранилища или свежим расчётом."""
+    # если пользователь оставил пустой символ — подставляем дефолт
+    symbol = req.symbol.strip().upper() or DEFAULT_SYMBOL
+    key = warm_key(symbol, req.interval, req.limit, req.drop_na, req.ohlc_format, req.indicators)
+
+    result = await get_warm(key)
+    if result is None:
+        result = await compute_candles(key)
+    if result is None:
+        raise HTTPException(404, f"No data for symbol {symbol}")
+    return result
+
+
+async def prepare_timeframes(req: AnalyzeRequest):
+    """
+    Свечи с индикаторами для req.interval и req.timeframes: один запрос
+    самого мелкого интервала, старшие агрегируются из него.
+    """
+    symbol = req.symbol.strip().upper() or DEFAULT_SYMBOL
+    intervals = list(dict.fromkeys([req.interval, *req.timeframes]))
+    unknown = [interval for interval in intervals if interval not in INTERVAL_SECONDS]
+    if unknown:
+        raise HTTPException(400, f"Unknown timeframes: {', '.join(unknown)}")
+
+    extra_candles = required_warmup(req.indicators)
+    with span("fetch"):
+        frames = await fetch_timeframes(symbol, intervals, req.limit + extra_candles)
+    results = await run_cpu_bound(
+        process_timeframes, frames, req.limit, req.drop_na, req.ohlc_format, req.indicators
+    )
+    if req.interval not in results:
+        raise HTTPException(404, f"No data for symbol {symbol}")
+    return results
+
+
+@router.post("/analyze", response_model=AnalyzeResponse)
+async def analyze(req: AnalyzeRequest):
+    timeframes = None
+    if req.timeframes:
+        results = await prepare_timeframes(req)
+        ohlc, divergences, patterns, indicator_cols = results[req.interval]
+        timeframes = {
+            interval: {
+                "ohlc": tf_ohlc,
+                "indicators": tf_indicators,
+                "divergence_analysis": tf_divergences,
+                "candlestick_patterns": tf_patterns,
+            }
+            for interval, (tf_ohlc, tf_divergences, tf_patterns, tf_indicators) in results.items()
+            # основной интервал уже в корне ответа
+            if interval != req.interval
+        }
+    else:
+        ohlc, divergences, patterns, indicator_cols = await prepare_candles(req)
 
     # 3. Анализ ChatGPT
     analyzer = ChatGPTAnalyzer()
-    analysis, invalid = analyzer.analyze({"ohlc": ohlc})
-    analysis = analysis or {}
-    analysis["divergence_analysis"] = divergences
-    analysis["candlestick_patterns"] = patterns
-
-    return AnalyzeResponse(
-        analysis=analysis,
-        ohlc=ohlc,
-        indicators=indicator_cols,
-        invalid_chatgpt_response=invalid,
+    # ответ кешируется до закрытия текущей свечи интервала
+    analysis, invalid = await analyzer.analyze(
+        {"ohlc": ohlc}, cache_ttl=ttl_until_candle_close(req.interval)
     )
+    # новый словарь: ответ модели может быть общим с кешем
+    analysis = {
+        **(analysis or {}),
+        "divergence_analysis": divergences,
+        "candlestick_patterns": patterns,
+    }
+
+    # Ответ кодируется напрямую (orjson), без валидации AnalyzeResponse по каждой свече
+    response = {
+        "analysis": analysis,
+        "ohlc": ohlc,
+        "indicators": indicator_cols,
+        "invalid_chatgpt_response": invalid,
+    }
+    if timeframes is not None:
+        response["timeframes"] = timeframes
+    return FastJSONResponse(response)
+
+
+def ndjson_event(event: str, data: Any) -> bytes:
+    """Одна строка NDJSON-потока: {"event": ..., "data": ...}."""
+    return dumps({"event": event, "data": data}) + b"\n"
+
+
+@router.post("/analyze/stream")
+async def analyze_stream(req: AnalyzeRequest):
+    """
+    Потоковый анализ в формате NDJSON. Порядок событий:
+    ohlc, indicators, divergence_analysis, candlestick_patterns,
+    затем delta (фрагменты ответа модели) и финальное analysis.
+    """
+    # Ошибки загрузки данных возвращаются обычным HTTP-статусом до начала потока
+    ohlc, divergences, patterns, indicator_cols = await prepare_candles(req)
+
+    async def events() -> AsyncIterator[bytes]:
+        yield ndjson_event("ohlc", ohlc)
+        yield ndjson_event("indicators", indicator_cols)
+        yield ndjson_event("divergence_analysis", divergences)
+        yield ndjson_event("candlestick_patterns", patterns)
+
+        analyzer = ChatGPTAnalyzer()
+        analysis, invalid = {}, True
+        async for kind, payload in analyzer.analyze_stream(
+            {"ohlc": ohlc}, cache_ttl=ttl_until_candle_close(req.interval)
+        ):
+            if kind == "delta":
+                yield ndjson_event("delta", payload)
+            else:
+                analysis, invalid = payload
+
+        analysis = {
+            **(analysis or {}),
+            "divergence_analysis": divergences,
+            "candlestick_patterns": patterns,
+        }
+        validate_analysis(analysis)
+        yield ndjson_event("analysis", {
+            "analysis": analysis,
+            "invalid_chatgpt_response": invalid,
+        })
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
@@ -0,0 +1,42 @@
+# api/routers/screener.py
+
+from typing import List
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field, model_validator
+
+from services.screener import SCREEN_MAX_LIMIT, SCREEN_MAX_PAIRS, screen
+from services.serialization import FastJSONResponse
+
+router = APIRouter()
+
+
+class ScreenRequest(BaseModel):
+    symbols: List[str]
+    intervals: List[str] = ["4h"]
+    # свечей для расчёта (без учёта разгона индикаторов)
+    limit: int = Field(200, ge=1, le=SCREEN_MAX_LIMIT)
+    # сигналы ищутся в последних lookback свечах (не больше limit)
+    lookback: int = Field(5, ge=1, le=SCREEN_MAX_LIMIT)
+    # пустой список — набор индикаторов скринера по умолчанию
+    indicators: List[str] = []
+
+    @model_validator(mode="after")
+    def check_lookback(self) -> "ScreenRequest":
+        if self.lookback > self.limit:
+            raise ValueError("lookback must not exceed limit")
+        return self
+
+
+@router.post("/screen")
+async def screen_symbols(req: ScreenRequest):
+    """Ранжированные сводки сигналов по многим парам без обращения к LLM."""
+    symbols = list(dict.fromkeys(s.strip().upper() for s in req.symbols if s.strip()))
+    intervals = list(dict.fromkeys(req.intervals))
+    if not symbols or not intervals:
+        raise HTTPException(422, "symbols and intervals must not be empty")
+    if len(symbols) * len(intervals) > SCREEN_MAX_PAIRS:
+        raise HTTPException(422, f"Too many pairs, max {SCREEN_MAX_PAIRS}")
+
+    result = await screen(symbols, intervals, req.limit, req.lookback, req.indicators or None)
+    return FastJSONResponse(result)
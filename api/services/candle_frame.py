@@ -0,0 +1,146 @@
+# api/services/candle_frame.py
+
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Столбец времени свечи по умолчанию
+TIME_COLUMN = "Open Time"
+
+
+class CandleFrame:
+    """
+    Колоночный контейнер свечей для горячего пути анализа.
+
+    Числовые столбцы — непрерывные массивы float64/int64 (bool хранится как есть),
+    столбцы дат — int64 с единицей измерения в time_units. Массивы берутся
+    из DataFrame без копирования и не изменяются: DataProcessor,
+    StatisticalAnalyzer и сериализаторы читают одни и те же данные,
+    а pandas создаётся только на границе API (to_pandas).
+    """
+
+    __slots__ = ("names", "arrays", "time_units", "attrs")
+
+    def __init__(
+        self,
+        arrays: Dict[str, np.ndarray],
+        time_units: Optional[Dict[str, str]] = None,
+        attrs: Optional[Dict[str, Any]] = None,
+    ):
+        self.names: List[str] = list(arrays)
+        self.arrays = arrays
+        # Столбец даты -> единица datetime64 ('s', 'us', 'ns' ...)
+        self.time_units: Dict[str, str] = time_units or {}
+        self.attrs: Dict[str, Any] = dict(attrs or {})
+
+    @classmethod
+    def from_pandas(cls, df: pd.DataFrame) -> "CandleFrame":
+        """Массивы столбцов df без копирования (для однотипных блоков pandas)."""
+        arrays: Dict[str, np.ndarray] = {}
+        time_units: Dict[str, str] = {}
+        for col in df.columns:
+            series = df[col]
+            if pd.api.types.is_datetime64_any_dtype(series):
+                if getattr(series.dtype, "tz", None) is not None:
+                    series = series.dt.tz_convert("UTC").dt.tz_localize(None)
+                values = series.to_numpy()
+                time_units[col] = np.datetime_data(values.dtype)[0]
+                arrays[col] = values.view(np.int64)
+            elif pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_extension_array_dtype(series):
+                arrays[col] = series.to_numpy()
+            else:
+                arrays[col] = series.to_numpy(dtype=object)
+        return cls(arrays, time_units, df.attrs)
+
+    def to_pandas(self) -> pd.DataFrame:
+        """DataFrame для кода, которому нужен pandas (числовые столбцы без копирования)."""
+        data = {
+            name: self.datetimes(name) if name in self.time_units else self.arrays[name]
+            for name in self.names
+        }
+        df = pd.DataFrame(data, copy=False)
+        df.attrs.update(self.attrs)
+        return df
+
+    def __len__(self) -> int:
+        return len(self.arrays[self.names[0]]) if self.names else 0
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.arrays
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    @property
+    def columns(self) -> List[str]:
+        return self.names
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    def is_numeric(self, name: str) -> bool:
+        return name not in self.time_units and self.arrays[name].dtype != object
+
+    def numeric_columns(self, include_times: bool = False) -> List[str]:
+        return [
+            name for name in self.names
+            if self.is_numeric(name) or (include_times and name in self.time_units)
+        ]
+
+    def floats(self, name: str) -> np.ndarray:
+        """Столбец как float64 (без копирования, если он уже float64)."""
+        return np.asarray(self.arrays[name], dtype=np.float64)
+
+    def matrix(self, names: Iterable[str]) -> np.ndarray:
+        """Матрица свечи x столбцы float64 (копия; NaT дат становится NaN)."""
+        names = list(names)
+        result = np.empty((len(self), len(names)), dtype=np.float64)
+        for j, name in enumerate(names):
+            column = self.arrays[name]
+            result[:, j] = column
+            if name in self.time_units:
+                result[column == np.iinfo(np.int64).min, j] = np.nan
+        return result
+
+    def datetimes(self, name: str = TIME_COLUMN) -> np.ndarray:
+        """Столбец даты как datetime64 (представление int64-массива)."""
+        return self.arrays[name].view(f"datetime64[{self.time_units[name]}]")
+
+    def timestamp(self, name: str, i: int) -> str:
+        """Дата свечи i строкой, как str(pd.Timestamp)."""
+        return str(pd.Timestamp(self.datetimes(name)[i]))
+
+    def tail(self, n: int) -> "CandleFrame":
+        """Последние n свечей: срезы тех же массивов."""
+        start = max(len(self) - n, 0) if n > 0 else len(self)
+        return CandleFrame(
+            {name: array[start:] for name, array in self.arrays.items()}, self.time_units, self.attrs
+        )
+
+    def select(self, mask: np.ndarray) -> "CandleFrame":
+        """Свечи по булевой маске (копия массивов)."""
+        return CandleFrame(
+            {name: array[mask] for name, array in self.arrays.items()}, self.time_units, self.attrs
+        )
+
+    def to_columns(self) -> Dict[str, Any]:
+        """
+        Колоночный формат ответа API: {"columns": [...], "data": {столбец: значения}}.
+        Числовые столбцы отдаются массивами (NaN/inf кодируются как null при
+        сериализации), даты — строками ISO, прочие — списками с None.
+        """
+        data: Dict[str, Any] = {}
+        for name in self.names:
+            column = self.arrays[name]
+            if name in self.time_units:
+                values = np.datetime_as_string(self.datetimes(name), unit="s").astype(object)
+                values[column == np.iinfo(np.int64).min] = None
+                data[name] = values.tolist()
+            elif self.is_numeric(name) and column.dtype != bool:
+                data[name] = column
+            else:
+                values = column.astype(object)
+                data[name] = [None if pd.isna(v) else v for v in values.tolist()]
+        return {"columns": [str(name) for name in self.names], "data": data}
@@ -0,0 +1,405 @@
+# api/services/candle_stream.py
+
+import asyncio
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from config.config import logger
+from services.llm_cache import INTERVAL_SECONDS
+from services.metrics import UPSTREAM_ERRORS
+
+# Потоковая загрузка свечей (при false данные берутся только через REST)
+STREAM_ENABLED = os.getenv("STREAM_ENABLED", "false").lower() == "true"
+# Источник потока: websocket или replay
+STREAM_SOURCE = os.getenv("STREAM_SOURCE", "websocket").lower()
+# Адрес WebSocket в формате потоков Binance
+STREAM_URL = os.getenv("STREAM_URL", "wss://stream.binance.com:9443/stream")
+# Пары и интервалы для подписки: "BTCUSDT:1m,BTCUSDT:1h,ETHUSDT:4h"
+STREAM_PAIRS = os.getenv("STREAM_PAIRS", "BTCUSDT:1m,BTCUSDT:1h")
+# Подписываться также на сделки, чтобы формирующаяся свеча обновлялась по каждому тику
+STREAM_TRADES = os.getenv("STREAM_TRADES", "false").lower() == "true"
+# Сколько последних свечей хранит кольцевой буфер пары
+STREAM_BUFFER_SIZE = int(os.getenv("STREAM_BUFFER_SIZE", "2000"))
+# Если буфер не обновлялся столько секунд, поток считается отставшим — читаем через REST
+STREAM_MAX_LAG = float(os.getenv("STREAM_MAX_LAG", "60"))
+# Файл JSON Lines для источника replay
+STREAM_REPLAY_PATH = os.getenv("STREAM_REPLAY_PATH", "")
+# Пауза перед переподключением WebSocket, сек (удваивается до 60)
+STREAM_RECONNECT_DELAY = float(os.getenv("STREAM_RECONNECT_DELAY", "1"))
+
+# Поля свечи в буфере: время открытия (unix, сек), цены и объёмы
+FIELDS = ("time", "open", "high", "low", "close", "volume", "quote_volume")
+_TIME, _OPEN, _HIGH, _LOW, _CLOSE, _VOLUME, _QUOTE_VOLUME = range(len(FIELDS))
+
+
+def pair_key(symbol: str) -> str:
+    """Символ биржи (BTCUSDT, btc-usdt) -> ключ "BTC/USDT", как в df.attrs['symbol']."""
+    # Импорт здесь: crypto_compare_provider сам читает буферы этого модуля
+    from services.crypto_compare_provider import parse_pair
+
+    base, quote = parse_pair(symbol)
+    return f"{base}/{quote}"
+
+
+class CandleRingBuffer:
+    """
+    Кольцевой буфер последних capacity свечей одного интервала.
+
+    Каждая свеча пишется дважды — в позицию i и i + capacity, поэтому
+    последние n свечей всегда лежат в памяти подряд, и view() возвращает
+    срезы без копирования. Срез остаётся корректным, пока после его получения
+    не пришло больше capacity - n новых свечей; формирующаяся (последняя)
+    свеча в срезе обновляется на месте. Для передачи в другие потоки —
+    snapshot(): буфер изменяется из event loop.
+    """
+
+    def __init__(self, capacity: int, step: int):
+        self.capacity = capacity
+        self.step = step
+        self._data = np.full((len(FIELDS), 2 * capacity), np.nan)
+        # Всего записано свечей (позиция следующей)
+        self._count = 0
+        # time.monotonic() последнего события потока (дозаполнение из REST его не меняет)
+        self.updated_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    @property
+    def last_time(self) -> Optional[int]:
+        if not self._count:
+            return None
+        return int(self._data[_TIME, (self._count - 1) % self.capacity])
+
+    def _write(self, position: int, row: Iterable[float]) -> None:
+        index = position % self.capacity
+        values = np.asarray(tuple(row), dtype=float)
+        self._data[:, index] = values
+        self._data[:, index + self.capacity] = values
+
+    def upsert(self, open_time: int, open_: float, high: float, low: float, close: float,
+               volume: float, quote_volume: float) -> None:
+        """Добавляет новую свечу или перезаписывает уже хранящуюся с тем же временем."""
+        self.updated_at = time.monotonic()
+        open_time = int(open_time) - int(open_time) % self.step
+        row = (open_time, open_, high, low, close, volume, quote_volume)
+        last = self.last_time
+        if last is None or open_time > last:
+            self._write(self._count, row)
+            self._count += 1
+            return
+        # Свеча из прошлого: обновляется, только если она ещё в буфере
+        offset = (last - open_time) // self.step
+        position = self._count - 1 - offset
+        if offset < len(self) and int(self._data[_TIME, position % self.capacity]) == open_time:
+            self._write(position, row)
+
+    def apply_trade(self, timestamp: float, price: float, quantity: float) -> None:
+        """Сделка обновляет формирующуюся свечу или открывает новую."""
+        self.updated_at = time.monotonic()
+        open_time = int(timestamp) - int(timestamp) % self.step
+        last = self.last_time
+        if last is None or open_time > last:
+            self._write(self._count, (open_time, price, price, price, price, quantity, price * quantity))
+            self._count += 1
+            return
+        if open_time < last:
+            # Запоздавшая сделка по уже закрытой свече не меняет её
+            return
+        index = (self._count - 1) % self.capacity
+        row = self._data[:, index].copy()
+        row[_HIGH] = max(row[_HIGH], price)
+        row[_LOW] = min(row[_LOW], price)
+        row[_CLOSE] = price
+        row[_VOLUME] += quantity
+        row[_QUOTE_VOLUME] += price * quantity
+        self._write(self._count - 1, row)
+
+    def merge(self, rows: Iterable[Tuple[float, ...]]) -> None:
+        """
+        Объединяет свечи (строки в порядке FIELDS) с хранящимися и пересобирает
+        буфер. Более мелкие свечи агрегируются в шаг буфера (Open — первая,
+        High/Low — экстремумы, Close — последняя, объёмы суммируются).
+        При совпадении времени остаётся свеча из буфера: поток свежее REST.
+        Ранее выданные срезы после пересборки недействительны.
+        """
+        merged: Dict[int, Tuple[float, ...]] = {}
+        for row in sorted(rows, key=lambda row: row[0]):
+            open_time = int(row[0]) - int(row[0]) % self.step
+            candle = merged.get(open_time)
+            if candle is None:
+                merged[open_time] = tuple(row[1:])
+            else:
+                open_, high, low, _, volume, quote_volume = candle
+                merged[open_time] = (
+                    open_, max(high, row[2]), min(low, row[3]), row[4],
+                    volume + row[5], quote_volume + row[6],
+                )
+        current = self.view()
+        for i, open_time in enumerate(current["time"]):
+            merged[int(open_time)] = tuple(current[field][i] for field in FIELDS[1:])
+        self._count = 0
+        for open_time in sorted(merged)[-self.capacity:]:
+            self._write(self._count, (open_time,) + merged[open_time])
+            self._count += 1
+
+    def view(self, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Последние n свечей: поле -> срез буфера только для чтения (без копирования)."""
+        size = len(self)
+        n = size if n is None else min(n, size)
+        start = (self._count - n) % self.capacity if n else 0
+        block = self._data[:, start:start + n].view()
+        block.flags.writeable = False
+        return {field: block[i] for i, field in enumerate(FIELDS)}
+
+    def snapshot(self, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Копия последних n свечей: не меняется при последующих записях в буфер."""
+        block = np.vstack(tuple(self.view(n).values()))
+        return {field: block[i] for i, field in enumerate(FIELDS)}
+
+
+def candles_frame(columns: Dict[str, np.ndarray], step: int, symbol: str, interval: str) -> pd.DataFrame:
+    """
+    DataFrame того же вида, что и из REST в fetch_ohlcv (столбцы в том же порядке),
+    поверх переданных массивов без копирования — передавать нужно snapshot().
+    """
+    size = len(columns["time"])
+    df = pd.DataFrame({
+        "High": columns["high"],
+        "Low": columns["low"],
+        "Open": columns["open"],
+        "Volume": columns["volume"],
+        "Quote Asset Volume": columns["quote_volume"],
+        "Close": columns["close"],
+        # Свечи биржи — прямые котировки пары, без конвертации через третью валюту
+        "conversionType": np.full(size, "direct", dtype=object),
+        "conversionSymbol": np.full(size, "", dtype=object),
+    }, copy=False)
+    df["Open Time"] = pd.to_datetime(columns["time"].astype("int64"), unit="s")
+    df["Close Time"] = df["Open Time"] + pd.to_timedelta(step, unit="s")
+    df.attrs["symbol"] = symbol
+    df.attrs["interval"] = interval
+    return df
+
+
+# Событие потока: ("kline", символ, интервал, свеча) или ("trade", символ, время, цена, объём)
+StreamEvent = Tuple[Any, ...]
+
+
+def parse_message(message: Dict[str, Any]) -> Optional[StreamEvent]:
+    """Разбирает сообщение в формате потоков Binance (kline и trade)."""
+    data = message.get("data", message)
+    event = data.get("e")
+    if event == "kline":
+        k = data["k"]
+        candle = (
+            int(k["t"]) // 1000, float(k["o"]), float(k["h"]), float(k["l"]),
+            float(k["c"]), float(k["v"]), float(k["q"]),
+        )
+        return ("kline", data.get("s") or k["s"], k["i"], candle)
+    if event == "trade":
+        return ("trade", data["s"], int(data["T"]) / 1000, float(data["p"]), float(data["q"]))
+    return None
+
+
+class CandleStreamHub:
+    """Кольцевые буферы по (пара, интервал); подписка задаётся заранее или через subscribe."""
+
+    def __init__(self, capacity: int = STREAM_BUFFER_SIZE, max_lag: float = STREAM_MAX_LAG):
+        self.capacity = capacity
+        self.max_lag = max_lag
+        self.buffers: Dict[Tuple[str, str], CandleRingBuffer] = {}
+
+    def subscribe(self, symbol: str, interval: str) -> CandleRingBuffer:
+        key = (pair_key(symbol), interval)
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            buffer = CandleRingBuffer(self.capacity, INTERVAL_SECONDS[interval])
+            self.buffers[key] = buffer
+        return buffer
+
+    def buffer(self, symbol: str, interval: str) -> Optional[CandleRingBuffer]:
+        return self.buffers.get((pair_key(symbol), interval))
+
+    def ingest(self, message: Dict[str, Any]) -> bool:
+        """Применяет сообщение потока к буферам. False — сообщение не относится к подпискам."""
+        event = parse_message(message)
+        if event is None:
+            return False
+        if event[0] == "kline":
+            _, symbol, interval, candle = event
+            buffer = self.buffer(symbol, interval)
+            if buffer is None:
+                return False
+            buffer.upsert(*candle)
+            return True
+        _, symbol, timestamp, price, quantity = event
+        key = pair_key(symbol)
+        buffers = [b for (pair, _), b in self.buffers.items() if pair == key]
+        for buffer in buffers:
+            buffer.apply_trade(timestamp, price, quantity)
+        return bool(buffers)
+
+    def seed(self, symbol: str, interval: str, candles: Iterable[Dict[str, Any]]) -> int:
+        """Дозаполняет буфер свечами из REST (формат CryptoCompare). Только для подписанных пар."""
+        buffer = self.buffer(symbol, interval)
+        if buffer is None:
+            return 0
+        rows = [
+            (c["time"], c["open"], c["high"], c["low"], c["close"],
+             c.get("volumefrom", 0.0), c.get("volumeto", 0.0))
+            for c in candles
+        ]
+        buffer.merge(rows)
+        return len(rows)
+
+    def view(self, symbol: str, interval: str, limit: int) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Срезы последних limit свечей без копирования или None, если пары нет
+        в подписке, в буфере меньше limit свечей или поток отстал.
+        """
+        buffer = self.buffer(symbol, interval)
+        if buffer is None or len(buffer) < limit:
+            return None
+        if buffer.updated_at is None or time.monotonic() - buffer.updated_at > self.max_lag:
+            return None
+        return buffer.view(limit)
+
+    def frame(self, symbol: str, interval: str, limit: int) -> Optional[pd.DataFrame]:
+        """
+        Кадр как у REST в fetch_ohlcv: limit + 1 свечей (CryptoCompare отдаёт
+        limit + 1). Данные копируются здесь, в event loop: кадр обрабатывается
+        в пуле потоков, пока поток продолжает писать в буфер.
+        """
+        if self.view(symbol, interval, limit + 1) is None:
+            return None
+        columns = self.buffer(symbol, interval).snapshot(limit + 1)
+        return candles_frame(columns, INTERVAL_SECONDS[interval], pair_key(symbol), interval)
+
+    async def run(self, source: "StreamSource") -> None:
+        async for message in source.messages():
+            try:
+                self.ingest(message)
+            except Exception as e:
+                logger.error(f"Ошибка обработки сообщения потока свечей: {e}")
+
+
+class StreamSource(ABC):
+    """Источник сообщений потока свечей."""
+
+    @abstractmethod
+    def messages(self) -> AsyncIterator[Dict[str, Any]]:
+        """Асинхронный итератор сообщений (словари в формате потоков Binance)."""
+        pass
+
+
+class ReplaySource(StreamSource):
+    """Воспроизведение записанных сообщений (файл JSON Lines или список) — для тестов и отладки."""
+
+    def __init__(self, messages: Union[str, List[Dict[str, Any]]], delay: float = 0.0):
+        self.source = messages
+        self.delay = delay
+
+    async def messages(self) -> AsyncIterator[Dict[str, Any]]:
+        if isinstance(self.source, str):
+            with open(self.source, encoding="utf-8") as f:
+                items = [json.loads(line) for line in f if line.strip()]
+        else:
+            items = self.source
+        for message in items:
+            yield message
+            # Пауза отдаёт управление event loop между сообщениями
+            await asyncio.sleep(self.delay)
+
+
+class WebSocketSource(StreamSource):
+    """Поток биржи по WebSocket (пакет websockets) с переподключением."""
+
+    def __init__(self, url: str, streams: List[str], reconnect_delay: float = STREAM_RECONNECT_DELAY):
+        self.url = url
+        self.streams = streams
+        self.reconnect_delay = reconnect_delay
+
+    async def messages(self) -> AsyncIterator[Dict[str, Any]]:
+        import websockets
+
+        delay = self.reconnect_delay
+        while True:
+            try:
+                async with websockets.connect(self.url) as ws:
+                    await ws.send(json.dumps({"method": "SUBSCRIBE", "params": self.streams, "id": 1}))
+                    logger.info(f"Поток свечей подключён: {len(self.streams)} подписок")
+                    delay = self.reconnect_delay
+                    async for raw in ws:
+                        yield json.loads(raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                UPSTREAM_ERRORS.inc("stream")
+                logger.error(f"Ошибка потока свечей: {e}. Переподключение через {delay:.0f} с")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60.0)
+
+
+def parse_stream_pairs(spec: str) -> List[Tuple[str, str]]:
+    """"BTCUSDT:1m,ETHUSDT:4h" -> [("BTCUSDT", "1m"), ("ETHUSDT", "4h")]."""
+    pairs = []
+    for item in spec.split(","):
+        symbol, _, interval = item.strip().partition(":")
+        if symbol and interval in INTERVAL_SECONDS:
+            pairs.append((symbol.upper(), interval))
+        elif item.strip():
+            logger.warning(f"STREAM_PAIRS: пропущена некорректная запись {item!r}")
+    return pairs
+
+
+def make_source(pairs: List[Tuple[str, str]]) -> StreamSource:
+    if STREAM_SOURCE == "replay":
+        return ReplaySource(STREAM_REPLAY_PATH)
+    streams = [f"{symbol.lower()}@kline_{interval}" for symbol, interval in pairs]
+    if STREAM_TRADES:
+        streams += sorted({f"{symbol.lower()}@trade" for symbol, _ in pairs})
+    return WebSocketSource(STREAM_URL, streams)
+
+
+_hub: Optional[CandleStreamHub] = None
+_task: Optional["asyncio.Task[None]"] = None
+
+
+def get_stream_hub() -> Optional[CandleStreamHub]:
+    """Общий набор буферов (None, если поток не запущен)."""
+    return _hub
+
+
+def start_stream(source: Optional[StreamSource] = None) -> Optional[CandleStreamHub]:
+    """Подписывает пары из STREAM_PAIRS и запускает чтение потока (если STREAM_ENABLED)."""
+    global _hub, _task
+    if not STREAM_ENABLED and source is None:
+        return None
+    if _hub is None:
+        pairs = parse_stream_pairs(STREAM_PAIRS)
+        _hub = CandleStreamHub()
+        for symbol, interval in pairs:
+            _hub.subscribe(symbol, interval)
+        _task = asyncio.ensure_future(_hub.run(source or make_source(pairs)))
+        logger.info(f"Потоковая загрузка свечей запущена: {len(pairs)} пар")
+    return _hub
+
+
+async def stop_stream() -> None:
+    global _hub, _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Поток свечей завершился с ошибкой: {e}")
+    _hub, _task = None, None
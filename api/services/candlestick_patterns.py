@@ -0,0 +1,145 @@
+# api/services/candlestick_patterns.py
+
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Детектор получает словарь массивов свечей и возвращает булеву маску
+PatternDetector = Callable[[Dict[str, np.ndarray]], np.ndarray]
+
+# Зарегистрированные паттерны в порядке вывода: (тип, пояснение, детектор)
+CANDLESTICK_PATTERNS: List[Tuple[str, str, PatternDetector]] = []
+
+
+def register_pattern(pattern_type: str, explanation: str):
+    """
+    Декоратор для регистрации нового свечного паттерна.
+    Детектор должен работать с целыми массивами, без циклов по строкам.
+    """
+    def decorator(func: PatternDetector) -> PatternDetector:
+        CANDLESTICK_PATTERNS.append((pattern_type, explanation, func))
+        return func
+    return decorator
+
+
+def shift(values: np.ndarray, periods: int = 1) -> np.ndarray:
+    """Сдвигает массив на periods свечей назад, заполняя начало NaN."""
+    result = np.full(len(values), np.nan)
+    if periods < len(values):
+        result[periods:] = values[:len(values) - periods]
+    return result
+
+
+def candle_arrays(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Считает тело, диапазон и тени свечей одним проходом по столбцам."""
+    open_ = df['Open'].to_numpy(dtype=np.float64)
+    close = df['Close'].to_numpy(dtype=np.float64)
+    high = df['High'].to_numpy(dtype=np.float64)
+    low = df['Low'].to_numpy(dtype=np.float64)
+    return {
+        'open': open_,
+        'close': close,
+        'high': high,
+        'low': low,
+        'body': np.abs(close - open_),
+        'range': high - low,
+        'lower': np.minimum(open_, close) - low,
+        'upper': high - np.maximum(open_, close),
+        'prev_open': shift(open_),
+        'prev_close': shift(close),
+    }
+
+
+@register_pattern('Doji', 'Свеча с маленьким телом, возможный разворот.')
+def _doji(c: Dict[str, np.ndarray]) -> np.ndarray:
+    return c['body'] <= c['range'] * 0.1
+
+
+@register_pattern('Hammer', 'Длинная нижняя тень, бычий сигнал.')
+def _hammer(c: Dict[str, np.ndarray]) -> np.ndarray:
+    return (c['lower'] >= c['body'] * 2) & (c['upper'] <= c['body'] * 0.1)
+
+
+@register_pattern('Shooting Star', 'Длинная верхняя тень, медвежий сигнал.')
+def _shooting_star(c: Dict[str, np.ndarray]) -> np.ndarray:
+    return (c['upper'] >= c['body'] * 2) & (c['lower'] <= c['body'] * 0.1)
+
+
+@register_pattern('Bullish Engulfing', 'Бычье поглощение предыдущей свечи.')
+def _bullish_engulfing(c: Dict[str, np.ndarray]) -> np.ndarray:
+    return (
+        (c['prev_close'] < c['prev_open'])
+        & (c['close'] > c['open'])
+        & (c['close'] >= c['prev_open'])
+        & (c['open'] <= c['prev_close'])
+    )
+
+
+@register_pattern('Bearish Engulfing', 'Медвежье поглощение предыдущей свечи.')
+def _bearish_engulfing(c: Dict[str, np.ndarray]) -> np.ndarray:
+    return (
+        (c['prev_close'] > c['prev_open'])
+        & (c['close'] < c['open'])
+        & (c['open'] >= c['prev_close'])
+        & (c['close'] <= c['prev_open'])
+    )
+
+
+@register_pattern('Morning Star', 'Медвежья свеча, звезда и бычья свеча: возможный разворот вверх.')
+def _morning_star(c: Dict[str, np.ndarray]) -> np.ndarray:
+    first_open, first_close = shift(c['open'], 2), shift(c['close'], 2)
+    first_body = np.abs(first_close - first_open)
+    star_body = shift(c['body'])
+    return (
+        (first_close < first_open)
+        & (first_body >= shift(c['range'], 2) * 0.5)
+        & (star_body <= first_body * 0.3)
+        & (c['close'] > c['open'])
+        & (c['close'] >= (first_open + first_close) / 2)
+    )
+
+
+@register_pattern('Three White Soldiers', 'Три растущие свечи подряд, сильный бычий сигнал.')
+def _three_white_soldiers(c: Dict[str, np.ndarray]) -> np.ndarray:
+    bullish = c['close'] > c['open']
+    # Каждая свеча открывается внутри тела предыдущей и закрывается выше
+    advancing = (
+        bullish
+        & (c['open'] > c['prev_open'])
+        & (c['open'] <= c['prev_close'])
+        & (c['close'] > c['prev_close'])
+        & (c['upper'] <= c['body'] * 0.3)
+    )
+    prev_advancing = shift(advancing.astype(np.float64)) == 1
+    first_bullish = shift(bullish.astype(np.float64), 2) == 1
+    return advancing & prev_advancing & first_bullish
+
+
+def detect_patterns(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Выявляет все зарегистрированные паттерны.
+    Возвращает список словарей в порядке свечей, внутри свечи — в порядке регистрации.
+    """
+    if len(df) < 2:
+        return []
+    arrays = candle_arrays(df)
+    # Первая свеча и свечи с нулевым диапазоном не рассматриваются
+    valid = arrays['range'] != 0
+    valid[0] = False
+
+    with np.errstate(invalid='ignore'):
+        masks = np.vstack([detector(arrays) & valid for _, _, detector in CANDLESTICK_PATTERNS])
+    rows, kinds = np.nonzero(masks.T)
+
+    open_time = df['Open Time']
+    close = arrays['close']
+    return [
+        {
+            'type': CANDLESTICK_PATTERNS[kind][0],
+            'date': str(open_time.iat[row]),
+            'price': float(close[row]),
+            'explanation': CANDLESTICK_PATTERNS[kind][1],
+        }
+        for row, kind in zip(rows.tolist(), kinds.tolist())
+    ]
@@ -1,13 +1,23 @@
 # src/analysis/chatgpt_analyzer.py
 
+import asyncio
 import json
-from typing import Dict, Any
+from typing import AsyncIterator, Dict, Any, List, Optional
 from config.config import OPENAI_API_KEY, logger
-from openai import OpenAI
+from services.concurrency import run_cpu_bound
+from services.llm_service import LLMService
+from services.metrics import PAYLOAD_BYTES, cache_event, span
+from services.llm_cache import get_llm_cache, make_cache_key
+from services.prompt_encoding import encode_ohlc_compact, encode_ohlc_records
 import re
 import os
 import time
-import math
+
+# Формат данных в промпте: compact (столбцы + строки) или json (список словарей)
+PROMPT_ENCODING = os.getenv("PROMPT_ENCODING", "compact").lower()
+
+SYSTEM_PROMPT = "You are an...erienced trader and a top-tier expert in predictive analysis."
+
 
 class ChatGPTAnalyzer:
     """
@@ -19,8 +29,17 @@ class ChatGPTAnalyzer:
         Инициализирует ChatGPTAnalyzer с API ключом и моделью.
         """
         self.api_key = OPENAI_API_KEY
-        self.client = OpenAI(api_key=self.api_key)
-        self.model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+        # Запросы идут через LLMService: общий клиент провайдера, лимиты и повторы
+        self.llm = LLMService()
+
+    def messages(self, prompt: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+
+    def cache_key(self, prompt: str) -> str:
+        return make_cache_key(self.llm.provider, self.llm.model, SYSTEM_PROMPT, prompt)
 
     def construct_prompt(self, analysis_results: Dict[str, Any]) -> str:
         """
@@ -35,26 +54,12 @@ class ChatGPTAnalyzer:
                 prompt_template = f.read()
             ohlc_data = analysis_results.get("ohlc", [])
 
-            def _sanitize(val):
-                if isinstance(val, float):
-                    if math.isnan(val) or math.isinf(val):
-                        return None
-                    return float(val)
-                if isinstance(val, dict):
-                    return {k: _sanitize(v) for k, v in val.items()}
-                if isinstance(val, list):
-                    return [_sanitize(v) for v in val]
-                return val
-
-            safe_data = _sanitize(ohlc_data)
-            if safe_data != ohlc_data:
-                logger.debug("Данные содержали NaN/inf, выполнена очистка")
-
-            # Подстановка данных в шаблон промпта
-            prompt = prompt_template.replace(
-                "{{ ohlc_data | tojson | default([]) }}",
-                json.dumps(safe_data, ensure_ascii=False, allow_nan=False)
-            )
+            # Подстановка данных в шаблон промпта (NaN/inf заменяются на null)
+            if PROMPT_ENCODING == "json":
+                encoded = encode_ohlc_records(ohlc_data)
+            else:
+                encoded = encode_ohlc_compact(ohlc_data)
+            prompt = prompt_template.replace("{{ ohlc_data | tojson | default([]) }}", encoded)
 
             # Сохраняем сформированный промпт в режиме отладки
             if os.getenv("DEBUG_LOGGING", "false").lower() == "true":
@@ -84,26 +89,47 @@ class ChatGPTAnalyzer:
             return text[start:end]
         return ""
 
-    def analyze(self, analysis_results: Dict[str, Any]) -> tuple[Dict[str, Any], bool]:
+    def is_valid_answer(self, text: str) -> bool:
+        """Содержит ли ответ разбираемый JSON (критерий выбора ответа при хеджировании)."""
+        json_str = self.extract_json(text)
+        try:
+            return bool(json_str) and isinstance(json.loads(json_str), dict)
+        except json.JSONDecodeError:
+            return False
+
+    async def analyze(
+        self,
+        analysis_results: Dict[str, Any],
+        cache_ttl: Optional[float] = None,
+    ) -> tuple[Dict[str, Any], bool]:
         """
         Выполняет анализ данных с помощью ChatGPT.
         Возвращает кортеж (данные_анализа, флаг_ошибки).
         Если полученный JSON некорректен, флаг_ошибки = True.
+        Запрос к модели асинхронный и не блокирует event loop.
+        При cache_ttl валидный ответ кешируется по хешу промпта на cache_ttl секунд.
         """
         try:
-            prompt = self.construct_prompt(analysis_results)
+            # Сериализация крупного промпта выполняется в пуле потоков
+            with span("prompt"):
+                prompt = await run_cpu_bound(self.construct_prompt, analysis_results)
             if not prompt:
                 logger.warning("Промпт пустой, анализ не выполнен.")
                 return {}, True
 
-            # Отправка запроса в модель
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an...erienced trader and a top-tier expert in predictive analysis."},
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            cache = get_llm_cache() if cache_ttl else None
+            cache_key = self.cache_key(prompt)
+            if cache is not None:
+                cached = await asyncio.to_thread(cache.get, cache_key)
+                cache_event("llm", cached is not None)
+                if cached is not None:
+                    logger.info("Анализ взят из кеша LLM-ответов.")
+                    return cached, False
+
+            # Отправка запроса в модель (лимит одновременных запросов и повторы — в LLMService)
+            PAYLOAD_BYTES.observe(len(prompt.encode("utf-8")), "prompt")
+            with span("llm"):
+                response = await self.llm.generate(self.messages(prompt), validate=self.is_valid_answer)
 
             # Логируем полный ответ модели в режиме отладки
             if os.getenv("DEBUG_LOGGING", "false").lower() == "true":
@@ -111,49 +137,100 @@ class ChatGPTAnalyzer:
                 ts = int(time.time())
                 raw_file = f"dev_logs/chatgpt_raw_response_{ts}.json"
                 try:
-                    resp_dict = response.model_dump()
+                    resp_dict = response["raw"].model_dump()
                 except Exception:
-                    resp_dict = json.loads(str(response))
+                    resp_dict = {"content": response["content"]}
                 with open(raw_file, "w", encoding="utf-8") as rf:
                     json.dump(resp_dict, rf, ensure_ascii=False, indent=4)
                 logger.info(f"Сырый ответ ChatGPT сохранён в {raw_file}.")
 
-            answer = response.choices[0].message.content.strip()
-
-            # Извлечение JSON из ответа
-            json_str = self.extract_json(answer)
-            if json_str:
-                try:
-                    analysis_data = json.loads(json_str)
-
-                    # Сохраняем распарсенный JSON в режиме отладки
-                    if os.getenv("DEBUG_LOGGING", "false").lower() == "true":
-                        parsed_file = f"dev_logs/chatgpt_response_{ts}.json"
-                        with open(parsed_file, "w", encoding="utf-8") as prf:
-                            json.dump(analysis_data, prf, ensure_ascii=False, indent=4)
-                        logger.info(f"Распарсенный ответ ChatGPT сохранён в {parsed_file}.")
-                    else:
-                        self.save_response(analysis_data)
-
-                    logger.info("Анализ данных выполнен успешно.")
-                    return analysis_data, False
-                except json.JSONDecodeError:
-                    logger.error("Извлечённый JSON некорректен.")
-                    with open("invalid_chatgpt_response.txt", "w", encoding="utf-8") as iv:
-                        iv.write(answer)
-                    logger.info("Невалидный ответ ChatGPT сохранён в invalid_chatgpt_response.txt.")
-                    return {}, True
-            else:
-                logger.error("Ответ ChatGPT не содержит валидного JSON.")
-                with open("invalid_chatgpt_response.txt", "w", encoding="utf-8") as iv:
-                    iv.write(answer)
-                logger.info("Невалидный ответ ChatGPT сохранён в invalid_chatgpt_response.txt.")
-                return {}, True
+            answer = response["content"]
+            analysis_data, invalid = await self.parse_answer(answer)
+            # Ключ кеша — по основному провайдеру: ответ запасного (хеджирование) не кешируется
+            answered_by_primary = response.get("provider", self.llm.provider) == self.llm.provider
+            if not invalid and cache is not None and answered_by_primary:
+                await asyncio.to_thread(cache.set, cache_key, analysis_data, cache_ttl)
+            return analysis_data, invalid
 
         except Exception as e:
             logger.error(f"Ошибка при анализе данных с помощью ChatGPT: {e}")
             return {}, True
 
+    async def parse_answer(self, answer: str) -> tuple[Dict[str, Any], bool]:
+        """
+        Извлекает и разбирает JSON из текста ответа модели.
+        Возвращает кортеж (данные_анализа, флаг_ошибки).
+        """
+        json_str = self.extract_json(answer)
+        if json_str:
+            try:
+                analysis_data = json.loads(json_str)
+
+                # Сохраняем распарсенный JSON в режиме отладки
+                if os.getenv("DEBUG_LOGGING", "false").lower() == "true":
+                    os.makedirs("dev_logs", exist_ok=True)
+                    ts = int(time.time())
+                    parsed_file = f"dev_logs/chatgpt_response_{ts}.json"
+                    with open(parsed_file, "w", encoding="utf-8") as prf:
+                        json.dump(analysis_data, prf, ensure_ascii=False, indent=4)
+                    logger.info(f"Распарсенный ответ ChatGPT сохранён в {parsed_file}.")
+                else:
+                    await asyncio.to_thread(self.save_response, analysis_data)
+
+                logger.info("Анализ данных выполнен успешно.")
+                return analysis_data, False
+            except json.JSONDecodeError:
+                logger.error("Извлечённый JSON некорректен.")
+        else:
+            logger.error("Ответ ChatGPT не содержит валидного JSON.")
+        with open("invalid_chatgpt_response.txt", "w", encoding="utf-8") as iv:
+            iv.write(answer)
+        logger.info("Невалидный ответ ChatGPT сохранён в invalid_chatgpt_response.txt.")
+        return {}, True
+
+    async def analyze_stream(
+        self,
+        analysis_results: Dict[str, Any],
+        cache_ttl: Optional[float] = None,
+    ) -> AsyncIterator[tuple[str, Any]]:
+        """
+        Потоковый вариант analyze: по мере генерации отдаёт ("delta", текст),
+        в конце — ("result", (данные_анализа, флаг_ошибки)).
+        Ответ из кеша отдаётся сразу одним событием "result".
+        """
+        try:
+            with span("prompt"):
+                prompt = await run_cpu_bound(self.construct_prompt, analysis_results)
+            if not prompt:
+                logger.warning("Промпт пустой, анализ не выполнен.")
+                yield "result", ({}, True)
+                return
+
+            cache = get_llm_cache() if cache_ttl else None
+            cache_key = self.cache_key(prompt)
+            if cache is not None:
+                cached = await asyncio.to_thread(cache.get, cache_key)
+                cache_event("llm", cached is not None)
+                if cached is not None:
+                    logger.info("Анализ взят из кеша LLM-ответов.")
+                    yield "result", (cached, False)
+                    return
+
+            PAYLOAD_BYTES.observe(len(prompt.encode("utf-8")), "prompt")
+            chunks = []
+            async for delta in self.llm.stream(self.messages(prompt)):
+                chunks.append(delta)
+                yield "delta", delta
+        except Exception as e:
+            logger.error(f"Ошибка при потоковом анализе данных с помощью ChatGPT: {e}")
+            yield "result", ({}, True)
+            return
+
+        analysis_data, invalid = await self.parse_answer("".join(chunks).strip())
+        if not invalid and cache is not None:
+            await asyncio.to_thread(cache.set, cache_key, analysis_data, cache_ttl)
+        yield "result", (analysis_data, invalid)
+
     def save_response(
         self,
         response: Dict[str, Any],
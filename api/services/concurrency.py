@@ -0,0 +1,56 @@
+# api/services/concurrency.py
+
+import asyncio
+import contextvars
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Потоки для CPU-работы с pandas (индикаторы, статистика, сериализация)
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "4"))
+# Процессы для пакетного анализа многих символов (0 — считать в текущем процессе)
+PROCESS_WORKERS = int(os.getenv("PROCESS_WORKERS", str(min(os.cpu_count() or 1, 8))))
+# Одновременных запросов к LLM на один процесс
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "16"))
+
+_executor = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix="analysis")
+_process_pool: "ProcessPoolExecutor | None" = None
+_llm_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def run_cpu_bound(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Выполняет синхронную функцию в ограниченном пуле, не блокируя event loop."""
+    loop = asyncio.get_running_loop()
+    # Контекст запроса (например, замеры для Server-Timing) передаётся в поток
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_executor, partial(context.run, func, *args, **kwargs))
+
+
+def get_process_pool() -> "ProcessPoolExecutor | None":
+    """Общий пул процессов, создаётся при первом обращении. None, если пул отключён."""
+    global _process_pool
+    if PROCESS_WORKERS <= 1:
+        return None
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=PROCESS_WORKERS)
+    return _process_pool
+
+
+def llm_semaphore(name: str = "default", limit: Optional[int] = None) -> asyncio.Semaphore:
+    """
+    Семафор запросов к LLM для текущего event loop. У каждого провайдера
+    (name) свой семафор с лимитом limit (по умолчанию LLM_CONCURRENCY).
+    """
+    loop = asyncio.get_running_loop()
+    semaphores = _llm_semaphores.setdefault(loop, {})
+    semaphore = semaphores.get(name)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(limit or LLM_CONCURRENCY)
+        semaphores[name] = semaphore
+    return semaphore
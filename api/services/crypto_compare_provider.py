@@ -1,10 +1,17 @@
 # api/services/crypto_compare_provider.py
 
+import asyncio
 import os
 import re
 import time
+from typing import Any, Dict, List, Optional, Tuple
+
 import pandas as pd
-import httpx
+
+from services.candle_stream import get_stream_hub
+from services.http_client import get_http_client
+from services.metrics import UPSTREAM_ERRORS, cache_event
+from services.ohlcv_store import OHLCVStore
 
 # API key для CryptoCompare
 API_KEY = os.getenv("CRYPTOCOMPARE_API_KEY", "")
@@ -19,14 +26,35 @@ DEFAULT_QUOTE = os.getenv("DEFAULT_QUOTE", "USD")
 DEBUG = os.getenv("DEBUG_LOGGING", "false").lower() == "true"
 DEV_LOG_DIR = os.path.join(os.getcwd(), "api", "dev_logs")
 
+# Локальное хранилище закрытых свечей
+OHLCV_STORE_ENABLED = os.getenv("OHLCV_STORE", "true").lower() == "true"
+OHLCV_STORE_PATH = os.getenv(
+    "OHLCV_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "data", "ohlcv.sqlite"),
+)
+# Если пропусков больше, чем столько отдельных участков, проще скачать окно целиком
+MAX_GAP_REQUESTS = 3
 
-async def fetch_ohlcv(symbol: str, interval: str, limit: int) -> pd.DataFrame:
-    """
-    Получает OHLCV из CryptoCompare, возвращает DataFrame
-    с колонками:
-      Open Time, Close Time, Open, High, Low, Close, Volume, Quote Asset Volume
-    """
-    # 1) Подготовка параметров
+PERIOD_SECONDS = {"minute": 60, "hour": 3600, "day": 86400}
+
+_store: Optional[OHLCVStore] = None
+
+# Запросы в полёте: одинаковые (пара, интервал, limit) делят один запрос к API
+_inflight: Dict[Tuple[str, str, str, int], "asyncio.Task[List[Dict[str, Any]]]"] = {}
+
+
+def get_store() -> Optional[OHLCVStore]:
+    """Возвращает хранилище свечей, создавая его при первом обращении."""
+    global _store
+    if not OHLCV_STORE_ENABLED:
+        return None
+    if _store is None:
+        _store = OHLCVStore(OHLCV_STORE_PATH)
+    return _store
+
+
+def parse_pair(symbol: str) -> Tuple[str, str]:
+    """Разбирает тикер на базовую и котируемую валюты."""
     pair = (symbol or "").strip().upper() or DEFAULT_SYMBOL
     base, quote = pair, DEFAULT_QUOTE
 
@@ -46,13 +74,23 @@ async def fetch_ohlcv(symbol: str, interval: str, limit: int) -> pd.DataFrame:
 
     if base == pair:
         quote = DEFAULT_QUOTE
+    return base, quote
 
+
+def interval_params(interval: str) -> Tuple[str, int]:
+    """Возвращает (period, aggregate) для эндпоинта CryptoCompare."""
     period = {
         "1m": "minute", "5m": "minute", "15m": "minute",
         "1h": "hour", "4h": "hour", "1d": "day"
     }[interval]
-    agg = int(interval[:-1]) if period == "minute" else 1
+    agg = int(interval[:-1]) if period in ("minute", "hour") else 1
+    return period, agg
+
 
+async def _request_histo(
+    period: str, base: str, quote: str, agg: int, limit: int, to_ts: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Один запрос к histo-эндпоинту, возвращает сырые свечи."""
     url = f"{BASE_URL}{period}"
     params = {
         "fsym": base,
@@ -61,11 +99,132 @@ async def fetch_ohlcv(symbol: str, interval: str, limit: int) -> pd.DataFrame:
         "aggregate": agg,
         "api_key": API_KEY
     }
+    if to_ts is not None:
+        params["toTs"] = to_ts
+
+    client = get_http_client()
+    try:
+        resp = await client.get(url, params=params)
+        body = resp.json()
+    except Exception:
+        UPSTREAM_ERRORS.inc("cryptocompare")
+        raise
+    if resp.status_code >= 400 or body.get("Response") == "Error":
+        UPSTREAM_ERRORS.inc("cryptocompare")
+    return body.get("Data", {}).get("Data", [])
+
+
+async def _fetch_with_store(
+    store: OHLCVStore, interval: str, period: str, base: str, quote: str, agg: int, limit: int
+) -> List[Dict[str, Any]]:
+    """
+    Собирает limit + 1 последних свечей: закрытые берутся из хранилища,
+    из сети докачиваются только хвост и пропуски.
+    """
+    step = PERIOD_SECONDS[period] * agg
+    now = int(time.time())
+    since = now - (limit + 2) * step
+    cached = await asyncio.to_thread(store.load, base, quote, interval, since)
+    candles = {c["time"]: c for c in cached}
+
+    cache_event("ohlcv_store", bool(cached) and (now - cached[-1]["time"]) // step < limit)
+    if cached and (now - cached[-1]["time"]) // step < limit:
+        # Хвост: от последней сохранённой свечи до текущей формирующейся
+        tail_limit = max((now - cached[-1]["time"]) // step, 1)
+        fresh = await _request_histo(period, base, quote, agg, tail_limit)
+    else:
+        fresh = await _request_histo(period, base, quote, agg, limit)
+    candles.update({c["time"]: c for c in fresh})
+    if not candles:
+        return []
+
+    end = max(candles)
+    expected = [end - k * step for k in range(limit, -1, -1)]
+    missing = [t for t in expected if t not in candles]
+    if missing:
+        # Группируем пропуски в непрерывные участки
+        runs: List[List[int]] = [[missing[0]]]
+        for t in missing[1:]:
+            if t - runs[-1][-1] == step:
+                runs[-1].append(t)
+            else:
+                runs.append([t])
+        if len(runs) > MAX_GAP_REQUESTS:
+            gap_requests = [(end, limit)]
+        else:
+            gap_requests = [(run[-1], len(run) - 1) for run in runs]
+        for to_ts, gap_limit in gap_requests:
+            backfill = await _request_histo(period, base, quote, agg, max(gap_limit, 1), to_ts)
+            for c in backfill:
+                candles.setdefault(c["time"], c)
+
+    # В хранилище попадают только новые закрытые свечи
+    cached_times = {c["time"] for c in cached}
+    closed = [c for t, c in candles.items() if t + step <= now and t not in cached_times]
+    await asyncio.to_thread(store.save, base, quote, interval, closed)
+
+    return [candles[t] for t in expected if t in candles]
+
+
+async def _load_payload(
+    interval: str, period: str, base: str, quote: str, agg: int, limit: int
+) -> List[Dict[str, Any]]:
+    store = get_store()
+    if store is not None:
+        return await _fetch_with_store(store, interval, period, base, quote, agg, limit)
+    return await _request_histo(period, base, quote, agg, limit)
+
+
+async def _coalesced_payload(
+    interval: str, period: str, base: str, quote: str, agg: int, limit: int
+) -> List[Dict[str, Any]]:
+    """
+    Single-flight: пока запрос для ключа выполняется, остальные вызовы
+    ждут его результат вместо собственного обращения к API.
+    """
+    key = (base, quote, interval, limit)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_load_payload(interval, period, base, quote, agg, limit))
+        _inflight[key] = task
+
+        def _done(t: "asyncio.Task") -> None:
+            if _inflight.get(key) is t:
+                del _inflight[key]
+            if not t.cancelled():
+                # помечаем исключение полученным, даже если все ожидающие отменены
+                t.exception()
+
+        task.add_done_callback(_done)
+    # shield: отмена одного клиента не отменяет общий запрос
+    return await asyncio.shield(task)
 
-    # 2) Запрос к API
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url, params=params, timeout=10)
-    payload = resp.json().get("Data", {}).get("Data", [])
+
+async def fetch_ohlcv(symbol: str, interval: str, limit: int) -> pd.DataFrame:
+    """
+    Получает OHLCV из CryptoCompare, возвращает DataFrame
+    с колонками:
+      Open Time, Close Time, Open, High, Low, Close, Volume, Quote Asset Volume
+    Закрытые свечи кешируются в локальном хранилище (OHLCV_STORE).
+    Для пар из потока (STREAM_ENABLED) свечи читаются из кольцевого буфера без
+    обращения к сети, если в нём достаточно свечей и поток не отстал.
+    """
+    # 1) Подготовка параметров
+    base, quote = parse_pair(symbol)
+    period, agg = interval_params(interval)
+
+    hub = get_stream_hub()
+    if hub is not None:
+        df = hub.frame(symbol, interval, limit)
+        cache_event("stream", df is not None)
+        if df is not None:
+            return df
+
+    # 2) Запрос к API (или хранилищу), одинаковые запросы объединяются
+    payload = await _coalesced_payload(interval, period, base, quote, agg, limit)
+    if hub is not None:
+        # История из REST дозаполняет буфер подписанной пары
+        hub.seed(symbol, interval, payload)
 
     # 3) Конвертация в DataFrame
     df = pd.DataFrame(payload)
@@ -97,4 +256,8 @@ async def fetch_ohlcv(symbol: str, interval: str, limit: int) -> pd.DataFrame:
     # убираем уже ненужную колонку time
     df.drop(columns=["time"], inplace=True)
 
+    # 7) Метаданные для инкрементального расчёта индикаторов
+    df.attrs["symbol"] = f"{base}/{quote}"
+    df.attrs["interval"] = interval
+
     return df
@@ -1,12 +1,110 @@
 # src/data/data_processor.py
 
+import os
 import pandas as pd
 import numpy as np
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import math
 from config.config import logger
-import ta  # Технический анализ
+from services.candle_frame import CandleFrame
+from services.candle_stream import get_stream_hub
+from services.incremental_indicators import IncrementalIndicatorEngine, get_engine
+from services.candlestick_patterns import detect_patterns
+from services.indicator_registry import INDICATORS, compute_indicators, output_columns, resolve_indicators
+from services.metrics import span
+
+# Инкрементальный расчёт индикаторов для повторных запросов одной пары.
+# Выгоден, когда одно окно свечей запрашивают несколько раз за свечу
+# (см. бенчмарк sliding_window в benchmarks/suite.py), поэтому выключен по умолчанию
+INCREMENTAL_INDICATORS = os.getenv("INCREMENTAL_INDICATORS", "false").lower() == "true"
+
+# Правила округления столбцов: None — без округления, 'int' — целое, число — знаков после запятой
+ROUNDING_RULES = {
+    # Не округляем
+    'Open Time': None,
+    'Open': None,
+    'High': None,
+    'Low': None,
+    'Close': None,
+    'Close Time': None,
+    'Number of Trades': None,
+    'Ignore': None,
+    'MA_20': 5,
+    'MA_50': 5,
+    'MA_100': 5,
+    'MA_200': 5,
+    'Parabolic_SAR': 5,
+    'Ichimoku_A': 5,
+    'Ichimoku_B': 5,
+    'Ichimoku_Base_Line': 5,
+    'Ichimoku_Conversion_Line': 5,
+    "Bollinger_Middle": 5,
+    "Bollinger_Upper": 5,
+    "Bollinger_Lower": 5,
+
+    # Округляем до целого числа
+    'Volume': 'int',
+    'Quote Asset Volume': 'int',
+    'Taker Buy Base Asset Volume': 'int',
+    'Taker Buy Quote Asset Volume': 'int',
+    'RSI': 0,
+    'MACD': 0,
+    'MACD_signal': 0,
+    'MACD_hist': 0,
+    'OBV': 'int',
+    'ATR': 'int',
+    'Stochastic_Oscillator': 0,
+
+    # Округляем до 2 знаков после запятой
+    'ADX': 2,
+    'Williams_%R': 2,
+
+    # Округляем до 5 знаков после запятой
+    'VWAP': 5,
+    'Moving_Average_Envelope_Upper': 5,
+    'Moving_Average_Envelope_Lower': 5
+}
+
+# Ключевые индикаторы: свечи с пропусками в них отбрасываются при drop_na
+KEY_INDICATORS = [
+    "RSI", "MACD", "MACD_signal", "MACD_hist", "OBV",
+    "MA_20", "MA_50", "MA_100", "MA_200", "ATR",
+    "Stochastic_Oscillator", "Bollinger_Middle",
+    "Bollinger_Upper", "Bollinger_Lower", "ADX",
+    "Williams_%R", "Parabolic_SAR",
+    "Ichimoku_A", "Ichimoku_B", "Ichimoku_Base_Line", "Ichimoku_Conversion_Line",
+    # Новые индикаторы
+    "VWAP", "Moving_Average_Envelope_Upper", "Moving_Average_Envelope_Lower"
+]
+
+
+def fill_forward_backward(values: np.ndarray) -> np.ndarray:
+    """
+    ffill, затем bfill по строкам двумерного float64-массива (на месте).
+    Обрабатываются только столбцы с пропусками; столбцы из одних NaN остаются NaN.
+    """
+    missing = np.isnan(values)
+    rows = np.arange(values.shape[0])
+    for j in np.flatnonzero(missing.any(axis=0)).tolist():
+        column_missing = missing[:, j]
+        if column_missing.all():
+            continue
+        # индекс последнего известного значения (ffill)
+        last = np.where(column_missing, 0, rows)
+        np.maximum.accumulate(last, out=last)
+        # начало столбца без известных значений берёт первое известное (bfill)
+        first_known = int(np.argmin(column_missing))
+        last[:first_known] = first_known
+        values[:, j] = values[last, j]
+    return values
+
+
+def iso_strings(series: pd.Series) -> np.ndarray:
+    """Время в ISO-формате (как при стандартной JSON-сериализации Timestamp)."""
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        return series.map(lambda ts: ts.isoformat()).to_numpy(dtype=object)
+    return np.datetime_as_string(series.to_numpy(), unit='s').astype(object)
 
 
 class DataProcessor:
@@ -14,9 +112,45 @@ class DataProcessor:
     Класс для предобработки и анализа собранных данных.
     """
 
-    def __init__(self, df: pd.DataFrame):
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        engine: Optional[IncrementalIndicatorEngine] = None,
+        indicators: Optional[List[str]] = None,
+        incremental: bool = True,
+    ):
         self.df = df
+        # Пустой список — все индикаторы; иначе запрошенные и их зависимости
+        self.indicator_specs = resolve_indicators(indicators)
         self.candlestick_patterns: List[Dict[str, Any]] = []
+        # Движок берётся из реестра по символу/интервалу, которые проставляет fetch_ohlcv,
+        # и длине кадра: запросы с разным limit не сбрасывают состояние друг друга.
+        # Он считает все индикаторы сразу, поэтому выборка индикаторов считается через ta
+        # и не сбрасывает общее состояние пары кадрами другой длины.
+        # incremental=False — разовый расчёт (например, в процессе пула), без общего движка
+        self.engine = engine
+        if (
+            self.engine is None
+            and incremental
+            and INCREMENTAL_INDICATORS
+            and len(self.indicator_specs) == len(INDICATORS)
+        ):
+            symbol = df.attrs.get('symbol')
+            interval = df.attrs.get('interval')
+            if symbol and interval:
+                self.engine = get_engine(symbol, interval, len(df))
+
+    @classmethod
+    def from_stream(
+        cls, symbol: str, interval: str, limit: int, indicators: Optional[List[str]] = None
+    ) -> Optional["DataProcessor"]:
+        """
+        Процессор по снимку кольцевого буфера потока свечей (кадр того же вида,
+        что и fetch_ohlcv). None, если пары нет в потоке или свечей мало.
+        """
+        hub = get_stream_hub()
+        df = hub.frame(symbol, interval, limit) if hub is not None else None
+        return cls(df, indicators=indicators) if df is not None else None
 
     def preprocess(self) -> pd.DataFrame:
         """
@@ -40,94 +174,24 @@ class DataProcessor:
         Рассчитывает технические индикаторы и добавляет их в DataFrame.
         """
         try:
-            # RSI
-            self.df['RSI'] = ta.momentum.RSIIndicator(close=self.df['Close']).rsi()
-
-            # MACD
-            macd = ta.trend.MACD(close=self.df['Close'])
-            self.df['MACD'] = macd.macd()
-            self.df['MACD_signal'] = macd.macd_signal()
-            self.df['MACD_hist'] = macd.macd_diff()
-
-            # OBV
-            self.df['OBV'] = ta.volume.OnBalanceVolumeIndicator(
-                close=self.df['Close'], volume=self.df['Volume']
-            ).on_balance_volume()
-
-            # Скользящие средние
-            self.df['MA_20'] = ta.trend.SMAIndicator(close=self.df['Close'], window=20).sma_indicator()
-            self.df['MA_50'] = ta.trend.SMAIndicator(close=self.df['Close'], window=50).sma_indicator()
-            self.df['MA_100'] = ta.trend.SMAIndicator(close=self.df['Close'], window=100).sma_indicator()
-            self.df['MA_200'] = ta.trend.SMAIndicator(close=self.df['Close'], window=200).sma_indicator()
-
-            # ATR
-            atr = ta.volatility.AverageTrueRange(
-                high=self.df['High'], low=self.df['Low'], close=self.df['Close']
-            )
-            self.df['ATR'] = atr.average_true_range()
-
-            # Стохастический осциллятор
-            stoch = ta.momentum.StochasticOscillator(
-                high=self.df['High'], low=self.df['Low'], close=self.df['Close']
-            )
-            self.df['Stochastic_Oscillator'] = stoch.stoch()
-
-            # Полосы Боллинджера
-            bollinger = ta.volatility.BollingerBands(close=self.df['Close'])
-            self.df['Bollinger_Middle'] = bollinger.bollinger_mavg()
-            self.df['Bollinger_Upper'] = bollinger.bollinger_hband()
-            self.df['Bollinger_Lower'] = bollinger.bollinger_lband()
-
-            # ADX
-            adx = ta.trend.ADXIndicator(
-                high=self.df['High'], low=self.df['Low'], close=self.df['Close']
-            )
-            self.df['ADX'] = adx.adx()
-
-            # Williams %R
-            williams = ta.momentum.WilliamsRIndicator(
-                high=self.df['High'], low=self.df['Low'], close=self.df['Close']
-            )
-            self.df['Williams_%R'] = williams.williams_r()
-
-            # Parabolic SAR
-            psar = ta.trend.PSARIndicator(
-                high=self.df['High'], low=self.df['Low'], close=self.df['Close']
-            )
-            self.df['Parabolic_SAR'] = psar.psar()
-
-            # Ichimoku Cloud
-            ichimoku = ta.trend.IchimokuIndicator(
-                high=self.df['High'], low=self.df['Low']
-            )
-            self.df['Ichimoku_A'] = ichimoku.ichimoku_a()
-            self.df['Ichimoku_B'] = ichimoku.ichimoku_b()
-            self.df['Ichimoku_Base_Line'] = ichimoku.ichimoku_base_line()
-            self.df['Ichimoku_Conversion_Line'] = ichimoku.ichimoku_conversion_line()
-
-            # **Добавление VWAP**
-            vwap = ta.volume.VolumeWeightedAveragePrice(
-                high=self.df['High'],
-                low=self.df['Low'],
-                close=self.df['Close'],
-                volume=self.df['Volume'],
-                window=14,  # Можно выбрать окно по вашему усмотрению
-            )
-            self.df['VWAP'] = vwap.volume_weighted_average_price()
-
-            # **Добавление Moving Average Envelopes**
-            # Рассчитываем SMA для Moving Average Envelopes
-            sma_envelope = ta.trend.SMAIndicator(close=self.df['Close'], window=20).sma_indicator()
-            # Устанавливаем процент отклонения (напр., 2%)
-            envelope_percentage = 0.02
-            self.df['Moving_Average_Envelope_Upper'] = sma_envelope * (1 + envelope_percentage)
-            self.df['Moving_Average_Envelope_Lower'] = sma_envelope * (1 - envelope_percentage)
-
-            # Заменяем бесконечные значения, которые могут возникнуть при расчёте индикаторов
-            if np.isinf(self.df.select_dtypes(include=[float, int])).values.any():
-                logger.info("Обнаружены бесконечные значения, выполняется замена на NaN")
-                self.df.replace([np.inf, -np.inf], np.nan, inplace=True)
+            if (
+                self.engine is not None
+                and 'Open Time' in self.df.columns
+                and len(self.df) >= self.engine.MIN_HISTORY
+            ):
+                # Досчитываем только новые свечи, в кадр попадают выбранные индикаторы
+                indicators = self.engine.update(self.df)
+                columns = output_columns(self.indicator_specs)
+                # Одна склейка вместо поштучной вставки столбцов (каждая копирует блоки)
+                attrs = dict(self.df.attrs)
+                self.df = pd.concat(
+                    [self.df.drop(columns=columns, errors='ignore'), indicators[columns]], axis=1
+                )
+                self.df.attrs = attrs
+            else:
+                self._calculate_indicators_ta()
 
+            # Бесконечные значения заменяются в clean_numeric
             logger.info("Индикаторы успешно рассчитаны.")
             return self.df
         except ImportError:
@@ -137,58 +201,19 @@ class DataProcessor:
             logger.error(f"Ошибка при расчёте индикаторов: {e}")
             return self.df
 
+    def _calculate_indicators_ta(self) -> None:
+        """
+        Полный расчёт выбранных индикаторов библиотекой ta по всему DataFrame.
+        Формулы индикаторов описаны в services.indicator_registry.
+        """
+        compute_indicators(self.df, self.indicator_specs)
+
     def apply_rounding(self):
         """
         Применяет правила округления к различным столбцам.
         """
         try:
-            rounding_rules = {
-                # Не округляем
-                'Open Time': None,
-                'Open': None,
-                'High': None,
-                'Low': None,
-                'Close': None,
-                'Close Time': None,
-                'Number of Trades': None,
-                'Ignore': None,
-                'MA_20': 5,
-                'MA_50': 5,
-                'MA_100': 5,
-                'MA_200': 5,
-                'Parabolic_SAR': 5,
-                'Ichimoku_A': 5,
-                'Ichimoku_B': 5,
-                'Ichimoku_Base_Line': 5,
-                'Ichimoku_Conversion_Line': 5,
-                "Bollinger_Middle": 5,
-                "Bollinger_Upper": 5,
-                "Bollinger_Lower": 5,
-
-                # Округляем до целого числа
-                'Volume': 'int',
-                'Quote Asset Volume': 'int',
-                'Taker Buy Base Asset Volume': 'int',
-                'Taker Buy Quote Asset Volume': 'int',
-                'RSI': 0,
-                'MACD': 0,
-                'MACD_signal': 0,
-                'MACD_hist': 0,
-                'OBV': 'int',
-                'ATR': 'int',
-                'Stochastic_Oscillator': 0,
-
-                # Округляем до 2 знаков после запятой
-                'ADX': 2,
-                'Williams_%R': 2,
-
-                # Округляем до 5 знаков после запятой
-                'VWAP': 5,
-                'Moving_Average_Envelope_Upper': 5,
-                'Moving_Average_Envelope_Lower': 5
-            }
-
-            for column, rule in rounding_rules.items():
+            for column, rule in ROUNDING_RULES.items():
                 if column in self.df.columns and rule is not None:
                     if rule == 'int':
                         self.df[column] = self.df[column].round(0).astype(int)
@@ -205,21 +230,10 @@ class DataProcessor:
         Удаляет свечи с пропущенными значениями в ключевых индикаторах.
         """
         try:
-            indicators = [
-                "RSI", "MACD", "MACD_signal", "MACD_hist", "OBV",
-                "MA_20", "MA_50", "MA_100", "MA_200", "ATR",
-                "Stochastic_Oscillator", "Bollinger_Middle",
-                "Bollinger_Upper", "Bollinger_Lower", "ADX",
-                "Williams_%R", "Parabolic_SAR",
-                "Ichimoku_A", "Ichimoku_B", "Ichimoku_Base_Line", "Ichimoku_Conversion_Line",
-                # Новые индикаторы
-                "VWAP", "Moving_Average_Envelope_Upper", "Moving_Average_Envelope_Lower"
-            ]
-
             # Оставляем только те индикаторы, которые существуют в датафрейме
             # и не полностью состоят из NaN значений
             valid_cols = [
-                col for col in indicators
+                col for col in KEY_INDICATORS
                 if col in self.df.columns and not self.df[col].isna().all()
             ]
 
@@ -243,62 +257,81 @@ class DataProcessor:
             logger.error(f"Ошибка при удалении свечей с null индикаторами: {e}")
             return self.df
 
-    def sanitize(self) -> pd.DataFrame:
-        """Удаляет бесконечные значения и заполняет NaN."""
+    def clean_numeric(self, round_values: bool = True, drop_na: bool = False) -> pd.DataFrame:
+        """
+        Единый этап очистки числовых столбцов на float64-массиве:
+        inf -> NaN, округление по ROUNDING_RULES, удаление свечей с пропусками
+        в KEY_INDICATORS (drop_na), затем ffill/bfill. Кадр копируется один раз.
+        """
         try:
-            if np.isinf(self.df.select_dtypes(include=[float, int])).values.any():
+            columns = [
+                col for col in self.df.select_dtypes(include=[np.number]).columns
+                if not pd.api.types.is_bool_dtype(self.df[col])
+            ]
+            if not columns:
+                return self.df
+            values = self.df[columns].to_numpy(dtype=np.float64, copy=True)
+
+            infinite = np.isinf(values)
+            if infinite.any():
                 logger.warning("Найдены бесконечные значения после обработки, выполняется замена")
-                self.df.replace([np.inf, -np.inf], np.nan, inplace=True)
-            nulls = self.df.isna().sum().sum()
+                values[infinite] = np.nan
+
+            if round_values:
+                for j, col in enumerate(columns):
+                    rule = ROUNDING_RULES.get(col)
+                    if rule == 'int':
+                        np.round(values[:, j], 0, out=values[:, j])
+                    elif isinstance(rule, int):
+                        np.round(values[:, j], rule, out=values[:, j])
+
+            keep = None
+            if drop_na:
+                # Индикаторы, которые не полностью состоят из NaN
+                key = [j for j, col in enumerate(columns) if col in KEY_INDICATORS]
+                missing = np.isnan(values[:, key])
+                key_missing = missing[:, ~missing.all(axis=0)]
+                if key_missing.shape[1]:
+                    keep = ~key_missing.any(axis=1)
+                    logger.info(f"Удалено {int((~keep).sum())} свечей с пропущенными индикаторами")
+                    values = values[keep]
+
+            nulls = int(np.isnan(values).sum())
             if nulls:
                 logger.warning(f"Обнаружено {nulls} NaN значений, выполняется заполнение")
-                self.df = self.df.ffill().bfill()
+                values = fill_forward_backward(values)
+
+            frame = self.df if keep is None else self.df.loc[keep]
+            cleaned = {}
+            for j, col in enumerate(columns):
+                column = values[:, j]
+                if ROUNDING_RULES.get(col) == 'int' and round_values and not np.isnan(column).any():
+                    column = column.astype(np.int64)
+                cleaned[col] = column
+            rest = [col for col in frame.columns if col not in cleaned]
+            # Собираем кадр заново: без поколоночных вставок и лишних копий
+            self.df = pd.DataFrame(
+                {col: cleaned[col] if col in cleaned else frame[col].to_numpy() for col in frame.columns},
+                index=frame.index,
+            )
+            if rest:
+                non_numeric_nulls = self.df[rest].isna().any()
+                if non_numeric_nulls.any():
+                    filled = non_numeric_nulls[non_numeric_nulls].index
+                    self.df[filled] = self.df[filled].ffill().bfill()
             return self.df
         except Exception as e:
             logger.error(f"Ошибка при очистке данных: {e}")
             return self.df
 
+    def sanitize(self) -> pd.DataFrame:
+        """Удаляет бесконечные значения и заполняет NaN."""
+        return self.clean_numeric(round_values=False, drop_na=False)
+
     def find_candlestick_patterns(self) -> List[Dict[str, Any]]:
-        """Выявляет простые свечные паттерны."""
-        patterns = []
+        """Выявляет простые свечные паттерны (векторно, см. candlestick_patterns)."""
         try:
-            df = self.df
-            for i in range(1, len(df)):
-                cur = df.iloc[i]
-                prev = df.iloc[i - 1]
-                open_, close = cur['Open'], cur['Close']
-                high, low = cur['High'], cur['Low']
-                body = abs(close - open_)
-                rng = high - low
-                if rng == 0:
-                    continue
-                lower = min(open_, close) - low
-                upper = high - max(open_, close)
-
-                date = str(cur['Open Time'])
-                price = float(close)
-
-                if body <= rng * 0.1:
-                    patterns.append({'type': 'Doji', 'date': date, 'price': price,
-                                     'explanation': 'Свеча с маленьким телом, возможный разворот.'})
-                if lower >= body * 2 and upper <= body * 0.1:
-                    patterns.append({'type': 'Hammer', 'date': date, 'price': price,
-                                     'explanation': 'Длинная нижняя тень, бычий сигнал.'})
-                if upper >= body * 2 and lower <= body * 0.1:
-                    patterns.append({'type': 'Shooting Star', 'date': date, 'price': price,
-                                     'explanation': 'Длинная верхняя тень, медвежий сигнал.'})
-
-                prev_open, prev_close = prev['Open'], prev['Close']
-                prev_body = abs(prev_close - prev_open)
-
-                if prev_close < prev_open and close > open_ and close >= prev_open and open_ <= prev_close:
-                    patterns.append({'type': 'Bullish Engulfing', 'date': date, 'price': price,
-                                     'explanation': 'Бычье поглощение предыдущей свечи.'})
-                if prev_close > prev_open and close < open_ and open_ >= prev_close and close <= prev_open:
-                    patterns.append({'type': 'Bearish Engulfing', 'date': date, 'price': price,
-                                     'explanation': 'Медвежье поглощение предыдущей свечи.'})
-
-            self.candlestick_patterns = patterns
+            self.candlestick_patterns = detect_patterns(self.df)
         except Exception as e:
             logger.error(f"Ошибка при поиске свечных паттернов: {e}")
             self.candlestick_patterns = []
@@ -335,44 +368,54 @@ class DataProcessor:
         Параметры:
             num_candles (int): Количество последних свечей для возврата.
         """
-        # Выбираем все столбцы, включая индикаторы
-        ohlc_data = self.df.tail(num_candles).copy()
-
-        # Преобразуем все столбцы с датами и временем в строки
-        datetime_cols = ohlc_data.select_dtypes(include=['datetime64[ns]', 'datetime64[ns, UTC]']).columns
-        for col in datetime_cols:
-            ohlc_data[col] = ohlc_data[col].astype(str)
-
-        # Убедимся, что столбцы с индикаторами не содержат NaN/inf
-        if np.isinf(ohlc_data.select_dtypes(include=[float, int])).values.any():
-            logger.debug(
-                "Бесконечные значения в OHLC данных, заменяем на NaN"
-            )  # конфликтных маркеров не осталось
-        ohlc_data = ohlc_data.replace([np.inf, -np.inf], np.nan)
-        ohlc_data = ohlc_data.ffill().bfill()
-        nulls = ohlc_data.isna().sum().sum()
-        if nulls:
-            logger.debug(f"После очистки осталось {nulls} NaN, заменяем на None")
-        # Заменяем NaN и NaT на None для корректной сериализации в JSON
-        ohlc_data = ohlc_data.astype(object).where(pd.notnull(ohlc_data), None)
-
-        ohlc_data = ohlc_data.to_dict(orient='records')
-        return ohlc_data
+        # Выбираем все столбцы, включая индикаторы (без копирования)
+        tail = self.df.tail(num_candles)
+        columns = {}
+        for col in tail.columns:
+            series = tail[col]
+            if pd.api.types.is_datetime64_any_dtype(series):
+                # Формат ISO, как при стандартной JSON-сериализации Timestamp
+                valid = series.notna().to_numpy()
+                series = pd.Series(iso_strings(series), index=series.index, dtype=object)
+            elif pd.api.types.is_float_dtype(series):
+                valid = np.isfinite(series.to_numpy())
+                series = series.astype(object) if not valid.all() else series
+            elif series.dtype == object:
+                valid = series.notna().to_numpy()
+            else:
+                columns[col] = series
+                continue
+            if not valid.all():
+                logger.debug(f"Столбец '{col}' содержит NaN/inf, заменяем на None")
+                series = series.where(valid, None)
+            columns[col] = series
+
+        # Объекты Python создаются только здесь, при сериализации
+        return pd.DataFrame(columns, index=tail.index).to_dict(orient='records')
+
+    def get_ohlc_columns(self, num_candles: int = 144) -> Dict[str, Any]:
+        """
+        Колоночный вариант get_ohlc_data: {"columns": [...], "data": {столбец: значения}}.
+        Числовые столбцы остаются numpy-массивами (NaN/inf кодируются как null
+        при сериализации), словари по свечам не создаются.
+        """
+        return self.to_frame().tail(num_candles).to_columns()
+
+    def to_frame(self) -> CandleFrame:
+        """Обработанные данные как CandleFrame: массивы столбцов без копирования."""
+        return CandleFrame.from_pandas(self.df)
 
     def perform_full_processing(self, drop_na: bool = True) -> pd.DataFrame:
         """
         Полный процесс предобработки данных.
         """
-        self.preprocess()
-        self.calculate_indicators()
-        self.apply_rounding()  # Применяем округление
-        if drop_na:
-            self.drop_null_indicators()
-        self.sanitize()
-        self.find_candlestick_patterns()
-        # Финальная замена NaN и бесконечных значений для корректной сериализации
-        self.df.replace([np.inf, -np.inf], np.nan, inplace=True)
-        self.df.ffill(inplace=True)
-        self.df.bfill(inplace=True)
-        self.df = self.df.astype(object).where(pd.notnull(self.df), None)
+        with span("preprocess"):
+            self.preprocess()
+        with span("indicators"):
+            self.calculate_indicators()
+        # Округление, удаление пропусков и заполнение NaN — за один проход
+        with span("rounding"):
+            self.clean_numeric(round_values=True, drop_na=drop_na)
+        with span("patterns"):
+            self.find_candlestick_patterns()
         return self.df
@@ -0,0 +1,60 @@
+# api/services/http_client.py
+
+import os
+from typing import Optional
+
+import httpx
+
+from config.config import logger
+
+# Параметры пула соединений к внешним API
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _create_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(HTTP_TIMEOUT)
+    if HTTP2_ENABLED:
+        try:
+            return httpx.AsyncClient(http2=True, limits=limits, timeout=timeout)
+        except ImportError:
+            # Пакет h2 не установлен — работаем по HTTP/1.1 с keep-alive
+            logger.warning("HTTP/2 недоступен (нет пакета h2), используется HTTP/1.1")
+    return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+
+async def start_http_client() -> httpx.AsyncClient:
+    """Создаёт общий клиент на время жизни приложения (вызывается из lifespan)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+    return _client
+
+
+async def close_http_client() -> None:
+    """Закрывает общий клиент и его пул соединений."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Возвращает общий клиент. Вне lifespan (скрипты, тесты) клиент
+    создаётся лениво при первом обращении.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+    return _client
@@ -0,0 +1,768 @@
+# api/services/incremental_indicators.py
+
+import copy
+import math
+import os
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.config import logger
+from services.indicator_registry import compute_indicators
+
+# Сколько движков (символ/интервал/длина кадра) хранят состояние инкрементальных индикаторов
+INCREMENTAL_MAX_ENGINES = int(os.getenv("INCREMENTAL_MAX_ENGINES", "256"))
+
+# Порядок столбцов совпадает с DataProcessor.calculate_indicators (ta)
+INDICATOR_COLUMNS = [
+    'RSI', 'MACD', 'MACD_signal', 'MACD_hist', 'OBV',
+    'MA_20', 'MA_50', 'MA_100', 'MA_200', 'ATR',
+    'Stochastic_Oscillator',
+    'Bollinger_Middle', 'Bollinger_Upper', 'Bollinger_Lower',
+    'ADX', 'Williams_%R', 'Parabolic_SAR',
+    'Ichimoku_A', 'Ichimoku_B', 'Ichimoku_Base_Line', 'Ichimoku_Conversion_Line',
+    'VWAP', 'Moving_Average_Envelope_Upper', 'Moving_Average_Envelope_Lower',
+]
+
+_RAW_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def _is_nan(val: float) -> bool:
+    return val != val
+
+
+def _clone(obj):
+    """
+    Копия состояния индикатора: числа общие, очереди и списки копируются.
+    Значения в контейнерах неизменяемые, поэтому это в разы дешевле deepcopy.
+    """
+    clone = copy.copy(obj)
+    for name, value in vars(obj).items():
+        if isinstance(value, (deque, list)):
+            setattr(clone, name, value.copy())
+    return clone
+
+
+class _EWM:
+    """
+    Экспоненциальное среднее с adjust=False.
+    Повторяет pandas ewm().mean() шаг в шаг, включая нормировку веса.
+    """
+
+    def __init__(self, min_periods: int, span: Optional[float] = None, alpha: Optional[float] = None):
+        self.com = (span - 1) / 2.0 if span is not None else 1.0 / alpha - 1.0
+        self.alpha = 1.0 / (1.0 + self.com)
+        self.old_wt_factor = 1.0 - self.alpha
+        self.min_periods = max(int(min_periods), 1)
+        self.weighted = math.nan
+        self.old_wt = 1.0
+        self.nobs = 0
+        self.started = False
+
+    def update(self, cur: float) -> float:
+        is_observation = not _is_nan(cur)
+        if not self.started:
+            self.started = True
+            self.weighted = cur
+            self.nobs = int(is_observation)
+        else:
+            self.nobs += int(is_observation)
+            if not _is_nan(self.weighted):
+                self.old_wt *= self.old_wt_factor
+                if is_observation:
+                    if self.weighted != cur:
+                        new_wt = self.alpha
+                        if self.com == 1:
+                            new_wt = 1.0 - self.old_wt
+                        self.weighted = self.old_wt * self.weighted + new_wt * cur
+                        self.weighted /= (self.old_wt + new_wt)
+                    self.old_wt = 1.0
+            elif is_observation:
+                self.weighted = cur
+        return self.weighted if self.nobs >= self.min_periods else math.nan
+
+
+class _RollingMean:
+    """
+    Скользящее среднее фиксированного окна.
+    Повторяет алгоритм pandas rolling().mean(): суммирование Кэхэна и
+    поправки на знак и повторяющиеся значения.
+    """
+
+    def __init__(self, window: int, min_periods: Optional[int] = None):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.values = deque()
+        self.nobs = 0
+        self.sum_x = 0.0
+        self.neg_ct = 0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.num_consecutive_same_value = 0
+        self.prev_value = None
+
+    def _add(self, val: float) -> None:
+        if _is_nan(val):
+            return
+        self.nobs += 1
+        y = val - self.compensation_add
+        t = self.sum_x + y
+        self.compensation_add = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, val) < 0:
+            self.neg_ct += 1
+        if val == self.prev_value:
+            self.num_consecutive_same_value += 1
+        else:
+            self.num_consecutive_same_value = 1
+        self.prev_value = val
+
+    def _remove(self, val: float) -> None:
+        if _is_nan(val):
+            return
+        self.nobs -= 1
+        y = -val - self.compensation_remove
+        t = self.sum_x + y
+        self.compensation_remove = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, val) < 0:
+            self.neg_ct -= 1
+
+    def update(self, val: float) -> float:
+        if self.prev_value is None:
+            # pandas инициализирует prev_value первым значением окна
+            self.prev_value = val
+        self.values.append(val)
+        if len(self.values) > self.window:
+            self._remove(self.values.popleft())
+        self._add(val)
+        return self._result()
+
+    def _result(self) -> float:
+        if self.nobs >= self.min_periods and self.nobs > 0:
+            result = self.sum_x / self.nobs
+            if self.num_consecutive_same_value >= self.nobs:
+                result = self.prev_value
+            elif self.neg_ct == 0 and result < 0:
+                result = 0.0
+            elif self.neg_ct == self.nobs and result > 0:
+                result = 0.0
+            return result
+        return math.nan
+
+
+class _RollingSum(_RollingMean):
+    """Скользящая сумма фиксированного окна (pandas rolling().sum())."""
+
+    def _result(self) -> float:
+        if self.nobs == 0 == self.min_periods:
+            return 0.0
+        if self.nobs >= self.min_periods:
+            if self.num_consecutive_same_value >= self.nobs:
+                return self.prev_value * self.nobs
+            return self.sum_x
+        return math.nan
+
+
+class _RollingStd:
+    """
+    Скользящее стандартное отклонение (pandas rolling().std(ddof)).
+    Метод Уэлфорда с компенсацией Кэхэна, как в pandas roll_var:
+    при потере точности окно пересчитывается заново.
+    """
+
+    # Порог обусловленности из pandas: остаётся не больше трёх значащих цифр
+    INV_COND_TOL = np.finfo(np.float64).eps * 1e3
+
+    def __init__(self, window: int, ddof: int = 0, min_periods: Optional[int] = None):
+        self.window = window
+        self.ddof = ddof
+        self.min_periods = max(window if min_periods is None else min_periods, 1)
+        self.values = deque()
+        self._clear()
+
+    def _clear(self) -> None:
+        self.nobs = 0.0
+        self.mean_x = 0.0
+        self.ssqdm_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.numerically_unstable = False
+
+    def _add(self, val: float) -> None:
+        if _is_nan(val):
+            return
+        prev_m2 = self.ssqdm_x
+        self.nobs += 1
+        prev_mean = self.mean_x - self.compensation_add
+        y = val - self.compensation_add
+        t = y - self.mean_x
+        self.compensation_add = t + self.mean_x - y
+        delta = t
+        if self.nobs:
+            self.mean_x = self.mean_x + delta / self.nobs
+        else:
+            self.mean_x = 0.0
+        self.ssqdm_x = self.ssqdm_x + (val - prev_mean) * (val - self.mean_x)
+        if prev_m2 * self.INV_COND_TOL > self.ssqdm_x:
+            self.numerically_unstable = True
+
+    def _remove(self, val: float) -> None:
+        if _is_nan(val):
+            return
+        prev_m2 = self.ssqdm_x
+        self.nobs -= 1
+        if self.nobs:
+            prev_mean = self.mean_x - self.compensation_remove
+            y = val - self.compensation_remove
+            t = y - self.mean_x
+            self.compensation_remove = t + self.mean_x - y
+            delta = t
+            self.mean_x = self.mean_x - delta / self.nobs
+            self.ssqdm_x = self.ssqdm_x - (val - prev_mean) * (val - self.mean_x)
+            if prev_m2 * self.INV_COND_TOL > self.ssqdm_x:
+                self.numerically_unstable = True
+        else:
+            self.mean_x = 0.0
+            self.ssqdm_x = 0.0
+            self.numerically_unstable = False
+
+    def update(self, val: float) -> float:
+        self.values.append(val)
+        if len(self.values) > self.window:
+            self._remove(self.values.popleft())
+        self._add(val)
+        if self.numerically_unstable:
+            self._clear()
+            for item in self.values:
+                self._add(item)
+            self.numerically_unstable = False
+        if self.nobs >= self.min_periods and self.nobs > self.ddof:
+            var = self.ssqdm_x / (self.nobs - self.ddof)
+        else:
+            return math.nan
+        return math.sqrt(var) if var >= 0 else 0.0
+
+
+class _RollingExtremum:
+    """Скользящий максимум/минимум на монотонной очереди, O(1) амортизированно."""
+
+    def __init__(self, window: int, mode: str = 'max', min_periods: Optional[int] = None):
+        self.window = window
+        self.is_max = mode == 'max'
+        self.min_periods = window if min_periods is None else min_periods
+        self.queue = deque()  # (индекс, значение)
+        self.observations = deque()
+        self.nobs = 0
+        self.index = -1
+
+    def update(self, val: float) -> float:
+        self.index += 1
+        nan = _is_nan(val)
+        self.observations.append(0 if nan else 1)
+        self.nobs += self.observations[-1]
+        if len(self.observations) > self.window:
+            self.nobs -= self.observations.popleft()
+        if not nan:
+            if self.is_max:
+                while self.queue and self.queue[-1][1] <= val:
+                    self.queue.pop()
+            else:
+                while self.queue and self.queue[-1][1] >= val:
+                    self.queue.pop()
+            self.queue.append((self.index, val))
+        while self.queue and self.queue[0][0] <= self.index - self.window:
+            self.queue.popleft()
+        if self.queue and self.nobs >= max(self.min_periods, 1):
+            return self.queue[0][1]
+        return math.nan
+
+
+class _WilderATR:
+    """ATR в реализации ta.volatility.AverageTrueRange."""
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.count = 0
+        self.initial: List[float] = []
+        self.atr = 0.0
+
+    def update(self, true_range: float) -> float:
+        self.count += 1
+        if self.count < self.window:
+            self.initial.append(true_range)
+            return 0.0
+        if self.count == self.window:
+            self.initial.append(true_range)
+            self.atr = np.asarray(self.initial, dtype=np.float64).sum() / float(self.window)
+            self.initial = []
+        else:
+            self.atr = (self.atr * (self.window - 1) + true_range) / float(self.window)
+        return self.atr
+
+
+class _WilderADX:
+    """ADX в реализации ta.trend.ADXIndicator (включая её стартовые нули)."""
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.count = 0
+        self.init_dm: List[float] = []
+        self.init_pos: List[float] = []
+        self.init_neg: List[float] = []
+        self.trs = 0.0
+        self.dip = 0.0
+        self.din = 0.0
+        self.dx_initial: List[float] = []
+        self.adx = 0.0
+
+    def update(self, dm: float, pos: float, neg: float) -> float:
+        w = self.window
+        k = self.count
+        self.count += 1
+        if k == 0:
+            return 0.0
+        if k <= w:
+            self.init_dm.append(dm)
+            self.init_pos.append(pos)
+            self.init_neg.append(neg)
+            if k < w:
+                return 0.0
+            self.trs = np.asarray(self.init_dm, dtype=np.float64).sum()
+            self.dip = np.asarray(self.init_pos, dtype=np.float64).sum()
+            self.din = np.asarray(self.init_neg, dtype=np.float64).sum()
+            self.init_dm, self.init_pos, self.init_neg = [], [], []
+        else:
+            self.trs = self.trs - (self.trs / float(w)) + dm
+            self.dip = self.dip - (self.dip / float(w)) + pos
+            self.din = self.din - (self.din / float(w)) + neg
+
+        di_pos = 100 * (self.dip / self.trs) if self.trs != 0 else 0.0
+        di_neg = 100 * (self.din / self.trs) if self.trs != 0 else 0.0
+        if di_pos + di_neg != 0:
+            dx = 100 * np.abs((di_pos - di_neg) / (di_pos + di_neg))
+        else:
+            dx = 0.0
+
+        if k < 2 * w - 1:
+            self.dx_initial.append(dx)
+            return 0.0
+        if k == 2 * w - 1:
+            self.dx_initial.append(dx)
+            self.adx = np.asarray(self.dx_initial, dtype=np.float64).mean()
+            self.dx_initial = []
+        else:
+            self.adx = ((self.adx * (w - 1)) + dx) / float(w)
+        return self.adx
+
+
+class _ParabolicSAR:
+    """Parabolic SAR в реализации ta.trend.PSARIndicator."""
+
+    def __init__(self, step: float = 0.02, max_step: float = 0.20):
+        self.step = step
+        self.max_step = max_step
+        self.count = 0
+        self.up_trend = True
+        self.acceleration_factor = step
+        self.up_trend_high = math.nan
+        self.down_trend_low = math.nan
+        self.prev_psar = math.nan
+        self.highs = deque(maxlen=2)
+        self.lows = deque(maxlen=2)
+
+    def update(self, high: float, low: float, close: float) -> float:
+        i = self.count
+        self.count += 1
+        if i == 0:
+            self.up_trend_high = high
+            self.down_trend_low = low
+        if i < 2:
+            psar = close
+        else:
+            reversal = False
+            if self.up_trend:
+                psar = self.prev_psar + (self.acceleration_factor * (self.up_trend_high - self.prev_psar))
+                if low < psar:
+                    reversal = True
+                    psar = self.up_trend_high
+                    self.down_trend_low = low
+                    self.acceleration_factor = self.step
+                else:
+                    if high > self.up_trend_high:
+                        self.up_trend_high = high
+                        self.acceleration_factor = min(self.acceleration_factor + self.step, self.max_step)
+                    low1, low2 = self.lows[1], self.lows[0]
+                    if low2 < psar:
+                        psar = low2
+                    elif low1 < psar:
+                        psar = low1
+            else:
+                psar = self.prev_psar - (self.acceleration_factor * (self.prev_psar - self.down_trend_low))
+                if high > psar:
+                    reversal = True
+                    psar = self.down_trend_low
+                    self.up_trend_high = high
+                    self.acceleration_factor = self.step
+                else:
+                    if low < self.down_trend_low:
+                        self.down_trend_low = low
+                        self.acceleration_factor = min(self.acceleration_factor + self.step, self.max_step)
+                    high1, high2 = self.highs[1], self.highs[0]
+                    if high2 > psar:
+                        psar = high2
+                    elif high1 > psar:
+                        psar = high1
+            self.up_trend = self.up_trend != reversal
+        self.prev_psar = psar
+        self.highs.append(high)
+        self.lows.append(low)
+        return psar
+
+
+class _IndicatorState:
+    """
+    Состояние всех индикаторов для одного потока свечей.
+    Каждый вызов step() обрабатывает ровно одну свечу.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.prev_close = math.nan
+        self.prev_high = math.nan
+        self.prev_low = math.nan
+
+        self.rsi_up = _EWM(min_periods=14, alpha=1 / 14)
+        self.rsi_down = _EWM(min_periods=14, alpha=1 / 14)
+        self.ema_fast = _EWM(min_periods=12, span=12)
+        self.ema_slow = _EWM(min_periods=26, span=26)
+        self.macd_signal = _EWM(min_periods=9, span=9)
+        self.obv = 0.0
+        self.sma = {w: _RollingMean(w) for w in (20, 50, 100, 200)}
+        self.atr = _WilderATR(14)
+        self.stoch_low = _RollingExtremum(14, 'min')
+        self.stoch_high = _RollingExtremum(14, 'max')
+        self.bb_std = _RollingStd(20, ddof=0)
+        self.adx = _WilderADX(14)
+        self.conv_high = _RollingExtremum(9, 'max')
+        self.conv_low = _RollingExtremum(9, 'min')
+        self.base_high = _RollingExtremum(26, 'max')
+        self.base_low = _RollingExtremum(26, 'min')
+        self.span_b_high = _RollingExtremum(52, 'max', min_periods=0)
+        self.span_b_low = _RollingExtremum(52, 'min', min_periods=0)
+        self.psar = _ParabolicSAR()
+        self.vwap_pv = _RollingSum(14)
+        self.vwap_volume = _RollingSum(14)
+
+    def copy(self) -> "_IndicatorState":
+        state = copy.copy(self)
+        for name, value in vars(self).items():
+            if isinstance(value, dict):
+                setattr(state, name, {key: _clone(item) for key, item in value.items()})
+            elif not isinstance(value, (int, float)):
+                setattr(state, name, _clone(value))
+        return state
+
+    def step(self, high: float, low: float, close: float, volume: float) -> Dict[str, float]:
+        first = self.count == 0
+        self.count += 1
+        prev_close = self.prev_close
+
+        # RSI
+        diff = close - prev_close
+        up = diff if diff > 0 else 0.0
+        down = -(diff if diff < 0 else 0.0)
+        ema_up = self.rsi_up.update(up)
+        ema_down = self.rsi_down.update(down)
+
+        # MACD
+        ema_fast = self.ema_fast.update(close)
+        ema_slow = self.ema_slow.update(close)
+        macd = ema_fast - ema_slow
+        macd_signal = self.macd_signal.update(macd)
+
+        # OBV
+        self.obv += -volume if close < prev_close else volume
+
+        # ATR
+        if first:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        atr = self.atr.update(true_range)
+
+        # ADX
+        if first:
+            dm = pos = neg = math.nan
+        else:
+            pdm = max(high, prev_close) if not _is_nan(prev_close) else math.nan
+            pdn = min(low, prev_close) if not _is_nan(prev_close) else math.nan
+            dm = pdm - pdn
+            diff_up = high - self.prev_high
+            diff_down = self.prev_low - low
+            pos = abs(diff_up) if (diff_up > diff_down and diff_up > 0) else 0.0
+            neg = abs(diff_down) if (diff_down > diff_up and diff_down > 0) else 0.0
+        adx = self.adx.update(dm, pos, neg)
+
+        typical_price = (high + low + close) / 3.0
+
+        row = {
+            'ema_up': ema_up,
+            'ema_down': ema_down,
+            'MACD': macd,
+            'MACD_signal': macd_signal,
+            'OBV': self.obv,
+            'MA_20': self.sma[20].update(close),
+            'MA_50': self.sma[50].update(close),
+            'MA_100': self.sma[100].update(close),
+            'MA_200': self.sma[200].update(close),
+            'ATR': atr,
+            'stoch_min': self.stoch_low.update(low),
+            'stoch_max': self.stoch_high.update(high),
+            'bb_std': self.bb_std.update(close),
+            'ADX': adx,
+            'Parabolic_SAR': self.psar.update(high, low, close),
+            'conv_high': self.conv_high.update(high),
+            'conv_low': self.conv_low.update(low),
+            'base_high': self.base_high.update(high),
+            'base_low': self.base_low.update(low),
+            'span_b_high': self.span_b_high.update(high),
+            'span_b_low': self.span_b_low.update(low),
+            'vwap_pv': self.vwap_pv.update(typical_price * volume),
+            'vwap_volume': self.vwap_volume.update(volume),
+        }
+
+        self.prev_close = close
+        self.prev_high = high
+        self.prev_low = low
+        return row
+
+
+def _finalize(components: Dict[str, np.ndarray], close: np.ndarray) -> Dict[str, np.ndarray]:
+    """Собирает итоговые столбцы из промежуточных рядов теми же операциями, что и ta."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ema_up = components['ema_up']
+        ema_down = components['ema_down']
+        rsi = np.where(ema_down == 0, 100, 100 - (100 / (1 + ema_up / ema_down)))
+
+        macd = components['MACD']
+        macd_signal = components['MACD_signal']
+
+        stoch_min = components['stoch_min']
+        stoch_max = components['stoch_max']
+        stoch = 100 * (close - stoch_min) / (stoch_max - stoch_min)
+        williams = -100 * (stoch_max - close) / (stoch_max - stoch_min)
+
+        bb_mid = components['MA_20']
+        bb_std = components['bb_std']
+
+        conv = 0.5 * (components['conv_high'] + components['conv_low'])
+        base = 0.5 * (components['base_high'] + components['base_low'])
+        span_b = 0.5 * (components['span_b_high'] + components['span_b_low'])
+
+        vwap = components['vwap_pv'] / components['vwap_volume']
+
+    return {
+        'RSI': rsi,
+        'MACD': macd,
+        'MACD_signal': macd_signal,
+        'MACD_hist': macd - macd_signal,
+        'OBV': components['OBV'],
+        'MA_20': components['MA_20'],
+        'MA_50': components['MA_50'],
+        'MA_100': components['MA_100'],
+        'MA_200': components['MA_200'],
+        'ATR': components['ATR'],
+        'Stochastic_Oscillator': stoch,
+        'Bollinger_Middle': bb_mid,
+        'Bollinger_Upper': bb_mid + 2 * bb_std,
+        'Bollinger_Lower': bb_mid - 2 * bb_std,
+        'ADX': components['ADX'],
+        'Williams_%R': williams,
+        'Parabolic_SAR': components['Parabolic_SAR'],
+        'Ichimoku_A': 0.5 * (conv + base),
+        'Ichimoku_B': span_b,
+        'Ichimoku_Base_Line': base,
+        'Ichimoku_Conversion_Line': conv,
+        'VWAP': vwap,
+        'Moving_Average_Envelope_Upper': components['MA_20'] * (1 + 0.02),
+        'Moving_Average_Envelope_Lower': components['MA_20'] * (1 - 0.02),
+    }
+
+
+class IncrementalIndicatorEngine:
+    """
+    Инкрементальный расчёт индикаторов для одной пары символ/интервал.
+
+    Движок хранит скользящее состояние каждого индикатора и при новом запросе
+    досчитывает только появившиеся свечи. Значения совпадают с расчётом ta
+    по переданному кадру: состояние переиспользуется, только если кадр
+    начинается с той же свечи, что и накопленная история (иначе рекурсивные
+    индикаторы зависели бы от свечей, которых нет в кадре). Последняя
+    (формирующаяся) свеча может меняться между запросами — в этом случае
+    пересчитывается только она.
+
+    Полный пересчёт выполняется векторно через реестр индикаторов (ATR, ADX
+    и Parabolic SAR — ядрами INDICATOR_BACKEND), а пошаговое состояние
+    восстанавливается по истории только тогда, когда нужно досчитать свечи.
+    """
+
+    # Минимальная длина истории, при которой ta считает все индикаторы (ADX)
+    MIN_HISTORY = 28
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        # None — состояние ещё не построено (история получена полным пересчётом)
+        self._state: Optional[_IndicatorState] = None
+        self._snapshot: Optional[_IndicatorState] = None
+        self._times: List[pd.Timestamp] = []
+        self._raw: Dict[str, List[float]] = {col: [] for col in _RAW_COLUMNS}
+        self._out: Dict[str, List[float]] = {col: [] for col in INDICATOR_COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def update(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Синхронизирует состояние с DataFrame и возвращает индикаторы,
+        выровненные по его индексу.
+        """
+        with self.lock:
+            times = list(df['Open Time'])
+            raw = {
+                col: df[col].to_numpy(dtype=np.float64) if col in df.columns
+                else np.zeros(len(df), dtype=np.float64)
+                for col in _RAW_COLUMNS
+            }
+            self._sync(times, raw)
+            n = len(df)
+            data = {col: np.asarray(self._out[col][:n], dtype=np.float64) for col in INDICATOR_COLUMNS}
+            return pd.DataFrame(data, index=df.index, columns=INDICATOR_COLUMNS)
+
+    def _sync(self, times: List[pd.Timestamp], raw: Dict[str, np.ndarray]) -> None:
+        """
+        Досчитывает новые свечи. История всегда начинается с первой свечи кадра:
+        у сдвинутого окна рекурсивные индикаторы (EMA, OBV, ATR, ADX, SAR)
+        отличаются от ta, поэтому оно считается заново.
+        """
+        n = len(times)
+        overlap = min(len(self._times), n)
+        if not self._times or self._times[:overlap] != times[:overlap]:
+            logger.debug("Инкрементальные индикаторы: полный пересчёт истории")
+            self._recompute(times, raw)
+            return
+
+        # Все закрытые свечи, кроме последней известной, должны совпадать
+        closed = overlap - 1 if overlap == len(self._times) else overlap
+        for col in _RAW_COLUMNS:
+            known = np.asarray(self._raw[col][:closed], dtype=np.float64)
+            if not np.array_equal(known, raw[col][:closed], equal_nan=True):
+                logger.debug("Инкрементальные индикаторы: история изменилась, полный пересчёт")
+                self._recompute(times, raw)
+                return
+
+        first_new = overlap
+        if closed < overlap:
+            last = overlap - 1
+            changed = any(
+                not np.array_equal(self._raw[col][-1], raw[col][last], equal_nan=True)
+                for col in _RAW_COLUMNS
+            )
+            if changed:
+                # Формирующаяся свеча обновилась — откатываем только её
+                self._ensure_state()
+                self._rollback_last()
+                first_new = last
+
+        if first_new < n:
+            self._ensure_state()
+        self._append(times, raw, first_new)
+
+    def _recompute(self, times: List[pd.Timestamp], raw: Dict[str, np.ndarray]) -> None:
+        """Пересчитывает всю историю кадра векторно, без пошагового состояния."""
+        self._reset()
+        frame = pd.DataFrame({col: raw[col] for col in _RAW_COLUMNS})
+        compute_indicators(frame)
+        self._times = list(times)
+        self._raw = {col: raw[col].tolist() for col in _RAW_COLUMNS}
+        self._out = {col: frame[col].to_numpy(dtype=np.float64).tolist() for col in INDICATOR_COLUMNS}
+
+    def _ensure_state(self) -> None:
+        """Строит пошаговое состояние по сохранённой истории (после полного пересчёта)."""
+        if self._state is not None:
+            return
+        state = _IndicatorState()
+        n = len(self._times)
+        high, low, close, volume = (self._raw[col] for col in ('High', 'Low', 'Close', 'Volume'))
+        for i in range(n):
+            if i == n - 1:
+                self._snapshot = state.copy()
+            state.step(high[i], low[i], close[i], volume[i])
+        self._state = state
+
+    def _rollback_last(self) -> None:
+        self._state = self._snapshot
+        self._snapshot = None
+        self._times.pop()
+        for col in _RAW_COLUMNS:
+            self._raw[col].pop()
+        for col in INDICATOR_COLUMNS:
+            self._out[col].pop()
+
+    def _append(self, times: List[pd.Timestamp], raw: Dict[str, np.ndarray], first: int) -> None:
+        n = len(times)
+        if first >= n:
+            return
+        components: Dict[str, List[float]] = {}
+        state = self._state
+        high, low, close, volume = raw['High'], raw['Low'], raw['Close'], raw['Volume']
+        for i in range(first, n):
+            if i == n - 1:
+                # Снимок перед последней свечой позволяет дешево заменить её позже
+                self._snapshot = state.copy()
+            row = state.step(float(high[i]), float(low[i]), float(close[i]), float(volume[i]))
+            for key, value in row.items():
+                components.setdefault(key, []).append(value)
+
+        arrays = {key: np.asarray(values, dtype=np.float64) for key, values in components.items()}
+        final = _finalize(arrays, close[first:n])
+        self._times.extend(times[first:n])
+        for col in _RAW_COLUMNS:
+            self._raw[col].extend(raw[col][first:n].tolist())
+        for col in INDICATOR_COLUMNS:
+            self._out[col].extend(final[col].tolist())
+
+
+_engines: "OrderedDict[Tuple[str, str, int], IncrementalIndicatorEngine]" = OrderedDict()
+_engines_lock = threading.Lock()
+
+
+def get_engine(symbol: str, interval: str, size: int) -> IncrementalIndicatorEngine:
+    """
+    Возвращает (и при необходимости создаёт) движок для пары символ/интервал
+    и длины кадра size: окна разной длины не вытесняют историю друг друга.
+    Хранится не больше INCREMENTAL_MAX_ENGINES движков, давно не запрошенные вытесняются.
+    """
+    key = (symbol.upper(), interval, size)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = IncrementalIndicatorEngine()
+            _engines[key] = engine
+            while len(_engines) > INCREMENTAL_MAX_ENGINES:
+                _engines.popitem(last=False)
+        else:
+            _engines.move_to_end(key)
+        return engine
+
+
+def reset_engines() -> None:
+    """Сбрасывает все накопленные состояния (используется в тестах)."""
+    with _engines_lock:
+        _engines.clear()
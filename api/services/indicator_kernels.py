@@ -0,0 +1,227 @@
+# api/services/indicator_kernels.py
+
+import os
+from typing import Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+from config.config import logger
+
+# Реализация рекурсивных индикаторов (ATR, ADX, Parabolic SAR):
+# ta — исходная библиотека, numpy — векторная подготовка и цикл на float Python,
+# numba — тот же цикл, скомпилированный Numba, auto — numba, если пакет установлен, иначе numpy
+INDICATOR_BACKEND = os.getenv("INDICATOR_BACKEND", "auto").lower()
+
+BACKENDS = ("ta", "numpy", "numba", "auto")
+
+# Результаты совпадают с ta побитно: поэлементные операции выполняются в том же
+# порядке, суммы и средние для стартовых значений считаются numpy так же, как
+# в pandas, а в циклах остаются только рекурсии.
+
+
+def _atr_loop(true_range, window, initial, out):
+    out[window - 1] = initial
+    for i in range(window, len(out)):
+        out[i] = (out[i - 1] * (window - 1) + true_range[i]) / float(window)
+    return out
+
+
+def _wilder_sum_loop(values, window, initial, out):
+    # Как в ta.trend.ADXIndicator: последний элемент не пересчитывается и остаётся 0
+    out[0] = initial
+    for i in range(1, len(out) - 1):
+        out[i] = out[i - 1] - (out[i - 1] / float(window)) + values[window + i]
+    return out
+
+
+def _adx_loop(directional_index, window, initial, out):
+    out[window] = initial
+    for i in range(window + 1, len(out)):
+        out[i] = ((out[i - 1] * (window - 1)) + directional_index[i - 1]) / float(window)
+    return out
+
+
+def _psar_loop(high, low, step, max_step, out):
+    up_trend = True
+    acceleration_factor = step
+    up_trend_high = high[0]
+    down_trend_low = low[0]
+    for i in range(2, len(out)):
+        reversal = False
+        max_high = high[i]
+        min_low = low[i]
+        if up_trend:
+            out[i] = out[i - 1] + (acceleration_factor * (up_trend_high - out[i - 1]))
+            if min_low < out[i]:
+                reversal = True
+                out[i] = up_trend_high
+                down_trend_low = min_low
+                acceleration_factor = step
+            else:
+                if max_high > up_trend_high:
+                    up_trend_high = max_high
+                    acceleration_factor = min(acceleration_factor + step, max_step)
+                low1 = low[i - 1]
+                low2 = low[i - 2]
+                if low2 < out[i]:
+                    out[i] = low2
+                elif low1 < out[i]:
+                    out[i] = low1
+        else:
+            out[i] = out[i - 1] - (acceleration_factor * (out[i - 1] - down_trend_low))
+            if max_high > out[i]:
+                reversal = True
+                out[i] = down_trend_low
+                up_trend_high = max_high
+                acceleration_factor = step
+            else:
+                if min_low < down_trend_low:
+                    down_trend_low = min_low
+                    acceleration_factor = min(acceleration_factor + step, max_step)
+                high1 = high[i - 1]
+                high2 = high[i - 2]
+                if high2 > out[i]:
+                    out[i] = high2
+                elif high1 > out[i]:
+                    out[i] = high1
+        up_trend = up_trend != reversal
+    return out
+
+
+_PYTHON_LOOPS: Dict[str, Callable] = {
+    "atr": _atr_loop,
+    "wilder_sum": _wilder_sum_loop,
+    "adx": _adx_loop,
+    "psar": _psar_loop,
+}
+_numba_loops: Optional[Dict[str, Callable]] = None
+_resolved: Optional[str] = None
+
+
+def get_backend() -> str:
+    """Фактическая реализация: ta, numpy или numba (auto и недоступная numba разрешаются)."""
+    global _resolved
+    if _resolved is None:
+        backend = INDICATOR_BACKEND if INDICATOR_BACKEND in BACKENDS else "auto"
+        if backend != INDICATOR_BACKEND:
+            logger.warning(f"Неизвестный INDICATOR_BACKEND={INDICATOR_BACKEND!r}, используется auto")
+        if backend in ("numba", "auto"):
+            try:
+                import numba  # noqa: F401
+                backend = "numba"
+            except ImportError:
+                if backend == "numba":
+                    logger.warning("Пакет numba не установлен, индикаторы считаются на numpy")
+                backend = "numpy"
+        _resolved = backend
+        logger.info(f"Рекурсивные индикаторы: {backend}")
+    return _resolved
+
+
+def set_backend(backend: str) -> None:
+    """Переключает реализацию (для A/B-сравнения и тестов)."""
+    global INDICATOR_BACKEND, _resolved
+    INDICATOR_BACKEND, _resolved = backend, None
+
+
+def use_kernels() -> bool:
+    return get_backend() != "ta"
+
+
+def _loop(name: str) -> Callable:
+    global _numba_loops
+    if get_backend() != "numba":
+        return _PYTHON_LOOPS[name]
+    if _numba_loops is None:
+        # Компиляция при первом расчёте (кеш на диске — при повторных запусках)
+        import numba
+
+        _numba_loops = {key: numba.njit(cache=True)(func) for key, func in _PYTHON_LOOPS.items()}
+    return _numba_loops[name]
+
+
+def _run(name: str, arrays: Sequence[np.ndarray], *args) -> np.ndarray:
+    """
+    Вызывает цикл name(*входы, *args, out). Для numba — на массивах, для numpy —
+    на списках float: арифметика float Python и float64 numpy совпадает,
+    а индексирование списка в разы быстрее поэлементного доступа к массиву.
+    """
+    *inputs, out = arrays
+    loop = _loop(name)
+    if get_backend() == "numba":
+        return loop(*inputs, *args, out)
+    return np.asarray(loop(*[a.tolist() for a in inputs], *args, out.tolist()), dtype=np.float64)
+
+
+def _shift(values: np.ndarray) -> np.ndarray:
+    shifted = np.empty_like(values)
+    shifted[0] = np.nan
+    shifted[1:] = values[:-1]
+    return shifted
+
+
+def _mean_skipna(values: np.ndarray) -> float:
+    """Series.mean(): сумма без пропусков, делённая на их число."""
+    valid = ~np.isnan(values)
+    count = int(valid.sum())
+    if count == 0:
+        return np.nan
+    return np.where(valid, values, 0.0).sum() / np.float64(count)
+
+
+def average_true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                       window: int = 14) -> Optional[np.ndarray]:
+    """ATR как ta.volatility.AverageTrueRange (None — слишком мало свечей, считать через ta)."""
+    if len(close) < window or window <= 0:
+        return None
+    prev_close = _shift(close)
+    # DataFrame.max(axis=1) пропускает NaN (первая свеча: только high - low)
+    with np.errstate(invalid="ignore"):
+        true_range = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+    out = np.zeros(len(close))
+    return _run("atr", (true_range, out), window, _mean_skipna(true_range[:window]))
+
+
+def average_directional_index(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                              window: int = 14) -> Optional[np.ndarray]:
+    """ADX как ta.trend.ADXIndicator.adx(), включая стартовые нули (None — мало свечей)."""
+    n = len(close)
+    if window <= 0 or n < 2 * window:
+        return None
+    prev_close = _shift(close)
+    # np.amax/np.amin в ta распространяют NaN
+    directional_movement = np.maximum(high, prev_close) - np.minimum(low, prev_close)
+    diff_up = high - _shift(high)
+    diff_down = _shift(low) - low
+    with np.errstate(invalid="ignore"):
+        pos = np.abs(((diff_up > diff_down) & (diff_up > 0)) * diff_up)
+        neg = np.abs(((diff_down > diff_up) & (diff_down > 0)) * diff_down)
+
+    def initial(values: np.ndarray) -> float:
+        # Series.dropna().iloc[0:window].sum()
+        return values[~np.isnan(values)][:window].sum()
+
+    size = n - (window - 1)
+    trs = _run("wilder_sum", (directional_movement, np.zeros(size)), window, initial(directional_movement))
+    dip = _run("wilder_sum", (pos, np.zeros(size)), window, initial(pos))
+    din = _run("wilder_sum", (neg, np.zeros(size)), window, initial(neg))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        nonzero = trs != 0
+        di_pos = np.where(nonzero, 100 * (dip / np.where(nonzero, trs, 1.0)), 0.0)
+        di_neg = np.where(nonzero, 100 * (din / np.where(nonzero, trs, 1.0)), 0.0)
+        total = di_pos + di_neg
+        directional_index = np.where(
+            total != 0, 100 * np.abs((di_pos - di_neg) / np.where(total != 0, total, 1.0)), 0.0
+        )
+
+    adx = _run("adx", (directional_index, np.zeros(size)), window, directional_index[0:window].mean())
+    return np.concatenate((np.zeros(window - 1), adx))
+
+
+def parabolic_sar(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                  step: float = 0.02, max_step: float = 0.20) -> Optional[np.ndarray]:
+    """Parabolic SAR как ta.trend.PSARIndicator.psar() (None — нет свечей)."""
+    if len(close) == 0:
+        return None
+    return _run("psar", (high, low, close.astype(np.float64, copy=True)), float(step), float(max_step))
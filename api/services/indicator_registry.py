@@ -0,0 +1,262 @@
+# api/services/indicator_registry.py
+
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import ta  # Технический анализ
+
+from config.config import logger
+from services import indicator_kernels
+
+# Функция расчёта получает DataFrame (с исходными столбцами и зависимостями)
+# и возвращает словарь {выходной столбец: Series}
+IndicatorCompute = Callable[[pd.DataFrame], Dict[str, pd.Series]]
+
+
+class IndicatorSpec:
+    """
+    Описание индикатора: входные столбцы, длина разгона, выходные столбцы
+    и зависимости от других индикаторов.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        inputs: Tuple[str, ...],
+        warmup: int,
+        outputs: Tuple[str, ...],
+        compute: IndicatorCompute,
+        depends: Tuple[str, ...] = (),
+    ):
+        self.name = name
+        self.inputs = inputs
+        # Сколько свечей нужно до устойчивых значений (для экспоненциальных
+        # сглаживаний — с запасом на затухание начального значения)
+        self.warmup = warmup
+        self.outputs = outputs
+        self.compute = compute
+        self.depends = depends
+
+    def __repr__(self) -> str:
+        return f"IndicatorSpec({self.name!r}, warmup={self.warmup}, outputs={list(self.outputs)})"
+
+
+# Зарегистрированные индикаторы в порядке вывода столбцов
+INDICATORS: Dict[str, IndicatorSpec] = {}
+
+
+def register_indicator(
+    name: str,
+    inputs: Tuple[str, ...],
+    warmup: int,
+    outputs: Tuple[str, ...],
+    depends: Tuple[str, ...] = (),
+):
+    """Декоратор для регистрации индикатора."""
+    def decorator(func: IndicatorCompute) -> IndicatorCompute:
+        INDICATORS[name] = IndicatorSpec(name, inputs, warmup, outputs, func, depends)
+        return func
+    return decorator
+
+
+def _lookup() -> Dict[str, str]:
+    """Имя индикатора или любого его столбца (без учёта регистра) -> имя индикатора."""
+    names = {}
+    for spec in INDICATORS.values():
+        names[spec.name.lower()] = spec.name
+        for column in spec.outputs:
+            names[column.lower()] = spec.name
+    return names
+
+
+def resolve_indicators(requested: Optional[Iterable[str]] = None) -> List[IndicatorSpec]:
+    """
+    Возвращает индикаторы для расчёта вместе с зависимостями в порядке регистрации.
+    Пустой запрос означает все индикаторы; неизвестные имена пропускаются.
+    """
+    requested = [name for name in (requested or []) if name and name.strip()]
+    if not requested:
+        return list(INDICATORS.values())
+
+    lookup = _lookup()
+    selected = set()
+
+    def add(name: str) -> None:
+        if name in selected:
+            return
+        selected.add(name)
+        for dependency in INDICATORS[name].depends:
+            add(dependency)
+
+    for name in requested:
+        resolved = lookup.get(name.strip().lower())
+        if resolved is None:
+            logger.warning(f"Неизвестный индикатор '{name}' пропущен")
+            continue
+        add(resolved)
+
+    if not selected:
+        logger.warning("Ни один запрошенный индикатор не найден, считаются все")
+        return list(INDICATORS.values())
+    return [spec for name, spec in INDICATORS.items() if name in selected]
+
+
+def required_warmup(requested: Optional[Iterable[str]] = None) -> int:
+    """Наибольшая длина разгона среди запрошенных индикаторов и их зависимостей."""
+    return max((spec.warmup for spec in resolve_indicators(requested)), default=0)
+
+
+def output_columns(specs: Iterable[IndicatorSpec]) -> List[str]:
+    return [column for spec in specs for column in spec.outputs]
+
+
+def compute_indicators(df: pd.DataFrame, specs: Optional[Iterable[IndicatorSpec]] = None) -> None:
+    """
+    Считает индикаторы specs (по умолчанию все) по всему DataFrame и записывает
+    их столбцы в df. ATR, ADX и Parabolic SAR — через ядра INDICATOR_BACKEND.
+    """
+    for spec in (INDICATORS.values() if specs is None else specs):
+        for column, values in spec.compute(df).items():
+            df[column] = values
+
+
+@register_indicator('RSI', ('Close',), 100, ('RSI',))
+def _rsi(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    return {'RSI': ta.momentum.RSIIndicator(close=df['Close']).rsi()}
+
+
+@register_indicator('MACD', ('Close',), 100, ('MACD', 'MACD_signal', 'MACD_hist'))
+def _macd(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    macd = ta.trend.MACD(close=df['Close'])
+    return {
+        'MACD': macd.macd(),
+        'MACD_signal': macd.macd_signal(),
+        'MACD_hist': macd.macd_diff(),
+    }
+
+
+@register_indicator('OBV', ('Close', 'Volume'), 1, ('OBV',))
+def _obv(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    return {
+        'OBV': ta.volume.OnBalanceVolumeIndicator(
+            close=df['Close'], volume=df['Volume']
+        ).on_balance_volume()
+    }
+
+
+def _register_sma(window: int) -> None:
+    column = f'MA_{window}'
+
+    @register_indicator(column, ('Close',), window, (column,))
+    def _sma(df: pd.DataFrame) -> Dict[str, pd.Series]:
+        return {column: ta.trend.SMAIndicator(close=df['Close'], window=window).sma_indicator()}
+
+
+for _window in (20, 50, 100, 200):
+    _register_sma(_window)
+
+
+def _kernel_inputs(df: pd.DataFrame) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    High, Low, Close для рекурсивных ядер (indicator_kernels) или None, если
+    выбран бэкенд ta или данные не float64 — тогда считает сама библиотека ta.
+    """
+    if not indicator_kernels.use_kernels():
+        return None
+    columns = [df[name] for name in ('High', 'Low', 'Close')]
+    if any(column.dtype != np.float64 for column in columns):
+        return None
+    return tuple(column.to_numpy() for column in columns)
+
+
+@register_indicator('ATR', ('High', 'Low', 'Close'), 100, ('ATR',))
+def _atr(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    inputs = _kernel_inputs(df)
+    values = indicator_kernels.average_true_range(*inputs) if inputs else None
+    if values is not None:
+        return {'ATR': pd.Series(values, index=df.index)}
+    atr = ta.volatility.AverageTrueRange(high=df['High'], low=df['Low'], close=df['Close'])
+    return {'ATR': atr.average_true_range()}
+
+
+@register_indicator('Stochastic_Oscillator', ('High', 'Low', 'Close'), 14, ('Stochastic_Oscillator',))
+def _stochastic(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    stoch = ta.momentum.StochasticOscillator(high=df['High'], low=df['Low'], close=df['Close'])
+    return {'Stochastic_Oscillator': stoch.stoch()}
+
+
+@register_indicator(
+    'Bollinger', ('Close',), 20, ('Bollinger_Middle', 'Bollinger_Upper', 'Bollinger_Lower')
+)
+def _bollinger(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    bollinger = ta.volatility.BollingerBands(close=df['Close'])
+    return {
+        'Bollinger_Middle': bollinger.bollinger_mavg(),
+        'Bollinger_Upper': bollinger.bollinger_hband(),
+        'Bollinger_Lower': bollinger.bollinger_lband(),
+    }
+
+
+@register_indicator('ADX', ('High', 'Low', 'Close'), 100, ('ADX',))
+def _adx(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    inputs = _kernel_inputs(df)
+    values = indicator_kernels.average_directional_index(*inputs) if inputs else None
+    if values is not None:
+        return {'ADX': pd.Series(values, index=df.index)}
+    adx = ta.trend.ADXIndicator(high=df['High'], low=df['Low'], close=df['Close'])
+    return {'ADX': adx.adx()}
+
+
+@register_indicator('Williams_%R', ('High', 'Low', 'Close'), 14, ('Williams_%R',))
+def _williams(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    williams = ta.momentum.WilliamsRIndicator(high=df['High'], low=df['Low'], close=df['Close'])
+    return {'Williams_%R': williams.williams_r()}
+
+
+@register_indicator('Parabolic_SAR', ('High', 'Low', 'Close'), 50, ('Parabolic_SAR',))
+def _psar(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    inputs = _kernel_inputs(df)
+    # ta пишет часть значений по метке индекса, поэтому ядро — только для RangeIndex с нуля
+    if inputs and isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1:
+        values = indicator_kernels.parabolic_sar(*inputs)
+        if values is not None:
+            return {'Parabolic_SAR': pd.Series(values, index=df.index)}
+    psar = ta.trend.PSARIndicator(high=df['High'], low=df['Low'], close=df['Close'])
+    return {'Parabolic_SAR': psar.psar()}
+
+
+@register_indicator(
+    'Ichimoku', ('High', 'Low'), 52,
+    ('Ichimoku_A', 'Ichimoku_B', 'Ichimoku_Base_Line', 'Ichimoku_Conversion_Line'),
+)
+def _ichimoku(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    ichimoku = ta.trend.IchimokuIndicator(high=df['High'], low=df['Low'])
+    return {
+        'Ichimoku_A': ichimoku.ichimoku_a(),
+        'Ichimoku_B': ichimoku.ichimoku_b(),
+        'Ichimoku_Base_Line': ichimoku.ichimoku_base_line(),
+        'Ichimoku_Conversion_Line': ichimoku.ichimoku_conversion_line(),
+    }
+
+
+@register_indicator('VWAP', ('High', 'Low', 'Close', 'Volume'), 14, ('VWAP',))
+def _vwap(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    vwap = ta.volume.VolumeWeightedAveragePrice(
+        high=df['High'], low=df['Low'], close=df['Close'], volume=df['Volume'], window=14
+    )
+    return {'VWAP': vwap.volume_weighted_average_price()}
+
+
+@register_indicator(
+    'Moving_Average_Envelope', ('Close',), 20,
+    ('Moving_Average_Envelope_Upper', 'Moving_Average_Envelope_Lower'),
+    depends=('MA_20',),
+)
+def _envelope(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    # Конверт строится вокруг SMA(20) с отклонением 2%
+    envelope_percentage = 0.02
+    return {
+        'Moving_Average_Envelope_Upper': df['MA_20'] * (1 + envelope_percentage),
+        'Moving_Average_Envelope_Lower': df['MA_20'] * (1 - envelope_percentage),
+    }
@@ -0,0 +1,163 @@
+# api/services/llm_cache.py
+
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from config.config import logger
+
+# Бэкенд кеша: memory, disk или off
+LLM_CACHE = os.getenv("LLM_CACHE", "memory").lower()
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "256"))
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "data", "llm_cache.sqlite"),
+)
+
+# Длительность свечи по интервалу запроса, секунды
+INTERVAL_SECONDS = {
+    "1m": 60, "5m": 300, "15m": 900,
+    "1h": 3600, "4h": 14400, "1d": 86400,
+}
+
+
+def make_cache_key(*parts: str) -> str:
+    """Ключ по содержимому: sha256 от модели, шаблона и данных промпта."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def ttl_until_candle_close(interval: str, now: Optional[float] = None) -> Optional[float]:
+    """Секунды до закрытия текущей свечи интервала (None для неизвестного интервала)."""
+    step = INTERVAL_SECONDS.get(interval)
+    if step is None:
+        return None
+    now = time.time() if now is None else now
+    return step - (now % step)
+
+
+class CacheBackend(ABC):
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Возвращает значение или None, если ключа нет или срок истёк."""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Сохраняет значение на ttl секунд."""
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """
+    LRU-кеш в памяти процесса с TTL на каждую запись.
+    Значения копируются при записи и чтении, как при сериализации в SQLiteCache:
+    изменения ответа вызывающим кодом не попадают в кеш.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+class SQLiteCache(CacheBackend):
+    """Кеш на диске (SQLite): переживает перезапуск, вытеснение по LRU."""
+
+    def __init__(self, path: str, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, payload, now + ttl, now),
+            )
+            self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+
+_backends: Dict[str, CacheBackend] = {}
+
+
+def get_llm_cache() -> Optional[CacheBackend]:
+    """Возвращает кеш, выбранный переменной LLM_CACHE (или None, если выключен)."""
+    if LLM_CACHE == "off":
+        return None
+    backend = _backends.get(LLM_CACHE)
+    if backend is None:
+        if LLM_CACHE == "disk":
+            backend = SQLiteCache(LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES)
+        else:
+            backend = MemoryCache(LLM_CACHE_MAX_ENTRIES)
+        logger.info(f"Кеш LLM-ответов: {type(backend).__name__}")
+        _backends[LLM_CACHE] = backend
+    return backend
@@ -1,17 +1,345 @@
+import asyncio
+import importlib
+import json
 import os
-from services.providers.openai_provider import OpenAIProvider
-from services.providers.google_provider import GoogleVertexAIProvider
-from services.providers.huggingface_provider import HuggingFaceProvider
+import random
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Union
+
+from config.config import logger
+from services.concurrency import LLM_CONCURRENCY, llm_semaphore
+from services.metrics import UPSTREAM_ERRORS
+from services.providers.base import LLMProvider
+
+# Таймаут одного обращения к провайдеру (для потока — ожидания очередного фрагмента), сек
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+# Повторы при лимитах, таймаутах и 5xx
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+# Экспоненциальная пауза с полным джиттером: random(0, min(MAX, BASE * 2**попытка))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "20"))
+
+# Хеджирование: запасной провайдер (пусто — выключено) и дедлайн основного
+LLM_FALLBACK_PROVIDER = os.getenv("LLM_FALLBACK_PROVIDER", "").lower()
+# Перцентиль задержек основного провайдера, после которого отправляется запасной запрос
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+# Дедлайн, пока задержек накоплено меньше LLM_HEDGE_MIN_SAMPLES, сек
+LLM_HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DELAY", "20"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", "200"))
+
+# Автомат отключения: после стольких подряд ошибок или медленных ответов
+# провайдер пропускается LLM_BREAKER_COOLDOWN секунд, затем пробный запрос
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+# Ответ дольше этого (сек) считается медленным и учитывается как сбой
+LLM_BREAKER_SLOW = float(os.getenv("LLM_BREAKER_SLOW", "60"))
+
+# Провайдеры: имя -> (модуль, класс). SDK провайдера импортируется только
+# когда LLM_PROVIDER его выбирает, и только при первом запросе
+PROVIDERS = {
+    "openai": ("services.providers.openai_provider", "OpenAIProvider"),
+    "google": ("services.providers.google_provider", "GoogleVertexAIProvider"),
+    "huggingface": ("services.providers.huggingface_provider", "HuggingFaceProvider"),
+}
+
+# Долгоживущие экземпляры провайдеров (по одному клиенту SDK на процесс)
+_providers: Dict[str, LLMProvider] = {}
+
+
+def load_provider(name):
+    """Импортирует и создаёт провайдера; неизвестное имя означает openai."""
+    module_name, class_name = PROVIDERS.get(name, PROVIDERS["openai"])
+    return getattr(importlib.import_module(module_name), class_name)(timeout=LLM_TIMEOUT)
+
+
+def get_provider(name: str) -> LLMProvider:
+    provider = _providers.get(name)
+    if provider is None:
+        provider = load_provider(name)
+        _providers[name] = provider
+    return provider
+
+
+class CircuitBreaker:
+    """
+    Автомат отключения провайдера: closed -> open после failure_threshold
+    подряд сбоев, через cooldown — half-open (запросы снова пропускаются),
+    успех закрывает автомат, первый же сбой снова открывает.
+    """
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES, cooldown: float = LLM_BREAKER_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        return self.state != "open"
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+# Статистика провайдеров в процессе: последние задержки и автоматы отключения
+_latencies: Dict[str, Deque[float]] = {}
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = CircuitBreaker()
+        _breakers[name] = breaker
+    return breaker
+
+
+def record_latency(name: str, seconds: float) -> None:
+    _latencies.setdefault(name, deque(maxlen=LLM_LATENCY_WINDOW)).append(seconds)
+
+
+def hedge_delay(name: str, percentile: float = LLM_HEDGE_PERCENTILE) -> float:
+    """Дедлайн хеджирования: перцентиль недавних задержек провайдера."""
+    samples = _latencies.get(name)
+    if not samples or len(samples) < LLM_HEDGE_MIN_SAMPLES:
+        return LLM_HEDGE_DELAY
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+    return ordered[index]
+
+
+def reset_provider_stats() -> None:
+    _latencies.clear()
+    _breakers.clear()
+
+
+def is_json_answer(content: str) -> bool:
+    """Есть ли в ответе разбираемый JSON-объект (в блоке ```json или между { и })."""
+    start, end = content.find("{"), content.rfind("}")
+    if start == -1 or end < start:
+        return False
+    try:
+        json.loads(content[start:end + 1])
+        return True
+    except ValueError:
+        return False
+
+
+def provider_concurrency(name: str) -> int:
+    """Лимит одновременных запросов провайдера: LLM_CONCURRENCY_<ИМЯ> или общий LLM_CONCURRENCY."""
+    return int(os.getenv(f"LLM_CONCURRENCY_{name.upper()}", str(LLM_CONCURRENCY)))
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Пауза перед повтором attempt (с нуля); Retry-After провайдера имеет приоритет."""
+    if retry_after is not None:
+        return retry_after + random.uniform(0, LLM_BACKOFF_BASE)
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+
 
 class LLMService:
-    def __init__(self):
-        provider = os.getenv("LLM_PROVIDER", "openai").lower()
-        if provider == "google":
-            self.client = GoogleVertexAIProvider()
-        elif provider == "huggingface":
-            self.client = HuggingFaceProvider()
+    """
+    Единая асинхронная точка обращения к LLM: провайдер по LLM_PROVIDER,
+    семафор на провайдера, таймаут и повторы с джиттером.
+    Слот семафора занят только на время запроса, не во время паузы перед повтором.
+
+    С запасным провайдером (LLM_FALLBACK_PROVIDER) generate хеджирует запрос:
+    если основной не ответил за перцентиль своих задержек, ответил ошибкой
+    или невалидным JSON, запрос уходит запасному; берётся первый валидный ответ.
+    Медленные и падающие провайдеры отключаются автоматом (CircuitBreaker).
+    """
+
+    def __init__(
+        self,
+        provider: Optional[Union[str, LLMProvider]] = None,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        fallback: Optional[Union[str, LLMProvider]] = None,
+    ):
+        self.provider, self._client = self._resolve(provider or os.getenv("LLM_PROVIDER", "openai"))
+        fallback = fallback if fallback is not None else LLM_FALLBACK_PROVIDER
+        self.fallback, self._fallback_client = self._resolve(fallback) if fallback else (None, None)
+        if self.fallback == self.provider:
+            self.fallback, self._fallback_client = None, None
+        self.timeout = LLM_TIMEOUT if timeout is None else timeout
+        self.max_retries = LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.concurrency = provider_concurrency(self.provider)
+
+    @staticmethod
+    def _resolve(provider: Union[str, LLMProvider]):
+        if isinstance(provider, LLMProvider):
+            return provider.name, provider
+        return provider.lower(), None
+
+    @property
+    def client(self) -> LLMProvider:
+        if self._client is None:
+            self._client = get_provider(self.provider)
+        return self._client
+
+    @property
+    def fallback_client(self) -> Optional[LLMProvider]:
+        if self._fallback_client is None and self.fallback:
+            self._fallback_client = get_provider(self.fallback)
+        return self._fallback_client
+
+    @property
+    def model(self) -> str:
+        return self.client.model
+
+    async def _generate_with(self, client: LLMProvider, messages: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
+        """Запрос к одному провайдеру с повторами; учитывает задержку и исход в автомате."""
+        breaker = get_breaker(client.name)
+        concurrency = provider_concurrency(client.name)
+        attempt = 0
+        started = time.monotonic()
+        while True:
+            try:
+                async with llm_semaphore(client.name, concurrency):
+                    result = await asyncio.wait_for(client.generate(messages, **kwargs), self.timeout)
+                break
+            except Exception as e:
+                UPSTREAM_ERRORS.inc(client.name)
+                if not (attempt < self.max_retries and client.is_retryable(e)):
+                    breaker.record_failure()
+                    raise
+                delay = backoff_delay(attempt, client.retry_after(e))
+                attempt += 1
+                logger.warning(
+                    f"LLM {client.name}: {type(e).__name__}, повтор {attempt}/{self.max_retries} через {delay:.2f} с"
+                )
+                await asyncio.sleep(delay)
+        elapsed = time.monotonic() - started
+        record_latency(client.name, elapsed)
+        if elapsed > LLM_BREAKER_SLOW:
+            breaker.record_failure()
         else:
-            self.client = OpenAIProvider()
+            breaker.record_success()
+        return {**result, "provider": client.name}
+
+    async def generate(
+        self,
+        messages: List[Dict[str, str]],
+        validate: Optional[Callable[[str], bool]] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """
+        Ответ модели {"content": ..., "raw": ..., "provider": ...}; ошибки после
+        всех повторов пробрасываются. validate проверяет ответ при хеджировании
+        (по умолчанию — наличие JSON-объекта).
+        """
+        if self.fallback_client is None:
+            return await self._generate_with(self.client, messages, **kwargs)
+        return await self._generate_hedged(messages, validate or is_json_answer, **kwargs)
+
+    async def _generate_hedged(
+        self, messages: List[Dict[str, str]], validate: Callable[[str], bool], **kwargs
+    ) -> Dict[str, Any]:
+        primary, fallback = self.client, self.fallback_client
+        # Открытый автомат основного — сразу к запасному (и наоборот)
+        candidates = [c for c in (primary, fallback) if get_breaker(c.name).allow()] or [primary]
+
+        tasks: Dict["asyncio.Task[Dict[str, Any]]", LLMProvider] = {}
+
+        def launch(client: LLMProvider) -> None:
+            tasks[asyncio.ensure_future(self._generate_with(client, messages, **kwargs))] = client
+
+        launch(candidates[0])
+        # Запасной запрос отправляется не более одного раза
+        hedged = len(candidates) == 1
+        deadline = hedge_delay(candidates[0].name)
+        invalid: Optional[Dict[str, Any]] = None
+        error: Optional[BaseException] = None
+
+        def hedge(reason: str) -> None:
+            nonlocal hedged
+            hedged = True
+            logger.warning(f"LLM {candidates[0].name}: {reason}, запрос к {candidates[1].name}")
+            launch(candidates[1])
+
+        try:
+            while True:
+                pending = {task for task in tasks if not task.done()}
+                if not pending:
+                    if hedged:
+                        break
+                    hedge("ошибка или невалидный ответ")
+                    continue
+                done, _ = await asyncio.wait(
+                    pending, timeout=None if hedged else deadline, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedge(f"нет ответа за {deadline:.2f} с")
+                    continue
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    result = task.result()
+                    if validate(result["content"]):
+                        return result
+                    invalid = invalid or result
+            if invalid is not None:
+                return invalid
+            raise error if error is not None else RuntimeError("LLM: нет ответа")
+        finally:
+            for task, client in tasks.items():
+                if not task.done():
+                    task.cancel()
+                    if client is candidates[0]:
+                        # Основной провайдер, проигравший гонку хедж-запросу, считается медленным
+                        get_breaker(client.name).record_failure()
+
+    async def stream(self, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        """
+        Потоковая генерация (без хеджирования). Повтор возможен только до
+        первого фрагмента: начатый ответ не перезапускается.
+        """
+        attempt = 0
+        while True:
+            started = False
+            try:
+                async with llm_semaphore(self.provider, self.concurrency):
+                    chunks = self.client.stream(messages, **kwargs).__aiter__()
+                    while True:
+                        try:
+                            delta = await asyncio.wait_for(chunks.__anext__(), self.timeout)
+                        except StopAsyncIteration:
+                            return
+                        started = True
+                        yield delta
+            except Exception as e:
+                UPSTREAM_ERRORS.inc(self.provider)
+                if started or not (attempt < self.max_retries and self.client.is_retryable(e)):
+                    raise
+                delay = backoff_delay(attempt, self.client.retry_after(e))
+                attempt += 1
+                logger.warning(
+                    f"LLM {self.provider}: {type(e).__name__}, повтор {attempt}/{self.max_retries} через {delay:.2f} с"
+                )
+                await asyncio.sleep(delay)
+
 
-    def generate(self, messages, **kwargs):
-        return self.client.generate(messages, **kwargs)
+async def close_providers() -> None:
+    """Закрывает клиентов SDK при остановке приложения."""
+    for provider in list(_providers.values()):
+        try:
+            await provider.aclose()
+        except Exception as e:
+            logger.error(f"Ошибка при закрытии LLM-провайдера {provider.name}: {e}")
+    _providers.clear()
@@ -0,0 +1,198 @@
+# api/services/metrics.py
+
+import contextvars
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Сбор метрик (при false span и счётчики ничего не делают)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# Заголовок Server-Timing с длительностями этапов в ответах API
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() == "true"
+
+LabelValues = Tuple[str, ...]
+
+# Границы гистограмм: длительности этапов (сек) и размеры данных (байт)
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6, 1e7)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Счётчик Prometheus с метками. Потокобезопасен (метрики пишутся и из пула потоков)."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Гистограмма Prometheus с метками (кумулятивные бакеты, _sum и _count)."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = TIME_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # метки -> [счётчики по бакетам..., сумма, количество]
+        self._values: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = [0.0] * (len(self.buckets) + 2)
+                self._values[labels] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def count(self, *labels: str) -> int:
+        state = self._values.get(labels)
+        return int(state[-1]) if state else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, state in sorted(self._values.items()):
+                cumulative = 0.0
+                for bound, hits in zip(self.buckets, state):
+                    cumulative += hits
+                    le = 'le="' + _number(bound) + '"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {_number(cumulative)}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(state[-2])}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {_number(state[-1])}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "geniuso4_stage_seconds", "Длительность этапов конвейера анализа", ["stage"]
+)
+CACHE_REQUESTS = Counter(
+    "geniuso4_cache_requests_total", "Обращения к кешам: hit или miss", ["cache", "result"]
+)
+UPSTREAM_ERRORS = Counter(
+    "geniuso4_upstream_errors_total", "Ошибки внешних сервисов (биржевые данные, LLM)", ["upstream"]
+)
+PAYLOAD_BYTES = Histogram(
+    "geniuso4_payload_bytes", "Размер промптов и ответов API", ["kind"], buckets=SIZE_BUCKETS
+)
+
+REGISTRY = [STAGE_SECONDS, CACHE_REQUESTS, UPSTREAM_ERRORS, PAYLOAD_BYTES]
+
+# Длительности этапов текущего запроса для Server-Timing (None — вне запроса)
+_request_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Замеряет этап: гистограмма STAGE_SECONDS и, в запросе, Server-Timing."""
+    if not METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+
+def cache_event(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache, "hit" if hit else "miss")
+
+
+def render_metrics() -> str:
+    """Все метрики в текстовом формате Prometheus (version 0.0.4)."""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def server_timing_header(timings: List[Tuple[str, float]]) -> str:
+    """Server-Timing: одинаковые этапы (например, повторные) суммируются."""
+    totals: Dict[str, float] = {}
+    for stage, seconds in timings:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in totals.items())
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI-middleware: собирает span-ы запроса и добавляет заголовок Server-Timing.
+    Для потоковых ответов в заголовок попадают этапы до начала ответа.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (SERVER_TIMING and METRICS_ENABLED):
+            await self.app(scope, receive, send)
+            return
+
+        timings: List[Tuple[str, float]] = []
+        token = _request_timings.set(timings)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and timings:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing_header(timings).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
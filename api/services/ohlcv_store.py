@@ -0,0 +1,96 @@
+# api/services/ohlcv_store.py
+
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List
+
+from config.config import logger
+
+# Поля свечи в формате ответа CryptoCompare
+CANDLE_FIELDS = [
+    "time", "high", "low", "open", "volumefrom", "volumeto", "close",
+    "conversionType", "conversionSymbol",
+]
+
+# Версия данных хранилища (PRAGMA user_version) и миграции до неё:
+# 2 — под интервалом 4h раньше сохранялись часовые свечи (aggregate=1), они удаляются
+STORE_VERSION = 2
+MIGRATIONS = {
+    2: "DELETE FROM candles WHERE interval = '4h'",
+}
+
+
+class OHLCVStore:
+    """
+    Локальное хранилище закрытых свечей на SQLite.
+    Ключ — (base, quote, interval); внутри ключа свечи уникальны по time.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS candles (
+                base TEXT NOT NULL,
+                quote TEXT NOT NULL,
+                interval TEXT NOT NULL,
+                time INTEGER NOT NULL,
+                high REAL, low REAL, open REAL,
+                volumefrom REAL, volumeto REAL, close REAL,
+                conversionType TEXT, conversionSymbol TEXT,
+                PRIMARY KEY (base, quote, interval, time)
+            ) WITHOUT ROWID
+            """
+        )
+        self._migrate()
+        self._conn.commit()
+
+    def _migrate(self) -> None:
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        for target in range(version + 1, STORE_VERSION + 1):
+            statement = MIGRATIONS.get(target)
+            if statement:
+                removed = self._conn.execute(statement).rowcount
+                logger.info(f"Хранилище свечей: миграция до версии {target}, удалено {removed} записей")
+        if version < STORE_VERSION:
+            self._conn.execute(f"PRAGMA user_version = {STORE_VERSION}")
+
+    def load(self, base: str, quote: str, interval: str, since: int) -> List[Dict[str, Any]]:
+        """Возвращает сохранённые свечи с time >= since в порядке возрастания."""
+        with self._lock:
+            cur = self._conn.execute(
+                f"SELECT {', '.join(CANDLE_FIELDS)} FROM candles "
+                "WHERE base = ? AND quote = ? AND interval = ? AND time >= ? ORDER BY time",
+                (base, quote, interval, since),
+            )
+            rows = cur.fetchall()
+        return [dict(zip(CANDLE_FIELDS, row)) for row in rows]
+
+    def save(self, base: str, quote: str, interval: str, candles: Iterable[Dict[str, Any]]) -> int:
+        """Сохраняет (или перезаписывает) свечи. Возвращает число записей."""
+        rows = [
+            (base, quote, interval) + tuple(c.get(field) for field in CANDLE_FIELDS)
+            for c in candles
+        ]
+        if not rows:
+            return 0
+        placeholders = ", ".join("?" * (len(CANDLE_FIELDS) + 3))
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO candles (base, quote, interval, {', '.join(CANDLE_FIELDS)}) "
+                f"VALUES ({placeholders})",
+                rows,
+            )
+            self._conn.commit()
+        logger.debug(f"Сохранено {len(rows)} свечей {base}/{quote} {interval}")
+        return len(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
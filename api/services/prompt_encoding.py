@@ -0,0 +1,98 @@
+# api/services/prompt_encoding.py
+
+import json
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from services.data_processor import ROUNDING_RULES, iso_strings
+
+
+def _strip_zeros(cell: str) -> str:
+    cell = cell.rstrip('0').rstrip('.')
+    return '0' if cell in ('-0', '') else cell
+
+
+def _format_numeric(values: np.ndarray, rule: Optional[Union[int, str]]) -> List[str]:
+    """
+    Форматирует числовой столбец в JSON-литералы с точностью из ROUNDING_RULES.
+    NaN и ±inf заменяются на null одной векторной маской.
+    """
+    values = values.astype(np.float64, copy=False)
+    finite = np.isfinite(values)
+    if rule == 'int' or rule == 0:
+        # + 0.0 убирает '-0' после округления малых отрицательных значений
+        cells = ['%d' % v for v in (np.round(np.where(finite, values, 0.0)) + 0.0).tolist()]
+    elif isinstance(rule, int):
+        fmt = f'%.{rule}f'
+        cells = [_strip_zeros(fmt % v) for v in np.round(np.where(finite, values, 0.0), rule).tolist()]
+    else:
+        # Без округления: кратчайшее точное представление, целые без '.0'
+        cells = [
+            '%d' % v if v.is_integer() and abs(v) < 1e15 else repr(v)
+            for v in np.where(finite, values, 0.0).tolist()
+        ]
+    if not finite.all():
+        for i in np.flatnonzero(~finite).tolist():
+            cells[i] = 'null'
+    return cells
+
+
+def _format_column(series: pd.Series) -> List[str]:
+    """Возвращает JSON-литералы значений одного столбца."""
+    if pd.api.types.is_bool_dtype(series):
+        return ['true' if v else 'false' for v in series.tolist()]
+    if pd.api.types.is_numeric_dtype(series):
+        return _format_numeric(series.to_numpy(), ROUNDING_RULES.get(series.name))
+    if pd.api.types.is_datetime64_any_dtype(series):
+        valid = series.notna().tolist()
+        return [f'"{v}"' if ok else 'null' for v, ok in zip(iso_strings(series).tolist(), valid)]
+    return [
+        'null' if v is None or (isinstance(v, float) and not np.isfinite(v))
+        else json.dumps(v, ensure_ascii=False, default=str)
+        for v in series.tolist()
+    ]
+
+
+OHLCInput = Union[pd.DataFrame, List[Dict[str, Any]], Dict[str, Any]]
+
+
+def to_frame(ohlc: OHLCInput) -> pd.DataFrame:
+    """Свечи в любом из форматов: DataFrame, список словарей или {"columns", "data"}."""
+    if isinstance(ohlc, pd.DataFrame):
+        return ohlc
+    if isinstance(ohlc, dict):
+        return pd.DataFrame(ohlc.get("data", {}), columns=ohlc.get("columns"))
+    return pd.DataFrame.from_records(ohlc)
+
+
+def encode_ohlc_compact(ohlc: OHLCInput) -> str:
+    """
+    Компактное представление свечей для промпта:
+    {"columns": [...], "rows": [[...], ...]} — имена полей один раз,
+    далее по одной строке на свечу. Результат остаётся валидным JSON.
+    """
+    df = to_frame(ohlc)
+    if df.empty:
+        return '{"columns": [], "rows": []}'
+
+    df = df.infer_objects()
+    columns = [_format_column(df[col]) for col in df.columns]
+    header = json.dumps([str(c) for c in df.columns], ensure_ascii=False)
+    rows = ",\n".join("[" + ",".join(cells) + "]" for cells in zip(*columns))
+    return '{"columns": ' + header + ', "rows": [\n' + rows + '\n]}'
+
+
+def encode_ohlc_records(ohlc: OHLCInput) -> str:
+    """Прежний формат: список словарей (имена полей повторяются в каждой свече)."""
+    df = to_frame(ohlc).copy()
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = iso_strings(df[col])
+    if df.empty:
+        return "[]"
+    numeric = df.select_dtypes(include=[np.number]).columns
+    df[numeric] = df[numeric].where(np.isfinite(df[numeric]))
+    safe = df.astype(object).where(pd.notnull(df), None).to_dict(orient='records')
+    return json.dumps(safe, ensure_ascii=False, allow_nan=False, default=str)
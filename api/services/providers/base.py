@@ -1,15 +1,65 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+
+def status_code(exc: BaseException) -> Optional[int]:
+    """HTTP-статус ошибки SDK: status_code (openai), code (google), response.status_code (httpx)."""
+    for value in (
+        getattr(exc, "status_code", None),
+        getattr(getattr(exc, "response", None), "status_code", None),
+        getattr(exc, "code", None),
+    ):
+        if isinstance(value, int):
+            return value
+    return None
+
 
 class LLMProvider(ABC):
+    """
+    Асинхронный провайдер LLM. Клиент SDK создаётся один раз в __init__
+    и переиспользуется всеми запросами.
+    """
+
+    name = "base"
+    model = ""
+
     @abstractmethod
-    def generate(
+    async def generate(
         self,
         messages: List[Dict[str, str]],
         **kwargs
     ) -> Dict[str, Any]:
         """
         messages: список {"role": ..., "content": ...}
-        Возвращает dict с ключом "content".
+        Возвращает dict с ключом "content" (и "raw" — исходный ответ SDK, если есть).
         """
         pass
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Потоковая генерация. По умолчанию весь ответ отдаётся одним фрагментом."""
+        result = await self.generate(messages, **kwargs)
+        yield result["content"]
+
+    def is_retryable(self, exc: BaseException) -> bool:
+        """Имеет ли смысл повторить запрос: лимиты (429), таймауты, сетевые ошибки и 5xx."""
+        if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+            return True
+        status = status_code(exc)
+        return status == 429 or (status is not None and status >= 500)
+
+    def retry_after(self, exc: BaseException) -> Optional[float]:
+        """Пауза из заголовка Retry-After, если провайдер её прислал."""
+        headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+        try:
+            value = headers.get("retry-after")
+            return float(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    async def aclose(self) -> None:
+        """Закрывает клиент SDK (соединения пула)."""
@@ -1,24 +1,37 @@
 import os
 from google.cloud import aiplatform
+from google.cloud.aiplatform_v1.services.prediction_service import PredictionServiceAsyncClient
 from .base import LLMProvider
 
 class GoogleVertexAIProvider(LLMProvider):
-    def __init__(self):
+    name = "google"
+
+    def __init__(self, timeout=None):
+        location = os.getenv("GCP_REGION")
         aiplatform.init(
             project=os.getenv("GCP_PROJECT_ID"),
-            location=os.getenv("GCP_REGION")
+            location=location
         )
         self.endpoint = os.getenv("GOOGLE_AI_ENDPOINT")
+        self.model = self.endpoint or ""
+        self.timeout = timeout
+        # Один долгоживущий клиент вместо нового PredictionServiceClient на каждый вызов
+        client_options = {"api_endpoint": f"{location}-aiplatform.googleapis.com"} if location else None
+        self.client = PredictionServiceAsyncClient(client_options=client_options)
 
-    def generate(self, messages, **kwargs):
-        client = aiplatform.gapic.PredictionServiceClient()
+    async def generate(self, messages, **kwargs):
         # Берём последний user-сообщение
         instance = {"content": messages[-1]["content"]}
-        response = client.predict(
+        response = await self.client.predict(
             endpoint=self.endpoint,
             instances=[instance],
-            parameters={}
+            parameters={},
+            timeout=self.timeout,
         )
         return {
-            "content": response.predictions[0].get("content", "")
+            "content": response.predictions[0].get("content", ""),
+            "raw": response,
         }
+
+    async def aclose(self):
+        await self.client.transport.close()
@@ -1,18 +1,36 @@
 import os
-from huggingface_hub import InferenceClient
+from huggingface_hub import AsyncInferenceClient
 from .base import LLMProvider
 
 class HuggingFaceProvider(LLMProvider):
-    def __init__(self):
-        self.client = InferenceClient(api_key=os.getenv("HF_API_KEY"))
+    name = "huggingface"
+
+    def __init__(self, timeout=None):
+        self.client = AsyncInferenceClient(api_key=os.getenv("HF_API_KEY"), timeout=timeout)
         self.model = os.getenv("HF_MODEL", "gpt2")
 
-    def generate(self, messages, **kwargs):
-        resp = self.client.chat.completions.create(
+    async def generate(self, messages, **kwargs):
+        resp = await self.client.chat.completions.create(
             model=self.model,
             messages=messages,
             **kwargs
         )
         return {
-            "content": resp.choices[0].message
+            "content": (resp.choices[0].message.content or "").strip(),
+            "raw": resp,
         }
+
+    async def stream(self, messages, **kwargs):
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True,
+            **kwargs
+        )
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+    async def aclose(self):
+        await self.client.close()
@@ -1,18 +1,46 @@
 import os
-from openai import OpenAI
+from openai import APIConnectionError, APITimeoutError, AsyncOpenAI
 from .base import LLMProvider
 
 class OpenAIProvider(LLMProvider):
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    name = "openai"
+
+    def __init__(self, timeout=None):
+        # Повторы выполняет LLMService, поэтому встроенные повторы SDK отключены
+        self.client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            timeout=timeout,
+            max_retries=0,
+        )
         self.model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
-    def generate(self, messages, **kwargs):
-        resp = self.client.chat.completions.create(
+    async def generate(self, messages, **kwargs):
+        resp = await self.client.chat.completions.create(
             model=self.model,
             messages=messages,
             **kwargs
         )
         return {
-            "content": resp.choices[0].message.content.strip()
+            "content": resp.choices[0].message.content.strip(),
+            "raw": resp,
         }
+
+    async def stream(self, messages, **kwargs):
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True,
+            **kwargs
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+    def is_retryable(self, exc):
+        return isinstance(exc, (APIConnectionError, APITimeoutError)) or super().is_retryable(exc)
+
+    async def aclose(self):
+        await self.client.close()
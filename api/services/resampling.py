@@ -0,0 +1,100 @@
+# api/services/resampling.py
+
+import asyncio
+import os
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from config.config import logger
+from services.crypto_compare_provider import fetch_ohlcv
+from services.llm_cache import INTERVAL_SECONDS
+
+# Сколько базовых свечей можно загрузить для построения старших таймфреймов
+# (больше — старший таймфрейм загружается отдельным запросом)
+MTF_MAX_BASE_CANDLES = int(os.getenv("MTF_MAX_BASE_CANDLES", "2000"))
+
+
+def can_resample(base_interval: str, target_interval: str) -> bool:
+    base, target = INTERVAL_SECONDS[base_interval], INTERVAL_SECONDS[target_interval]
+    return target >= base and target % base == 0
+
+
+def resample_ohlcv(df: pd.DataFrame, base_interval: str, target_interval: str) -> pd.DataFrame:
+    """
+    Строит свечи target_interval из свечей base_interval.
+    Границы — по UTC, кратно длительности интервала (как у бирж и в
+    ttl_until_candle_close): Open — первая, High — максимум, Low — минимум,
+    Close — последняя, объёмы суммируются. Неполная первая свеча отбрасывается,
+    неполная последняя остаётся — это формирующаяся свеча.
+    """
+    if not can_resample(base_interval, target_interval):
+        raise ValueError(f"Нельзя построить {target_interval} из {base_interval}")
+    if base_interval == target_interval or df.empty:
+        return df
+
+    base_step = INTERVAL_SECONDS[base_interval]
+    step = INTERVAL_SECONDS[target_interval]
+    ratio = step // base_step
+    seconds = df["Open Time"].to_numpy(dtype="datetime64[s]").astype(np.int64)
+    buckets = seconds - seconds % step
+    # Свечи отсортированы по времени: начала групп — места смены корзины
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)]
+    if ends[0] - starts[0] < ratio and len(starts) > 1:
+        starts, ends = starts[1:], ends[1:]
+
+    def column(name: str) -> np.ndarray:
+        return df[name].to_numpy(dtype=np.float64)
+
+    open_time = pd.to_datetime(buckets[starts], unit="s")
+    result = pd.DataFrame({
+        "Open Time": open_time,
+        "Close Time": open_time + pd.to_timedelta(step, unit="s"),
+        "Open": column("Open")[starts],
+        "High": np.maximum.reduceat(column("High"), starts),
+        "Low": np.minimum.reduceat(column("Low"), starts),
+        "Close": column("Close")[ends - 1],
+    })
+    for name in ("Volume", "Quote Asset Volume"):
+        if name in df.columns:
+            result[name] = np.add.reduceat(column(name), starts)
+    result.attrs = dict(df.attrs)
+    result.attrs["interval"] = target_interval
+    return result
+
+
+async def fetch_timeframes(symbol: str, intervals: List[str], candles: int) -> Dict[str, pd.DataFrame]:
+    """
+    Свечи для нескольких таймфреймов (по candles свечей на каждый).
+    Загружается только самый мелкий интервал, старшие строятся из него
+    resample_ohlcv; таймфрейм, которому нужно больше MTF_MAX_BASE_CANDLES
+    базовых свечей, загружается отдельно.
+    """
+    intervals = list(dict.fromkeys(intervals))
+    base = min(intervals, key=lambda interval: INTERVAL_SECONDS[interval])
+    derived, direct = [], []
+    for interval in intervals:
+        ratio = INTERVAL_SECONDS[interval] // INTERVAL_SECONDS[base]
+        # +1 старшая свеча на выравнивание начала по границе
+        if can_resample(base, interval) and (candles + 1) * ratio <= MTF_MAX_BASE_CANDLES:
+            derived.append(interval)
+        else:
+            direct.append(interval)
+    base_limit = max(
+        ((candles + 1) * (INTERVAL_SECONDS[interval] // INTERVAL_SECONDS[base]) for interval in derived),
+        default=0,
+    )
+
+    frames = await asyncio.gather(
+        *(fetch_ohlcv(symbol, interval, candles) for interval in direct),
+        *([fetch_ohlcv(symbol, base, base_limit)] if derived else []),
+    )
+    result = dict(zip(direct, frames))
+    for interval in derived:
+        df = resample_ohlcv(frames[-1], base, interval)
+        result[interval] = df.iloc[-(candles + 1):].reset_index(drop=True) if len(df) > candles + 1 else df
+    if direct:
+        logger.info(f"Таймфреймы {direct} загружены отдельно (нужно больше {MTF_MAX_BASE_CANDLES} свечей {base})")
+    return {interval: result[interval] for interval in intervals}
@@ -0,0 +1,173 @@
+# api/services/screener.py
+
+import asyncio
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.config import logger
+from services.concurrency import get_process_pool, run_cpu_bound
+from services.crypto_compare_provider import fetch_ohlcv
+from services.candle_frame import CandleFrame
+from services.data_processor import DataProcessor
+from services.indicator_registry import required_warmup
+from services.statistical_analysis import StatisticalAnalyzer
+
+# Одновременных загрузок свечей на один запрос скринера
+SCREEN_FETCH_CONCURRENCY = int(os.getenv("SCREEN_FETCH_CONCURRENCY", "16"))
+# Таймаут загрузки одной пары, сек: медленный символ не задерживает весь ответ
+SCREEN_FETCH_TIMEOUT = float(os.getenv("SCREEN_FETCH_TIMEOUT", "15"))
+# Максимум пар (символ x интервал) в одном запросе
+SCREEN_MAX_PAIRS = int(os.getenv("SCREEN_MAX_PAIRS", "500"))
+# Максимум свечей на пару (limit) в запросе скринера
+SCREEN_MAX_LIMIT = int(os.getenv("SCREEN_MAX_LIMIT", "1000"))
+
+# Индикаторы, нужные для сводки сигналов
+SCREEN_INDICATORS = ["RSI", "MACD", "MA_50", "MA_200", "ADX"]
+
+# Направление свечных паттернов: 1 — бычий, -1 — медвежий, 0 — нейтральный
+PATTERN_BIAS = {
+    'Doji': 0,
+    'Hammer': 1,
+    'Shooting Star': -1,
+    'Bullish Engulfing': 1,
+    'Bearish Engulfing': -1,
+    'Morning Star': 1,
+    'Three White Soldiers': 1,
+}
+
+DIVERGENCE_WEIGHTS = {
+    'bullish_divergence': 2.0,
+    'bearish_divergence': -2.0,
+    'hidden_bullish_divergence': 1.0,
+    'hidden_bearish_divergence': -1.0,
+}
+
+
+def _last(df: pd.DataFrame, column: str) -> Optional[float]:
+    if column not in df.columns or df.empty:
+        return None
+    value = float(df[column].iat[-1])
+    return round(value, 4) if np.isfinite(value) else None
+
+
+def _trend(close: Optional[float], ma_50: Optional[float], ma_200: Optional[float]) -> str:
+    if close is None or ma_50 is None:
+        return "flat"
+    if close > ma_50 and (ma_200 is None or ma_50 > ma_200):
+        return "up"
+    if close < ma_50 and (ma_200 is None or ma_50 < ma_200):
+        return "down"
+    return "flat"
+
+
+def screen_candles(
+    df: pd.DataFrame,
+    symbol: str,
+    interval: str,
+    lookback: int = 5,
+    indicators: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Синхронный расчёт сводки по одной паре: индикаторы, свечные паттерны
+    и дивергенции за последние lookback свечей, итоговая оценка.
+    Функция верхнего уровня, чтобы её можно было выполнять в пуле процессов.
+    """
+    # Состояние инкрементального движка в процессах пула не переиспользуется между сканами
+    processor = DataProcessor(df, indicators=indicators or SCREEN_INDICATORS, incremental=False)
+    df_ind = processor.perform_full_processing(drop_na=False)
+    times = set(df_ind.tail(lookback)['Open Time'].astype(str))
+    patterns = [p['type'] for p in processor.candlestick_patterns if p['date'] in times]
+    analyzer = StatisticalAnalyzer(CandleFrame.from_pandas(df_ind))
+    divergences = [
+        f"{d['indicator']}:{d['type']}"
+        for d in analyzer.find_divergences_multi(["RSI", "MACD"], hidden=True)
+        if d['date'] in times
+    ]
+
+    close = _last(df_ind, 'Close')
+    rsi = _last(df_ind, 'RSI')
+    macd_hist = _last(df_ind, 'MACD_hist')
+    trend = _trend(close, _last(df_ind, 'MA_50'), _last(df_ind, 'MA_200'))
+    change = None
+    if close is not None and len(df_ind) > lookback:
+        previous = float(df_ind['Close'].iat[-lookback - 1])
+        if previous:
+            change = round((close / previous - 1) * 100, 2)
+
+    # Оценка: сумма сигналов, знак — направление
+    score = float(sum(PATTERN_BIAS.get(p, 0) for p in patterns))
+    score += sum(DIVERGENCE_WEIGHTS[d.split(':', 1)[1]] for d in divergences)
+    if rsi is not None:
+        score += 1.0 if rsi < 30 else -1.0 if rsi > 70 else 0.0
+    if macd_hist is not None and macd_hist != 0:
+        score += 0.5 if macd_hist > 0 else -0.5
+    score += {"up": 1.0, "down": -1.0}.get(trend, 0.0)
+
+    return {
+        "symbol": symbol,
+        "interval": interval,
+        "close": close,
+        "change_pct": change,
+        "rsi": rsi,
+        "macd_hist": macd_hist,
+        "adx": _last(df_ind, 'ADX'),
+        "trend": trend,
+        "patterns": patterns,
+        "divergences": divergences,
+        "score": score,
+        "bias": "bullish" if score > 0 else "bearish" if score < 0 else "neutral",
+    }
+
+
+async def _compute(df: pd.DataFrame, symbol: str, interval: str, lookback: int,
+                   indicators: Optional[List[str]]) -> Dict[str, Any]:
+    """Расчёт в пуле процессов, если он включён, иначе в пуле потоков."""
+    pool = get_process_pool()
+    if pool is None:
+        return await run_cpu_bound(screen_candles, df, symbol, interval, lookback, indicators)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, screen_candles, df, symbol, interval, lookback, indicators)
+
+
+async def screen(
+    symbols: List[str],
+    intervals: List[str],
+    limit: int = 200,
+    lookback: int = 5,
+    indicators: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Скрининг всех пар символ x интервал без обращения к LLM.
+    Загрузка ограничена семафором и таймаутом на пару; расчёт пары
+    начинается сразу после её загрузки, не дожидаясь остальных.
+    Возвращает {"results": [...по убыванию |score|], "errors": [...]}.
+    """
+    semaphore = asyncio.Semaphore(SCREEN_FETCH_CONCURRENCY)
+    fetch_limit = limit + required_warmup(indicators or SCREEN_INDICATORS)
+
+    async def one(symbol: str, interval: str) -> Dict[str, Any]:
+        try:
+            async with semaphore:
+                df = await asyncio.wait_for(
+                    fetch_ohlcv(symbol, interval, fetch_limit), SCREEN_FETCH_TIMEOUT
+                )
+            if df.empty:
+                return {"symbol": symbol, "interval": interval, "error": "no data"}
+            return await _compute(df, symbol, interval, lookback, indicators)
+        except asyncio.TimeoutError:
+            logger.warning(f"Скринер: таймаут загрузки {symbol} {interval}")
+            return {"symbol": symbol, "interval": interval, "error": "timeout"}
+        except Exception as e:
+            logger.error(f"Скринер: ошибка для {symbol} {interval}: {e}")
+            return {"symbol": symbol, "interval": interval, "error": str(e)}
+
+    pairs = [(symbol, interval) for symbol in symbols for interval in intervals]
+    summaries = await asyncio.gather(*(one(symbol, interval) for symbol, interval in pairs))
+
+    results = [s for s in summaries if "error" not in s]
+    errors = [s for s in summaries if "error" in s]
+    results.sort(key=lambda s: (-abs(s["score"]), s["symbol"], s["interval"]))
+    return {"results": results, "errors": errors}
@@ -0,0 +1,64 @@
+# api/services/serialization.py
+
+import json
+from typing import Any
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+from services.metrics import PAYLOAD_BYTES, span
+
+try:
+    import orjson
+except ImportError:  # orjson не установлен — используем стандартный json
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Типы, которые не кодируются напрямую: Timestamp, numpy-скаляры и массивы."""
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Быстрая сериализация в JSON (bytes). С orjson numpy-массивы кодируются
+    без промежуточных списков, NaN/inf превращаются в null.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return _dumps_stdlib(obj).encode('utf-8')
+
+
+def _dumps_stdlib(obj: Any) -> str:
+    def _clean(value):
+        if isinstance(value, float) and not np.isfinite(value):
+            return None
+        if isinstance(value, np.ndarray):
+            return _clean(value.tolist())
+        if isinstance(value, dict):
+            return {k: _clean(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [_clean(v) for v in value]
+        return value
+
+    return json.dumps(_clean(obj), ensure_ascii=False, allow_nan=False, default=_default,
+                      separators=(',', ':'))
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON-ответ без валидации pydantic и jsonable_encoder: контент
+    кодируется один раз через dumps.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with span("serialization"):
+            body = dumps(content)
+        PAYLOAD_BYTES.observe(len(body), "response")
+        return body
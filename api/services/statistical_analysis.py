@@ -2,14 +2,21 @@
 
 import json
 import pandas as pd
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Sequence, Union
 from config.config import logger
-from statsmodels.tsa.seasonal import seasonal_decompose
-from scipy.stats import shapiro
-from scipy.signal import argrelextrema
 import math
 import numpy as np
 
+# scipy и statsmodels импортируются внутри методов: вместе это около секунды
+# при старте API, а нужны они только при анализе
+from services.candle_frame import CandleFrame
+from services.concurrency import PROCESS_WORKERS, get_process_pool
+
+# Лаги автокорреляции и столбцы пакетного анализа по умолчанию
+DEFAULT_LAGS = (1, 2, 5, 10)
+DEFAULT_BATCH_COLUMNS = ["RSI", "MACD", "OBV"]
+
+
 def round_dict_values(data, decimals=2):
     """
     Вспомогательная функция для рекурсивного округления всех числовых значений в словаре или списке.
@@ -41,12 +48,26 @@ class StatisticalAnalyzer:
     5. Расчет пивотных точек.
     6. Подготовка данных для JSON анализа.
     Атрибуты:
-        df (pd.DataFrame): Исходные данные для анализа.
+        frame (CandleFrame): Столбцы данных для анализа (массивы numpy).
+        df (pd.DataFrame): Те же данные в pandas, создаётся при первом обращении.
     """
 
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: Union[pd.DataFrame, CandleFrame]):
         self.df = df
 
+    @property
+    def df(self) -> pd.DataFrame:
+        if self._df is None:
+            self._df = self.frame.to_pandas()
+        return self._df
+
+    @df.setter
+    def df(self, df: Union[pd.DataFrame, CandleFrame]) -> None:
+        if isinstance(df, CandleFrame):
+            self.frame, self._df = df, None
+        else:
+            self.frame, self._df = CandleFrame.from_pandas(df), df
+
     def perform_full_analysis(self) -> Dict[str, Any]:
         """
         Выполняет полный статистический анализ данных.
@@ -57,7 +78,7 @@ class StatisticalAnalyzer:
         - Последовательный вызов методов для расчета различных статистических показателей.
         - Подготовка дополнительных данных для передачи в промпт.
         """
-        if self.df.empty:
+        if self.frame.empty:
             logger.warning("DataFrame пустой. Пропуск статистического анализа.")
             return {}
 
@@ -81,9 +102,21 @@ class StatisticalAnalyzer:
             dict: Корреляционная матрица в виде словаря.
         """
         try:
-            correlations = self.df.corr().round(2)
+            # Даты участвуют как числа, как в DataFrame.corr()
+            names = self.frame.numeric_columns(include_times=True)
+            values = self.frame.matrix(names)
+            if np.isnan(values).any():
+                # Попарное исключение пропусков — как в pandas
+                matrix = pd.DataFrame(values, columns=names).corr().to_numpy()
+            else:
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    matrix = np.corrcoef(values, rowvar=False).reshape(len(names), len(names))
+            matrix = np.round(matrix, 2)
             logger.info("Матрица корреляций успешно рассчитана.")
-            return correlations.to_dict()
+            return {
+                column: {row: float(matrix[i, j]) for i, row in enumerate(names)}
+                for j, column in enumerate(names)
+            }
         except Exception as e:
             logger.error(f"Ошибка при расчёте матрицы корреляций: {e}")
             return {}
@@ -97,14 +130,17 @@ class StatisticalAnalyzer:
         normality_results = {}
         try:
             for column in ["RSI", "MACD", "OBV"]:
-                if column not in self.df.columns:
+                if column not in self.frame:
                     logger.warning(f"Столбец {column} отсутствует в данных для теста на нормальность.")
                     continue
-                data = self.df[column].dropna()
+                data = self.frame.floats(column)
+                data = data[~np.isnan(data)]
                 if len(data) < 3:
                     logger.warning(f"Недостаточно данных для выполнения теста нормальности на столбце {column}.")
                     normality_results[column] = "Недостаточно данных для теста."
                     continue
+                from scipy.stats import shapiro
+
                 stat, p = shapiro(data)
                 # Округляем значения до 2 знаков после запятой
                 stat = round(stat, 2)
@@ -112,7 +148,7 @@ class StatisticalAnalyzer:
                 normality_results[column] = {
                     "Shapiro-Wilk": {"Statistic": stat, "p-value": p}
                 }
-                logger.info(f"Тест нормальности для '{column}': Статистика={stat}, p-значение={p}")
+                logger.debug(f"Тест нормальности для '{column}': Статистика={stat}, p-значение={p}")
             return normality_results
         except Exception as e:
             logger.error(f"Ошибка при выполнении тестов на нормальность: {e}")
@@ -127,17 +163,17 @@ class StatisticalAnalyzer:
         autocorr_results = {}
         try:
             for column in ["RSI", "MACD", "OBV"]:
-                if column not in self.df.columns:
+                if column not in self.frame:
                     logger.warning(f"Столбец {column} отсутствует в данных для автокорреляции.")
                     continue
-                autocorr = self.df[column].autocorr(lag=1)
+                autocorr = float(batch_autocorrelations(self.frame.floats(column)[:, None], [1])[0, 0])
                 # Округляем значение до 2 знаков после запятой
                 if math.isnan(autocorr):
                     autocorr = None
                 else:
                     autocorr = round(autocorr, 2)
                 autocorr_results[column] = autocorr
-                logger.info(f"Автокорреляция для '{column}' с лагом 1: {autocorr}")
+                logger.debug(f"Автокорреляция для '{column}' с лагом 1: {autocorr}")
             return autocorr_results
         except Exception as e:
             logger.error(f"Ошибка при расчёте автокорреляции: {e}")
@@ -152,21 +188,24 @@ class StatisticalAnalyzer:
         decomposition_results = {}
         try:
             for column in ["RSI", "MACD", "OBV"]:
-                if column not in self.df.columns:
+                if column not in self.frame:
                     logger.warning(f"Столбец {column} отсутствует в данных для разложения временного ряда.")
                     continue
-                data = self.df[column].dropna()
+                data = self.frame.floats(column)
+                data = data[~np.isnan(data)]
                 if len(data) < 30:  # Минимальное количество данных для разложения
                     logger.warning(f"Недостаточно данных для разложения временного ряда на столбце {column}.")
                     decomposition_results[column] = "Недостаточно данных для разложения."
                     continue
+                from statsmodels.tsa.seasonal import seasonal_decompose
+
                 decomposition = seasonal_decompose(data, model="additive", period=30, extrapolate_trend='freq')
                 decomposition_results[column] = {
-                    "trend": decomposition.trend.dropna().tolist(),
-                    "seasonal": decomposition.seasonal.dropna().tolist(),
-                    "resid": decomposition.resid.dropna().tolist(),
+                    "trend": _dropna(decomposition.trend).tolist(),
+                    "seasonal": _dropna(decomposition.seasonal).tolist(),
+                    "resid": _dropna(decomposition.resid).tolist(),
                 }
-                logger.info(f"Разложение временного ряда для '{column}' выполнено успешно.")
+                logger.debug(f"Разложение временного ряда для '{column}' выполнено успешно.")
             # Округляем все числовые значения
             decomposition_results = round_dict_values(decomposition_results)
             return decomposition_results
@@ -174,6 +213,21 @@ class StatisticalAnalyzer:
             logger.error(f"Ошибка при разложении временного ряда: {e}")
             return {}
 
+    def batch_analysis(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        lags: Sequence[int] = DEFAULT_LAGS,
+        period: int = 30,
+        include_series: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Пакетный анализ произвольного набора столбцов матричными операциями:
+        автокорреляции на нескольких лагах, моменты распределения с тестом
+        Харке-Бера и одно разложение временного ряда на все столбцы сразу.
+        См. batch_statistics.
+        """
+        return batch_statistics(self.frame, columns, lags, period, include_series)
+
     def calculate_pivot_points(self) -> Dict[str, Any]:
         """
         Рассчитывает пивотные точки на основе предыдущего периода.
@@ -181,13 +235,13 @@ class StatisticalAnalyzer:
             dict: Пивотные точки (Pivot Point, Support Levels, Resistance Levels).
         """
         try:
-            if len(self.df) < 2:
+            if len(self.frame) < 2:
                 logger.error("Недостаточно данных для расчёта пивотных точек.")
                 return {}
             # Рассчитаем пивотные точки на основе предыдущего периода
-            high = self.df['High'].iloc[-2]
-            low = self.df['Low'].iloc[-2]
-            close = self.df['Close'].iloc[-2]
+            high = self.frame['High'][-2]
+            low = self.frame['Low'][-2]
+            close = self.frame['Close'][-2]
 
             pivot_point = (high + low + close) / 3
             r1 = (2 * pivot_point) - low
@@ -213,14 +267,11 @@ class StatisticalAnalyzer:
         """
         Получает значения скользящих средних.
         """
-        if self.df.empty:
+        if self.frame.empty:
             return {}
-        latest = self.df.iloc[-1]
         moving_averages = {
-            "MA_50": latest.get("MA_50"),
-            "MA_200": latest.get("MA_200"),
-            "MA_20": latest.get("MA_20"),
-            "MA_100": latest.get("MA_100")
+            name: self.frame[name][-1].item() if name in self.frame else None
+            for name in ("MA_50", "MA_200", "MA_20", "MA_100")
             # Добавьте другие скользящие средние по необходимости
         }
         return moving_averages
@@ -231,8 +282,8 @@ class StatisticalAnalyzer:
         Параметры:
             max_points (int): Максимальное количество точек данных для включения.
         """
-        # Выбираем все столбцы, включая индикаторы
-        ohlc_data = self.df.tail(max_points).copy()
+        # Выбираем все столбцы, включая индикаторы; pandas — только для последних свечей
+        ohlc_data = self.frame.tail(max_points).to_pandas()
 
         # Преобразуем все столбцы с датами и временем в строки
         datetime_cols = ohlc_data.select_dtypes(include=['datetime64[ns]', 'datetime64[ns, UTC]']).columns
@@ -261,59 +312,357 @@ class StatisticalAnalyzer:
         except Exception as e:
             logger.error(f"Ошибка при сохранении статистического анализа в файл: {e}")
 
-    def find_divergences(self, oscillator: str = "RSI", window: int = 5) -> List[Dict[str, Any]]:
+    def find_divergences(
+        self,
+        oscillator: str = "RSI",
+        window: int = 5,
+        tolerance: int = 0,
+        hidden: bool = False,
+    ) -> List[Dict[str, Any]]:
         """Ищет дивергенции между ценой и заданным осциллятором.
 
         Параметры:
             oscillator: Название столбца с осциллятором ("RSI" или "MACD").
             window: Размер окна для поиска локальных экстремумов.
+            tolerance: Допустимое смещение экстремума осциллятора (±бар) от экстремума цены.
+            hidden: Искать также скрытые дивергенции.
 
         Возвращает:
             Список словарей с найденными дивергенциями.
         """
-        if oscillator not in self.df.columns:
-            logger.warning(f"Осциллятор {oscillator} отсутствует в данных")
+        return self.find_divergences_multi([oscillator], window, tolerance, hidden)
+
+    def find_divergences_multi(
+        self,
+        oscillators: List[str],
+        window: int = 5,
+        tolerance: int = 0,
+        hidden: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Ищет дивергенции сразу для нескольких осцилляторов за один проход.
+
+        Экстремумы цены находятся один раз, экстремумы всех осцилляторов —
+        одним вызовом argrelextrema по матрице столбцов. Пары соседних
+        экстремумов цены сравниваются векторно, без циклов по свечам.
+
+        Типы: bullish_divergence (цена ниже, осциллятор выше на минимумах),
+        bearish_divergence (цена выше, осциллятор ниже на максимумах),
+        при hidden=True — hidden_bullish_divergence и hidden_bearish_divergence.
+        Порядок результата: по осцилляторам, внутри — по типу, затем по времени.
+        """
+        present = []
+        for oscillator in oscillators:
+            if oscillator not in self.frame:
+                logger.warning(f"Осциллятор {oscillator} отсутствует в данных")
+            else:
+                present.append(oscillator)
+        if not present:
             return []
 
-        if len(self.df) < window * 2:
+        if len(self.frame) < window * 2:
             logger.warning("Недостаточно данных для поиска дивергенций")
             return []
 
         divergences = []
         try:
-            close = self.df["Close"]
-            osc = self.df[oscillator]
-
-            lows = argrelextrema(close.values, np.less_equal, order=window)[0]
-            highs = argrelextrema(close.values, np.greater_equal, order=window)[0]
-            osc_lows = argrelextrema(osc.values, np.less_equal, order=window)[0]
-            osc_highs = argrelextrema(osc.values, np.greater_equal, order=window)[0]
-
-            for i in range(1, len(lows)):
-                p1, p2 = lows[i - 1], lows[i]
-                if p1 in osc_lows and p2 in osc_lows:
-                    if close.iloc[p2] < close.iloc[p1] and osc.iloc[p2] > osc.iloc[p1]:
-                        divergences.append({
-                            "date": str(self.df["Open Time"].iloc[p2]),
-                            "type": "bullish_divergence",
-                            "indicator": oscillator,
-                            "price": float(close.iloc[p2]),
-                            "oscillator": float(osc.iloc[p2]),
-                        })
+            from scipy.signal import argrelextrema
+
+            close = self.frame.floats("Close")
+            osc = self.frame.matrix(present)
 
-            for i in range(1, len(highs)):
-                p1, p2 = highs[i - 1], highs[i]
-                if p1 in osc_highs and p2 in osc_highs:
-                    if close.iloc[p2] > close.iloc[p1] and osc.iloc[p2] < osc.iloc[p1]:
+            # Минимумы дают бычьи дивергенции, максимумы — медвежьи
+            signals = []
+            for comparator, regular, hidden_type in (
+                (np.less_equal, "bullish_divergence", "hidden_bullish_divergence"),
+                (np.greater_equal, "bearish_divergence", "hidden_bearish_divergence"),
+            ):
+                price_ext = argrelextrema(close, comparator, order=window)[0]
+                if len(price_ext) < 2:
+                    continue
+                osc_mask = np.zeros(osc.shape, dtype=bool)
+                rows, cols = argrelextrema(osc, comparator, axis=0, order=window)
+                osc_mask[rows, cols] = True
+                matched = _match_extrema(osc_mask, price_ext, tolerance)
+
+                # Пары соседних экстремумов цены: (p1, p2) и экстремумы осциллятора (m1, m2)
+                p1, p2 = price_ext[:-1], price_ext[1:]
+                m1, m2 = matched[:-1], matched[1:]
+                both = (m1 >= 0) & (m2 >= 0)
+                columns = np.arange(len(present))
+                o1 = osc[np.where(both, m1, 0), columns]
+                o2 = osc[np.where(both, m2, 0), columns]
+                price_lower = (close[p2] < close[p1])[:, None]
+                price_higher = (close[p2] > close[p1])[:, None]
+                with np.errstate(invalid="ignore"):
+                    if comparator is np.less_equal:
+                        regular_mask = both & price_lower & (o2 > o1)
+                        hidden_mask = both & price_higher & (o2 < o1)
+                    else:
+                        regular_mask = both & price_higher & (o2 < o1)
+                        hidden_mask = both & price_lower & (o2 > o1)
+                signals.append((0, regular, regular_mask, p2, m2))
+                if hidden:
+                    signals.append((1, hidden_type, hidden_mask, p2, m2))
+
+            # Сначала регулярные, затем скрытые дивергенции
+            signals.sort(key=lambda signal: signal[0])
+            for j, oscillator in enumerate(present):
+                for _, div_type, mask, p2, m2 in signals:
+                    for i in np.flatnonzero(mask[:, j]).tolist():
                         divergences.append({
-                            "date": str(self.df["Open Time"].iloc[p2]),
-                            "type": "bearish_divergence",
+                            "date": self.frame.timestamp("Open Time", p2[i]),
+                            "type": div_type,
                             "indicator": oscillator,
-                            "price": float(close.iloc[p2]),
-                            "oscillator": float(osc.iloc[p2]),
+                            "price": float(close[p2[i]]),
+                            "oscillator": float(osc[m2[i, j], j]),
                         })
 
         except Exception as e:
             logger.error(f"Ошибка при поиске дивергенций: {e}")
 
         return divergences
+
+
+def _match_extrema(osc_mask: np.ndarray, price_ext: np.ndarray, tolerance: int) -> np.ndarray:
+    """
+    Для каждого экстремума цены и каждого столбца осциллятора возвращает индекс
+    ближайшего экстремума осциллятора в пределах ±tolerance баров (или -1).
+    """
+    if tolerance <= 0:
+        return np.where(osc_mask[price_ext], price_ext[:, None], -1)
+
+    n = osc_mask.shape[0]
+    rows = np.arange(n)[:, None]
+    # ближайший экстремум слева и справа от каждой свечи
+    prev_ext = np.maximum.accumulate(np.where(osc_mask, rows, -n - tolerance - 1), axis=0)
+    next_ext = np.minimum.accumulate(
+        np.where(osc_mask, rows, 2 * n + tolerance + 1)[::-1], axis=0
+    )[::-1]
+    prev_ext, next_ext = prev_ext[price_ext], next_ext[price_ext]
+    points = price_ext[:, None]
+    prev_dist, next_dist = points - prev_ext, next_ext - points
+    nearest = np.where(prev_dist <= next_dist, prev_ext, next_ext)
+    return np.where(np.minimum(prev_dist, next_dist) <= tolerance, nearest, -1)
+
+
+def _dropna(values) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    return values[~np.isnan(values)]
+
+
+def _round_array(values: np.ndarray, decimals: int = 2) -> list:
+    """Округляет массив и переводит в списки; NaN и inf становятся None."""
+    values = np.round(values, decimals)
+    if np.isfinite(values).all():
+        return values.tolist()
+    return np.where(np.isfinite(values), values, None).tolist()
+
+
+def batch_autocorrelations(values: np.ndarray, lags: Sequence[int]) -> np.ndarray:
+    """
+    Автокорреляции всех столбцов матрицы values (свечи x столбцы) на каждом лаге.
+    Как и Series.autocorr, пары с пропусками исключаются. Возвращает матрицу
+    лаги x столбцы; NaN, если пар меньше двух или дисперсия нулевая.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full((len(lags), values.shape[1]), np.nan)
+    for i, lag in enumerate(lags):
+        if lag <= 0 or lag >= len(values):
+            continue
+        a, b = values[lag:], values[:-lag]
+        valid = ~(np.isnan(a) | np.isnan(b))
+        count = valid.sum(axis=0)
+        a, b = np.where(valid, a, 0.0), np.where(valid, b, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            a = np.where(valid, a - a.sum(axis=0) / count, 0.0)
+            b = np.where(valid, b - b.sum(axis=0) / count, 0.0)
+            corr = (a * b).sum(axis=0) / np.sqrt((a * a).sum(axis=0) * (b * b).sum(axis=0))
+        result[i] = np.where(count >= 2, corr, np.nan)
+    return result
+
+
+def batch_normality(values: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Моменты распределения каждого столбца без учёта пропусков: число наблюдений,
+    асимметрия, эксцесс и тест Харке-Бера (p-значение по хи-квадрат с 2 ст. св.).
+    В отличие от теста Шапиро-Уилка считается для всех столбцов сразу.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(valid, values, 0.0).sum(axis=0) / count
+        centered = np.where(valid, values - mean, 0.0)
+        m2 = (centered ** 2).sum(axis=0) / count
+        m3 = (centered ** 3).sum(axis=0) / count
+        m4 = (centered ** 4).sum(axis=0) / count
+        skewness = m3 / m2 ** 1.5
+        kurtosis = m4 / m2 ** 2 - 3.0
+        jb = count / 6.0 * (skewness ** 2 + kurtosis ** 2 / 4.0)
+    enough = count >= 3
+    return {
+        "observations": count,
+        "skewness": np.where(enough, skewness, np.nan),
+        "kurtosis": np.where(enough, kurtosis, np.nan),
+        "jarque_bera": np.where(enough, jb, np.nan),
+        # Для хи-квадрат с двумя степенями свободы sf(x) = exp(-x / 2)
+        "p_value": np.where(enough, np.exp(-jb / 2.0), np.nan),
+    }
+
+
+def batch_decompose(values: np.ndarray, period: int = 30) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Аддитивное разложение всех столбцов одним вызовом seasonal_decompose
+    (столбцы матрицы — отдельные ряды). Строки с пропусками отбрасываются,
+    чтобы ряды были выровнены. Помимо компонент возвращает силу тренда
+    и сезонности: max(0, 1 - Var(resid) / Var(компонента + resid)).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values).any(axis=1)]
+    if len(values) < 2 * period:
+        return None
+    from statsmodels.tsa.seasonal import seasonal_decompose
+
+    decomposition = seasonal_decompose(values, model="additive", period=period, extrapolate_trend='freq')
+    trend = np.asarray(decomposition.trend).reshape(values.shape)
+    seasonal = np.asarray(decomposition.seasonal).reshape(values.shape)
+    resid = np.asarray(decomposition.resid).reshape(values.shape)
+    resid_var = np.nanvar(resid, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        trend_strength = np.maximum(0.0, 1.0 - resid_var / np.nanvar(trend + resid, axis=0))
+        seasonal_strength = np.maximum(0.0, 1.0 - resid_var / np.nanvar(seasonal + resid, axis=0))
+    return {
+        "trend": trend,
+        "seasonal": seasonal,
+        "resid": resid,
+        "trend_strength": trend_strength,
+        "seasonal_strength": seasonal_strength,
+    }
+
+
+def batch_statistics(
+    df: Union[pd.DataFrame, CandleFrame],
+    columns: Optional[Sequence[str]] = None,
+    lags: Sequence[int] = DEFAULT_LAGS,
+    period: int = 30,
+    include_series: bool = False,
+) -> Dict[str, Any]:
+    """
+    Пакетный статистический анализ столбцов df. Все показатели считаются
+    по матрице столбцов; результат округляется до 2 знаков.
+    Параметры:
+        columns: Столбцы для анализа (по умолчанию RSI, MACD, OBV).
+        lags: Лаги автокорреляции.
+        period: Период сезонного разложения.
+        include_series: Включать ряды trend/seasonal/resid целиком
+            (по умолчанию только сила тренда и сезонности).
+    Возвращает:
+        dict: {"autocorrelations": ..., "normality": ..., "decomposition": ...}
+    """
+    columns = list(columns or DEFAULT_BATCH_COLUMNS)
+    present = [column for column in columns if column in df.columns]
+    for column in columns:
+        if column not in df.columns:
+            logger.warning(f"Столбец {column} отсутствует в данных для пакетного анализа.")
+    if not present:
+        return {}
+
+    try:
+        if isinstance(df, CandleFrame):
+            values = df.matrix(present)
+        else:
+            values = df[present].to_numpy(dtype=np.float64, copy=True)
+        values[~np.isfinite(values)] = np.nan
+
+        autocorr = _round_array(batch_autocorrelations(values, lags))
+        normality = batch_normality(values)
+        normality = {key: _round_array(array) for key, array in normality.items()}
+        decomposition = batch_decompose(values, period)
+        if decomposition is None:
+            logger.warning("Недостаточно данных для пакетного разложения временного ряда.")
+        else:
+            keys = ["trend_strength", "seasonal_strength"]
+            if include_series:
+                keys += ["trend", "seasonal", "resid"]
+            decomposition = {key: _round_array(decomposition[key].T) for key in keys}
+
+        result = {"autocorrelations": {}, "normality": {}, "decomposition": {}}
+        for j, column in enumerate(present):
+            result["autocorrelations"][column] = {
+                f"lag_{lag}": autocorr[i][j] for i, lag in enumerate(lags)
+            }
+            result["normality"][column] = {
+                "observations": int(normality["observations"][j]),
+                "skewness": normality["skewness"][j],
+                "kurtosis": normality["kurtosis"][j],
+                "Jarque-Bera": {
+                    "Statistic": normality["jarque_bera"][j],
+                    "p-value": normality["p_value"][j],
+                },
+            }
+            if decomposition is None:
+                result["decomposition"][column] = "Недостаточно данных для разложения."
+            else:
+                result["decomposition"][column] = {key: decomposition[key][j] for key in decomposition}
+        return result
+    except Exception as e:
+        logger.error(f"Ошибка при пакетном статистическом анализе: {e}")
+        return {}
+
+
+def _batch_statistics_chunk(
+    frames: Dict[str, pd.DataFrame],
+    columns: Optional[Sequence[str]],
+    lags: Sequence[int],
+    period: int,
+    include_series: bool,
+) -> Dict[str, Dict[str, Any]]:
+    """Обрабатывает часть панели в одном процессе."""
+    return {
+        symbol: batch_statistics(df, columns, lags, period, include_series)
+        for symbol, df in frames.items()
+    }
+
+
+def analyze_panel(
+    panel: Dict[str, pd.DataFrame],
+    columns: Optional[Sequence[str]] = None,
+    lags: Sequence[int] = DEFAULT_LAGS,
+    period: int = 30,
+    include_series: bool = False,
+    use_processes: bool = True,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Пакетный анализ панели символов {символ: DataFrame}. Символы делятся на
+    части по числу процессов пула (PROCESS_WORKERS), в каждый процесс
+    передаются только нужные столбцы. Без пула или при одном символе
+    всё считается в текущем процессе.
+    """
+    columns = list(columns or DEFAULT_BATCH_COLUMNS)
+    pool = get_process_pool() if use_processes and len(panel) > 1 else None
+    if pool is None:
+        return _batch_statistics_chunk(panel, columns, lags, period, include_series)
+
+    frames = {
+        symbol: df[[column for column in columns if column in df.columns]]
+        for symbol, df in panel.items()
+    }
+    symbols = list(frames)
+    chunk_count = min(PROCESS_WORKERS, len(symbols))
+    chunks = [symbols[i::chunk_count] for i in range(chunk_count)]
+    futures = [
+        pool.submit(
+            _batch_statistics_chunk,
+            {symbol: frames[symbol] for symbol in chunk},
+            columns, lags, period, include_series,
+        )
+        for chunk in chunks
+    ]
+    results: Dict[str, Dict[str, Any]] = {}
+    for future in futures:
+        try:
+            results.update(future.result())
+        except Exception as e:
+            logger.error(f"Ошибка в процессе пакетного анализа: {e}")
+    # Порядок символов как во входной панели
+    return {symbol: results.get(symbol, {}) for symbol in symbols}
@@ -1,9 +1,67 @@
 # src/analysis/subscription_manager.py
 
-from config.config import db, logger
-from datetime import datetime, timedelta
+import asyncio
+import os
+import time
+import weakref
+from config.config import get_db, logger
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.metrics import cache_event
+
+# Сколько секунд кешируется известная подписка
+SUBSCRIPTION_CACHE_TTL = float(os.getenv("SUBSCRIPTION_CACHE_TTL", "60"))
+# Сколько секунд кешируется отсутствие или истечение подписки
+SUBSCRIPTION_NEGATIVE_TTL = float(os.getenv("SUBSCRIPTION_NEGATIVE_TTL", "10"))
+# Окно (сек), за которое параллельные асинхронные проверки собираются в один get_all
+SUBSCRIPTION_BATCH_WINDOW = float(os.getenv("SUBSCRIPTION_BATCH_WINDOW", "0.002"))
+
+# username -> (уровень подписки, момент устаревания по time.monotonic())
+_cache: Dict[str, Tuple[str, float]] = {}
+# Растёт при каждой инвалидации: чтение, начатое до записи, не попадает в кеш
+_generation = 0
+
+
+def _level_from_doc(data: Optional[Dict[str, Any]]) -> Tuple[str, float]:
+    """Уровень подписки из документа и срок, на который его можно закешировать."""
+    if data is None:
+        return 'none', SUBSCRIPTION_NEGATIVE_TTL
+    expires_at = data['expires_at']
+    now = datetime.now(timezone.utc) if expires_at.tzinfo else datetime.utcnow()
+    remaining = (expires_at - now).total_seconds()
+    if remaining > 0:
+        # Запись не переживает саму подписку
+        return data['subscription_level'], min(SUBSCRIPTION_CACHE_TTL, remaining)
+    return 'expired', SUBSCRIPTION_NEGATIVE_TTL
+
+
+def _cached(username: str) -> Optional[str]:
+    entry = _cache.get(username)
+    hit = entry is not None and entry[1] > time.monotonic()
+    cache_event("subscription", hit)
+    return entry[0] if hit else None
+
+
+def _remember(username: str, data: Optional[Dict[str, Any]], generation: int) -> str:
+    level, ttl = _level_from_doc(data)
+    if generation == _generation:
+        _cache[username] = (level, time.monotonic() + ttl)
+    return level
+
+
+def invalidate_subscription(username: Optional[str] = None) -> None:
+    """Сбрасывает кеш подписки пользователя (или весь кеш, если username не указан)."""
+    global _generation
+    _generation += 1
+    if username is None:
+        _cache.clear()
+    else:
+        _cache.pop(username, None)
+
 
 def create_subscription(username, level='premium', duration_days=30):
+    db = get_db()
     if db is None:
         logger.error("Firestore Client не инициализирован.")
         return
@@ -12,24 +70,28 @@ def create_subscription(username, level='premium', duration_days=30):
         'subscription_level': level,
         'expires_at': datetime.utcnow() + timedelta(days=duration_days)
     })
+    invalidate_subscription(username)
     logger.info(f"Подписка для {username} создана: {level} на {duration_days} дней.")
 
 def check_subscription(username):
+    """
+    Уровень подписки: 'premium' и т.п., 'expired' или 'none'.
+    Ответ кешируется в процессе (отрицательный — на SUBSCRIPTION_NEGATIVE_TTL).
+    """
+    level = _cached(username)
+    if level is not None:
+        return level
+    db = get_db()
     if db is None:
         logger.error("Firestore Client не инициализирован.")
         return 'none'
+    generation = _generation
     subscription_ref = db.collection('subscriptions').document(username)
     subscription_doc = subscription_ref.get()
-    if subscription_doc.exists:
-        data = subscription_doc.to_dict()
-        if data['expires_at'] > datetime.utcnow():
-            return data['subscription_level']
-        else:
-            return 'expired'
-    else:
-        return 'none'
+    return _remember(username, subscription_doc.to_dict() if subscription_doc.exists else None, generation)
 
 def renew_subscription(username, level='premium', duration_days=30):
+    db = get_db()
     if db is None:
         logger.error("Firestore Client не инициализирован.")
         return
@@ -38,4 +100,85 @@ def renew_subscription(username, level='premium', duration_days=30):
         'subscription_level': level,
         'expires_at': datetime.utcnow() + timedelta(days=duration_days)
     })
+    invalidate_subscription(username)
     logger.info(f"Подписка для {username} обновлена: {level} на {duration_days} дней.")
+
+
+class _SubscriptionBatcher:
+    """
+    Собирает промахи кеша, пришедшие в течение SUBSCRIPTION_BATCH_WINDOW,
+    и читает их одним вызовом get_all. Повторный запрос того же пользователя
+    ждёт уже запланированное чтение.
+    """
+
+    def __init__(self):
+        self.pending: Dict[str, "asyncio.Future[str]"] = {}
+        self.flush_task: Optional["asyncio.Task[None]"] = None
+
+    def lookup(self, username: str) -> "asyncio.Future[str]":
+        future = self.pending.get(username)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self.pending[username] = future
+            if self.flush_task is None:
+                self.flush_task = asyncio.ensure_future(self.flush())
+        return future
+
+    async def flush(self) -> None:
+        await asyncio.sleep(SUBSCRIPTION_BATCH_WINDOW)
+        batch, self.pending, self.flush_task = self.pending, {}, None
+        try:
+            levels = await asyncio.to_thread(_fetch_levels, list(batch))
+        except Exception as e:
+            # Как и check_subscription, ошибка чтения не выдаётся за отсутствие подписки
+            logger.error(f"Ошибка пакетного чтения подписок: {e}")
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for username, future in batch.items():
+            if not future.done():
+                future.set_result(levels[username])
+
+
+def _fetch_levels(usernames: List[str]) -> Dict[str, str]:
+    """Читает документы подписок одним get_all и обновляет кеш."""
+    db = get_db()
+    generation = _generation
+    collection = db.collection('subscriptions')
+    refs = [collection.document(username) for username in usernames]
+    levels = {}
+    for snapshot in db.get_all(refs):
+        data = snapshot.to_dict() if snapshot.exists else None
+        levels[snapshot.id] = _remember(snapshot.id, data, generation)
+    # Документы, которые get_all не вернул, считаются отсутствующими
+    for username in usernames:
+        if username not in levels:
+            levels[username] = _remember(username, None, generation)
+    return levels
+
+
+_batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _SubscriptionBatcher]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def check_subscription_async(username: str) -> str:
+    """
+    Асинхронная проверка подписки: попадание в кеш не переключает корутину,
+    промахи параллельных запросов объединяются в один get_all.
+    """
+    level = _cached(username)
+    if level is not None:
+        return level
+    # Первое обращение создаёт клиент Firestore — не в event loop
+    if await asyncio.to_thread(get_db) is None:
+        logger.error("Firestore Client не инициализирован.")
+        return 'none'
+    loop = asyncio.get_running_loop()
+    batcher = _batchers.get(loop)
+    if batcher is None:
+        batcher = _SubscriptionBatcher()
+        _batchers[loop] = batcher
+    # shield: отмена одного запроса не отменяет общий результат для остальных
+    return await asyncio.shield(batcher.lookup(username))
@@ -0,0 +1,247 @@
+# api/services/warm_cache.py
+
+import asyncio
+import copy
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config.config import logger
+from services.llm_cache import INTERVAL_SECONDS, ttl_until_candle_close
+from services.metrics import cache_event, span
+
+# Фоновый прогрев популярных пар после закрытия свечи
+WARM_CACHE_ENABLED = os.getenv("WARM_CACHE_ENABLED", "false").lower() == "true"
+# Сколько самых запрашиваемых наборов параметров прогревать на каждой границе свечи
+WARM_TOP_N = int(os.getenv("WARM_TOP_N", "10"))
+# Минимальный (затухающий) счётчик запросов, чтобы пара считалась популярной
+WARM_MIN_REQUESTS = float(os.getenv("WARM_MIN_REQUESTS", "2"))
+# Множитель затухания счётчиков на каждой границе свечи (0..1)
+WARM_DECAY = float(os.getenv("WARM_DECAY", "0.5"))
+# Задержка после закрытия свечи, сек: биржевые данные появляются не мгновенно
+WARM_DELAY = float(os.getenv("WARM_DELAY", "5"))
+# Сколько секунд прогретый результат отдаётся вместо свежего расчёта
+# (не дольше, чем до закрытия следующей свечи его интервала)
+WARM_MAX_AGE = float(os.getenv("WARM_MAX_AGE", "120"))
+# Одновременных пересчётов при прогреве
+WARM_CONCURRENCY = int(os.getenv("WARM_CONCURRENCY", "4"))
+# Заранее запрашивать анализ LLM (ответ попадает в кеш LLM до закрытия свечи)
+WARM_LLM = os.getenv("WARM_LLM", "false").lower() == "true"
+
+# (symbol, interval, limit, drop_na, ohlc_format, indicators) — параметры, от которых зависит результат
+WarmKey = Tuple[str, str, int, bool, str, Tuple[str, ...]]
+
+
+def warm_key(symbol: str, interval: str, limit: int, drop_na: bool,
+             ohlc_format: str, indicators: List[str]) -> WarmKey:
+    return (symbol, interval, limit, drop_na, ohlc_format, tuple(sorted(indicators)))
+
+
+class RequestTracker:
+    """
+    Частота запросов по набору параметров. Счётчики затухают на каждой
+    границе свечи, поэтому популярность отражает недавний спрос.
+    """
+
+    def __init__(self, decay: float = WARM_DECAY):
+        self.decay = decay
+        self.counts: Dict[WarmKey, float] = {}
+
+    def record(self, key: WarmKey) -> None:
+        self.counts[key] = self.counts.get(key, 0.0) + 1.0
+
+    def top(self, n: int, intervals: Optional[List[str]] = None,
+            min_requests: float = WARM_MIN_REQUESTS) -> List[WarmKey]:
+        """n самых популярных ключей (только для указанных интервалов, если заданы)."""
+        candidates = [
+            (count, key) for key, count in self.counts.items()
+            if count >= min_requests and (intervals is None or key[1] in intervals)
+        ]
+        candidates.sort(key=lambda item: (-item[0], item[1]))
+        return [key for _, key in candidates[:n]]
+
+    def decay_counts(self, intervals: List[str]) -> None:
+        """Затухание счётчиков интервалов, у которых закрылась свеча."""
+        for key in [k for k in self.counts if k[1] in intervals]:
+            count = self.counts[key] * self.decay
+            if count < 0.01:
+                del self.counts[key]
+            else:
+                self.counts[key] = count
+
+
+class WarmStore:
+    """
+    Прогретые результаты: ключ -> (задача расчёта, момент устаревания).
+    Запросы, пришедшие во время прогрева, ждут ту же задачу, а не считают заново.
+    """
+
+    def __init__(self):
+        self._entries: Dict[WarmKey, Tuple["asyncio.Future[Any]", float]] = {}
+
+    def put(self, key: WarmKey, task: "asyncio.Future[Any]", expires_at: float) -> None:
+        self._entries[key] = (task, expires_at)
+
+    def lookup(self, key: WarmKey) -> Optional["asyncio.Future[Any]"]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] <= time.monotonic():
+            del self._entries[key]
+            entry = None
+        task = entry[0] if entry is not None else None
+        # Прогрев, завершившийся ошибкой, не отдаётся
+        if task is not None and task.done() and (task.cancelled() or task.exception() is not None):
+            del self._entries[key]
+            task = None
+        cache_event("warm", task is not None)
+        return task
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+tracker = RequestTracker()
+store = WarmStore()
+
+
+async def get_warm(key: WarmKey) -> Optional[Any]:
+    """
+    Прогретый результат для ключа (дожидается прогрева в процессе) или None.
+    Каждый запрос получает свою копию: общий результат в store не изменяется.
+    """
+    if not WARM_CACHE_ENABLED:
+        return None
+    tracker.record(key)
+    task = store.lookup(key)
+    if task is None:
+        return None
+    try:
+        # shield: отмена запроса не отменяет общий прогрев
+        result = await asyncio.shield(task)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        return None
+    return copy.deepcopy(result)
+
+
+def warm_expiry(key: WarmKey, now: Optional[float] = None) -> float:
+    """
+    Момент устаревания (time.monotonic) прогретого результата: через WARM_MAX_AGE,
+    но не позже закрытия текущей свечи интервала ключа.
+    """
+    ttl = ttl_until_candle_close(key[1])
+    max_age = WARM_MAX_AGE if ttl is None else min(WARM_MAX_AGE, ttl)
+    return (time.monotonic() if now is None else now) + max_age
+
+
+def closed_intervals(boundary: float) -> List[str]:
+    """Интервалы, у которых на отметке boundary (unix-время) закрылась свеча."""
+    return [interval for interval, step in INTERVAL_SECONDS.items() if int(boundary) % step == 0]
+
+
+def next_boundary(now: Optional[float] = None) -> float:
+    """Ближайшая граница свечи среди всех известных интервалов."""
+    now = time.time() if now is None else now
+    return now + min(ttl_until_candle_close(interval, now) for interval in INTERVAL_SECONDS)
+
+
+class PrecomputeWorker:
+    """
+    Планировщик прогрева: после закрытия свечи (с задержкой WARM_DELAY)
+    пересчитывает WARM_TOP_N самых запрашиваемых наборов параметров закрывшихся
+    интервалов и кладёт результаты в store. compute(key) — загрузка и расчёт
+    индикаторов; analyze(key, result) — необязательная предгенерация анализа LLM.
+    """
+
+    def __init__(
+        self,
+        compute: Callable[[WarmKey], Awaitable[Any]],
+        analyze: Optional[Callable[[WarmKey, Any], Awaitable[Any]]] = None,
+    ):
+        self.compute = compute
+        self.analyze = analyze
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    async def warm(self, key: WarmKey) -> Any:
+        with span("warm"):
+            result = await self.compute(key)
+        if result is not None and self.analyze is not None:
+            try:
+                await self.analyze(key, result)
+            except Exception as e:
+                logger.error(f"Прогрев: ошибка предгенерации анализа {key[0]} {key[1]}: {e}")
+        return result
+
+    async def refresh(self, intervals: List[str]) -> List[WarmKey]:
+        """Прогревает популярные ключи указанных интервалов. Возвращает прогретые ключи."""
+        keys = tracker.top(WARM_TOP_N, intervals)
+        tracker.decay_counts(intervals)
+        if not keys:
+            return []
+        semaphore = asyncio.Semaphore(WARM_CONCURRENCY)
+
+        async def one(key: WarmKey) -> Any:
+            async with semaphore:
+                return await self.warm(key)
+
+        tasks = []
+        for key in keys:
+            task = asyncio.ensure_future(one(key))
+            store.put(key, task, warm_expiry(key))
+            tasks.append(task)
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for key, result in zip(keys, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Прогрев: ошибка расчёта {key[0]} {key[1]}: {result}")
+        logger.info(f"Прогрев после закрытия свечи {intervals}: {len(keys)} наборов параметров")
+        return keys
+
+    async def run(self) -> None:
+        while True:
+            try:
+                boundary = next_boundary()
+                await asyncio.sleep(max(0.0, boundary - time.time()) + WARM_DELAY)
+                await self.refresh(closed_intervals(boundary))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка планировщика прогрева: {e}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self.run())
+            logger.info(f"Планировщик прогрева запущен (top {WARM_TOP_N}, LLM: {self.analyze is not None})")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_worker: Optional[PrecomputeWorker] = None
+
+
+def start_warm_worker(
+    compute: Callable[[WarmKey], Awaitable[Any]],
+    analyze: Optional[Callable[[WarmKey, Any], Awaitable[Any]]] = None,
+) -> Optional[PrecomputeWorker]:
+    """Запускает планировщик прогрева в текущем event loop (если WARM_CACHE_ENABLED)."""
+    global _worker
+    if not WARM_CACHE_ENABLED:
+        return None
+    if _worker is None:
+        _worker = PrecomputeWorker(compute, analyze if WARM_LLM else None)
+        _worker.start()
+    return _worker
+
+
+async def stop_warm_worker() -> None:
+    global _worker
+    if _worker is not None:
+        await _worker.stop()
+        _worker = None
+    store.clear()
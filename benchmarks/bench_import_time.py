@@ -0,0 +1,80 @@
+# benchmarks/bench_import_time.py
+"""
+Время холодного импорта API (`import app`) по данным `python -X importtime`.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_import_time.py --budget-ms 2000 --top 15
+Импорт выполняется в отдельном процессе без облачных credentials; при
+превышении бюджета скрипт завершается с кодом 1 (можно использовать в CI).
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+# Модули, которые не должны загружаться при старте API
+LAZY_MODULES = ["google.cloud.firestore", "openai", "statsmodels", "scipy.stats"]
+
+
+def measure(module: str) -> dict:
+    env = dict(os.environ)
+    # Без credentials google.auth.default() при старте ждал бы метаданные GCE
+    env.pop("GOOGLE_APPLICATION_CREDENTIALS", None)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=API_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = {
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": len(indent) // 2,
+            }
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--budget-ms", type=float, default=2000.0)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", action="store_true", help="вывести результат в JSON")
+    args = parser.parse_args()
+
+    modules = measure(args.module)
+    total = modules.get(args.module, {}).get("cumulative_ms", 0.0)
+    heaviest = sorted(modules.items(), key=lambda item: item[1]["cumulative_ms"], reverse=True)
+    top = [name for name, stats in heaviest if stats["depth"] <= 2][: args.top]
+    loaded_lazy = [name for name in LAZY_MODULES if name in modules]
+    ok = total <= args.budget_ms and not loaded_lazy
+
+    if args.json:
+        print(json.dumps({
+            "module": args.module,
+            "total_ms": round(total, 1),
+            "budget_ms": args.budget_ms,
+            "ok": ok,
+            "eager_lazy_modules": loaded_lazy,
+            "top": {name: modules[name] for name in top},
+        }, indent=2))
+    else:
+        print(f"import {args.module}: {total:.0f} ms (бюджет {args.budget_ms:.0f} ms)")
+        for name in top:
+            print(f"  {modules[name]['cumulative_ms']:>9.1f} ms  {name}")
+        if loaded_lazy:
+            print("Загружены при старте, хотя должны быть ленивыми: " + ", ".join(loaded_lazy))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# benchmarks/bench_processing_memory.py
+"""
+Время и память этапа очистки/сериализации DataProcessor: прежняя цепочка
+(apply_rounding, drop_null_indicators, sanitize, astype(object)) против clean_numeric.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_processing_memory.py --candles 10000 100000 --tail 1000
+--tail — сколько последних свечей сериализуется (как limit в /api/analyze).
+Каждый замер выполняется в отдельном процессе, чтобы пиковый RSS не смешивался.
+"""
+
+import argparse
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+sys.path.append(os.path.dirname(__file__))
+
+from bench_prompt_size import make_candles  # noqa: E402
+from services.data_processor import DataProcessor  # noqa: E402
+
+
+def legacy_pipeline(processor: DataProcessor, num_candles: int):
+    """Прежняя последовательность шагов perform_full_processing и get_ohlc_data."""
+    processor.apply_rounding()
+    processor.drop_null_indicators()
+    df = processor.df
+    if np.isinf(df.select_dtypes(include=[float, int])).values.any():
+        df.replace([np.inf, -np.inf], np.nan, inplace=True)
+    if df.isna().sum().sum():
+        df = df.ffill().bfill()
+    processor.df = df
+    processor.find_candlestick_patterns()
+    df.replace([np.inf, -np.inf], np.nan, inplace=True)
+    df.ffill(inplace=True)
+    df.bfill(inplace=True)
+    df = df.astype(object).where(pd.notnull(df), None)
+    processor.df = df
+
+    ohlc_data = df.tail(num_candles).copy()
+    np.isinf(ohlc_data.select_dtypes(include=[float, int])).values.any()
+    ohlc_data = ohlc_data.replace([np.inf, -np.inf], np.nan)
+    ohlc_data = ohlc_data.ffill().bfill()
+    ohlc_data = ohlc_data.astype(object).where(pd.notnull(ohlc_data), None)
+    return ohlc_data.to_dict(orient="records")
+
+
+def current_pipeline(processor: DataProcessor, num_candles: int):
+    processor.clean_numeric(round_values=True, drop_na=True)
+    processor.find_candlestick_patterns()
+    return processor.get_ohlc_data(num_candles)
+
+
+def prepared_processor(candles: int) -> DataProcessor:
+    processor = DataProcessor(make_candles(candles))
+    processor.preprocess()
+    processor.calculate_indicators()
+    return processor
+
+
+def run_single(mode: str, candles: int, tail: int) -> dict:
+    pipeline = legacy_pipeline if mode == "legacy" else current_pipeline
+    logging.disable(logging.CRITICAL)
+
+    # 1) Время — без tracemalloc, он заметно замедляет Python-код
+    processor = prepared_processor(candles)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    pipeline(processor, tail)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss: килобайты в Linux; прирост пика относительно подготовленного кадра
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    del processor
+
+    # 2) Пик выделенной памяти самого этапа
+    processor = prepared_processor(candles)
+    tracemalloc.start()
+    pipeline(processor, tail)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "mode": mode,
+        "candles": candles,
+        "tail": tail,
+        "wall_s": round(elapsed, 3),
+        "stage_peak_mb": round(peak / 2**20, 1),
+        "peak_rss_growth_mb": round((rss_after - rss_before) / 1024, 1),
+        "peak_rss_mb": round(rss_after / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--candles", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--tail", type=int, default=1000)
+    parser.add_argument("--json", action="store_true", help="вывести результат в JSON")
+    parser.add_argument("--single", nargs=3, metavar=("MODE", "CANDLES", "TAIL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        mode, candles, tail = args.single
+        print(json.dumps(run_single(mode, int(candles), int(tail))))
+        return
+
+    results = []
+    for candles in args.candles:
+        for mode in ("legacy", "current"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--single", mode, str(candles), str(args.tail)],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            results.append(json.loads(out.strip().splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps({"results": results}, indent=2))
+        return
+
+    print(f"{'candles':>8} {'mode':>8} {'wall s':>8} {'stage MB':>9} {'RSS +MB':>8} {'RSS MB':>8}")
+    for row in results:
+        print(f"{row['candles']:>8} {row['mode']:>8} {row['wall_s']:>8} "
+              f"{row['stage_peak_mb']:>9} {row['peak_rss_growth_mb']:>8} {row['peak_rss_mb']:>8}")
+
+
+if __name__ == "__main__":
+    main()
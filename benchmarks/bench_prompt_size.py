@@ -0,0 +1,122 @@
+# benchmarks/bench_prompt_size.py
+"""
+Размер промпта для старого (список словарей) и компактного кодирования свечей.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_prompt_size.py --candles 144 1000
+Токены считаются через tiktoken, если он установлен, иначе — приблизительно.
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from services.data_processor import DataProcessor  # noqa: E402
+from services.prompt_encoding import encode_ohlc_compact  # noqa: E402
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except ImportError:
+    _encoding = None
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text: str) -> int:
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    # Приближение: слова и знаки препинания (числа дробятся на части по '.')
+    return len(_TOKEN_RE.findall(text))
+
+
+def make_candles(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 30000 + np.cumsum(rng.normal(0, 50, n))
+    open_ = close + rng.normal(0, 20, n)
+    high = np.maximum(open_, close) + rng.random(n) * 40
+    low = np.minimum(open_, close) - rng.random(n) * 40
+    volume = rng.random(n) * 1000
+    open_time = pd.date_range("2024-01-01", periods=n, freq="h")
+    return pd.DataFrame({
+        "Open Time": open_time,
+        "Close Time": open_time + pd.Timedelta(hours=1),
+        "Open": open_, "High": high, "Low": low, "Close": close,
+        "Volume": volume, "Quote Asset Volume": volume * close,
+    })
+
+
+def encode_legacy(ohlc) -> str:
+    """Прежняя реализация construct_prompt: рекурсивная очистка и список словарей."""
+    def _sanitize(val):
+        if isinstance(val, float):
+            if math.isnan(val) or math.isinf(val):
+                return None
+            return float(val)
+        if isinstance(val, dict):
+            return {k: _sanitize(v) for k, v in val.items()}
+        if isinstance(val, list):
+            return [_sanitize(v) for v in val]
+        return val
+
+    # default=str: время после perform_full_processing хранится как Timestamp
+    return json.dumps(_sanitize(ohlc), ensure_ascii=False, allow_nan=False, default=str)
+
+
+def measure(name, encoder, ohlc):
+    start = time.perf_counter()
+    text = encoder(ohlc)
+    elapsed = time.perf_counter() - start
+    return {
+        "encoding": name,
+        "bytes": len(text.encode("utf-8")),
+        "tokens": count_tokens(text),
+        "encode_ms": round(elapsed * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--candles", type=int, nargs="+", default=[144, 1000])
+    parser.add_argument("--json", action="store_true", help="вывести результат в JSON")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.candles:
+        processor = DataProcessor(make_candles(n + 200))
+        processor.perform_full_processing()
+        ohlc = processor.get_ohlc_data(n)
+        legacy = measure("json", encode_legacy, ohlc)
+        compact = measure("compact", encode_ohlc_compact, ohlc)
+        for row in (legacy, compact):
+            row["candles"] = n
+            results.append(row)
+        compact["bytes_ratio"] = round(compact["bytes"] / legacy["bytes"], 3)
+        compact["tokens_ratio"] = round(compact["tokens"] / legacy["tokens"], 3)
+
+    if args.json:
+        print(json.dumps({
+            "tokenizer": "tiktoken" if _encoding is not None else "approx",
+            "results": results,
+        }, indent=2))
+        return
+
+    print(f"tokenizer: {'tiktoken o200k_base' if _encoding is not None else 'approx (no tiktoken)'}")
+    print(f"{'candles':>8} {'encoding':>9} {'bytes':>10} {'tokens':>9} {'ms':>8} {'ratio':>6}")
+    for row in results:
+        ratio = row.get("tokens_ratio", "")
+        print(f"{row['candles']:>8} {row['encoding']:>9} {row['bytes']:>10} "
+              f"{row['tokens']:>9} {row['encode_ms']:>8} {ratio:>6}")
+
+
+if __name__ == "__main__":
+    main()
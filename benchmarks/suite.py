@@ -0,0 +1,290 @@
+# benchmarks/suite.py
+"""
+Набор бенчмарков конвейера анализа на синтетических свечах.
+
+Запуск из корня репозитория:
+    python benchmarks/suite.py --sizes 1000 10000 100000 --repeat 5
+    python benchmarks/suite.py --filter indicator --sizes 10000
+    python benchmarks/suite.py --compare benchmarks/results/OLD.json benchmarks/results/NEW.json
+
+Результат пишется в JSON (по умолчанию benchmarks/results/<commit>.json):
+метаданные окружения и для каждого бенчмарка и размера — min/median/mean
+по повторам. --compare печатает отношение медиан и завершается с кодом 1,
+если какой-либо бенчмарк замедлился больше порога --threshold.
+Подготовка данных (setup) в замер не входит.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+sys.path.append(os.path.dirname(__file__))
+
+from bench_prompt_size import make_candles  # noqa: E402
+from services.data_processor import DataProcessor  # noqa: E402
+from services.incremental_indicators import IncrementalIndicatorEngine  # noqa: E402
+from services.indicator_registry import INDICATORS  # noqa: E402
+from services.statistical_analysis import StatisticalAnalyzer  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Скользящее окно: сколько раз окно сдвигается на свечу и сколько запросов
+# приходится на одну свечу (формирующаяся свеча меняется между запросами)
+SLIDING_WINDOWS = 30
+SLIDING_REQUESTS_PER_CANDLE = 5
+
+# Бенчмарк: setup(n) -> состояние (не замеряется), run(состояние) — замеряемая часть
+BENCHMARKS: Dict[str, Dict[str, Callable]] = {}
+
+
+def register_benchmark(name: str, setup: Callable[[int], Any]):
+    """Декоратор для регистрации бенчмарка с функцией подготовки данных."""
+    def decorator(run: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        BENCHMARKS[name] = {"setup": setup, "run": run}
+        return run
+    return decorator
+
+
+def raw_frame(n: int) -> pd.DataFrame:
+    return make_candles(n)
+
+
+def processed_frame(n: int) -> pd.DataFrame:
+    processor = DataProcessor(make_candles(n))
+    return processor.perform_full_processing(drop_na=True)
+
+
+def fresh_processor(n: int) -> Callable[[], DataProcessor]:
+    df = make_candles(n)
+    # Каждому повтору — своя копия кадра: perform_full_processing меняет его на месте
+    return lambda: DataProcessor(df.copy())
+
+
+@register_benchmark("perform_full_processing", fresh_processor)
+def bench_full_processing(make: Callable[[], DataProcessor]):
+    make().perform_full_processing(drop_na=True)
+
+
+def _register_indicator(name: str) -> None:
+    spec = INDICATORS[name]
+
+    def setup(n: int) -> pd.DataFrame:
+        df = make_candles(n)
+        # Зависимости (например, MA_20 для конверта) считаются заранее
+        for dependency in spec.depends:
+            for column, values in INDICATORS[dependency].compute(df).items():
+                df[column] = values
+        return df
+
+    @register_benchmark(f"indicator:{name}", setup)
+    def run(df: pd.DataFrame):
+        spec.compute(df)
+
+
+for _name in INDICATORS:
+    _register_indicator(_name)
+
+
+def sliding_frames(n: int) -> List[pd.DataFrame]:
+    """Окна по n свечей, каждое запрашивается несколько раз с обновлённой последней свечой."""
+    candles = make_candles(n + SLIDING_WINDOWS)
+    frames = []
+    for start in range(SLIDING_WINDOWS):
+        window = candles.iloc[start:start + n].reset_index(drop=True)
+        for request in range(SLIDING_REQUESTS_PER_CANDLE):
+            frame = window.copy()
+            frame.loc[n - 1, "Close"] *= 1 + 0.001 * request
+            frame.loc[n - 1, "High"] = max(frame.loc[n - 1, "High"], frame.loc[n - 1, "Close"])
+            frames.append(frame)
+    return frames
+
+
+@register_benchmark("sliding_window:ta", sliding_frames)
+def bench_sliding_ta(frames: List[pd.DataFrame]):
+    for frame in frames:
+        DataProcessor(frame.copy(), incremental=False).calculate_indicators()
+
+
+@register_benchmark("sliding_window:incremental", sliding_frames)
+def bench_sliding_incremental(frames: List[pd.DataFrame]):
+    # Свой движок на повтор: состояние прошлого повтора не должно помогать
+    engine = IncrementalIndicatorEngine()
+    for frame in frames:
+        DataProcessor(frame.copy(), engine=engine).calculate_indicators()
+
+
+@register_benchmark("find_candlestick_patterns", lambda n: DataProcessor(make_candles(n)))
+def bench_patterns(processor: DataProcessor):
+    processor.find_candlestick_patterns()
+
+
+@register_benchmark("perform_full_analysis", processed_frame)
+def bench_full_analysis(df: pd.DataFrame):
+    StatisticalAnalyzer(df).perform_full_analysis()
+
+
+@register_benchmark("find_divergences", processed_frame)
+def bench_divergences(df: pd.DataFrame):
+    StatisticalAnalyzer(df).find_divergences_multi(["RSI", "MACD"])
+
+
+def prompt_setup(n: int):
+    from services.chatgpt_analyzer import ChatGPTAnalyzer
+
+    return ChatGPTAnalyzer(), {"ohlc": processed_frame(n)}
+
+
+@register_benchmark("construct_prompt", prompt_setup)
+def bench_construct_prompt(state):
+    analyzer, payload = state
+    analyzer.construct_prompt(payload)
+
+
+def api_setup(n: int):
+    """TestClient с подменёнными загрузкой свечей и LLM; limit = n."""
+    import jwt
+    from fastapi.testclient import TestClient
+
+    import app as app_module
+    import routers.analysis as analysis
+
+    df = make_candles(n)
+
+    async def fake_fetch(symbol, interval, limit):
+        return df.copy()
+
+    async def fake_analyze(self, payload, cache_ttl=None):
+        return {"summary": "ok"}, False
+
+    analysis.fetch_ohlcv = fake_fetch
+    analysis.ChatGPTAnalyzer.analyze = fake_analyze
+    token = jwt.encode({"sub": "bench"}, app_module.SECRET_KEY, algorithm="HS256")
+    client = TestClient(app_module.app)
+    request = {
+        "json": {"symbol": "BTCUSDT", "interval": "1h", "limit": n, "indicators": []},
+        "headers": {"Authorization": f"Bearer {token}"},
+    }
+    return client, request
+
+
+@register_benchmark("api_analyze", api_setup)
+def bench_api_analyze(state):
+    client, request = state
+    response = client.post("/api/analyze", **request)
+    assert response.status_code == 200, response.text
+
+
+def measure(name: str, n: int, repeat: int) -> Dict[str, Any]:
+    benchmark = BENCHMARKS[name]
+    state = benchmark["setup"](n)
+    # Прогрев: ленивые импорты и кеши не должны попадать в замер
+    benchmark["run"](state)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        benchmark["run"](state)
+        times.append(time.perf_counter() - start)
+    return {
+        "min_s": round(min(times), 6),
+        "median_s": round(statistics.median(times), 6),
+        "mean_s": round(statistics.fmean(times), 6),
+        "repeat": repeat,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def compare(old_path: str, new_path: str, threshold: float) -> int:
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"{old['environment']['commit']} -> {new['environment']['commit']}")
+    print(f"{'benchmark':<40} {'size':>7} {'old ms':>10} {'new ms':>10} {'ratio':>7}")
+    regressions = 0
+    for name, sizes in new["results"].items():
+        for size, stats in sizes.items():
+            previous = old["results"].get(name, {}).get(size)
+            if previous is None:
+                continue
+            ratio = stats["median_s"] / previous["median_s"] if previous["median_s"] else float("inf")
+            flag = ""
+            if ratio > 1 + threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"{name:<40} {size:>7} {previous['median_s'] * 1000:>10.2f} "
+                  f"{stats['median_s'] * 1000:>10.2f} {ratio:>7.2f}{flag}")
+    return 1 if regressions else 0
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", default="", help="подстрока имени бенчмарка")
+    parser.add_argument("--output", help="путь к JSON (по умолчанию results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    parser.add_argument("--threshold", type=float, default=0.10, help="допустимое замедление (доля)")
+    parser.add_argument("--list", action="store_true", help="список бенчмарков")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return
+    if args.compare:
+        sys.exit(compare(args.compare[0], args.compare[1], args.threshold))
+
+    # Синтетические свечи без symbol/interval в attrs: инкрементальный движок
+    # не используется, каждый повтор считает индикаторы заново
+    logging.disable(logging.CRITICAL)
+    env = environment()
+    names = [name for name in BENCHMARKS if args.filter in name]
+    results: Dict[str, Dict[str, Any]] = {}
+    for name in names:
+        results[name] = {}
+        for n in args.sizes:
+            stats = measure(name, n, args.repeat)
+            results[name][str(n)] = stats
+            print(f"{name:<40} {n:>7} median {stats['median_s'] * 1000:>10.2f} ms  "
+                  f"min {stats['min_s'] * 1000:>10.2f} ms", flush=True)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{env['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"environment": env, "sizes": args.sizes, "results": results}, f, indent=2)
+    print(f"Результаты сохранены в {output}")
+
+
+if __name__ == "__main__":
+    main()
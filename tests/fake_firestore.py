@@ -0,0 +1,65 @@
+"""Простая in-memory замена firestore.Client для тестов (только нужные методы)."""
+
+from typing import Any, Dict, List, Optional
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id: str, data: Optional[Dict[str, Any]]):
+        self.id = doc_id
+        self._data = data
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocument:
+    def __init__(self, client: "FakeFirestore", collection: str, doc_id: str):
+        self._client = client
+        self._collection = collection
+        self.id = doc_id
+
+    def _store(self) -> Dict[str, Dict[str, Any]]:
+        return self._client.data.setdefault(self._collection, {})
+
+    def get(self) -> FakeSnapshot:
+        self._client.calls["get"] += 1
+        return FakeSnapshot(self.id, self._store().get(self.id))
+
+    def set(self, data: Dict[str, Any]) -> None:
+        self._client.calls["set"] += 1
+        self._store()[self.id] = dict(data)
+
+    def update(self, data: Dict[str, Any]) -> None:
+        self._client.calls["update"] += 1
+        if self.id not in self._store():
+            raise KeyError(f"No document to update: {self.id}")
+        self._store()[self.id].update(data)
+
+
+class FakeCollection:
+    def __init__(self, client: "FakeFirestore", name: str):
+        self._client = client
+        self._name = name
+
+    def document(self, doc_id: str) -> FakeDocument:
+        return FakeDocument(self._client, self._name, doc_id)
+
+
+class FakeFirestore:
+    """Хранит документы в словаре и считает обращения к «серверу»."""
+
+    def __init__(self):
+        self.data: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.calls = {"get": 0, "get_all": 0, "set": 0, "update": 0}
+
+    def collection(self, name: str) -> FakeCollection:
+        return FakeCollection(self, name)
+
+    def get_all(self, references: List[FakeDocument]):
+        self.calls["get_all"] += 1
+        for ref in references:
+            yield FakeSnapshot(ref.id, ref._store().get(ref.id))
@@ -0,0 +1,45 @@
+"""Локальные провайдеры LLM для тестов: задержка и ошибки задаются в конструкторе."""
+
+import asyncio
+import os
+import sys
+from typing import List, Optional
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from services.providers.base import LLMProvider  # noqa: E402
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class StubProvider(LLMProvider):
+    """
+    Отвечает content через latency секунд. Первые ошибки берутся из errors
+    (по одной на вызов). Считает вызовы и максимум одновременных запросов.
+    """
+
+    def __init__(self, name: str = "stub", content: str = '{"ok": true}',
+                 latency: float = 0.0, errors: Optional[List[BaseException]] = None):
+        self.name = name
+        self.model = f"{name}-model"
+        self.content = content
+        self.latency = latency
+        self.errors = list(errors or [])
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def generate(self, messages, **kwargs):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if self.errors:
+                raise self.errors.pop(0)
+            return {"content": self.content}
+        finally:
+            self.active -= 1
@@ -3,6 +3,7 @@ import sys
 import os
 import pandas as pd
 import jwt
+import json
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
 import app as app_module
@@ -49,7 +50,7 @@ def test_analyze_success(monkeypatch):
     async def fake_fetch(symbol, interval, limit):
         return df
 
-    def fake_analyze(self, payload):
+    async def fake_analyze(self, payload, cache_ttl=None):
         return {'summary': 'ok'}, False
 
     monkeypatch.setattr('routers.analysis.fetch_ohlcv', fake_fetch)
@@ -93,7 +94,7 @@ def test_analyze_returns_limit_candles(monkeypatch):
         return df
 
     class DummyProcessor:
-        def __init__(self, _df):
+        def __init__(self, _df, indicators=None):
             self.df = _df
         def perform_full_processing(self, drop_na=True):
             return self.df
@@ -102,7 +103,11 @@ def test_analyze_returns_limit_candles(monkeypatch):
 
     monkeypatch.setattr('routers.analysis.fetch_ohlcv', fake_fetch)
     monkeypatch.setattr('routers.analysis.DataProcessor', DummyProcessor)
-    monkeypatch.setattr('routers.analysis.ChatGPTAnalyzer.analyze', lambda self, payload: ({'summary': 'ok'}, False))
+
+    async def fake_analyze(self, payload, cache_ttl=None):
+        return {'summary': 'ok'}, False
+
+    monkeypatch.setattr('routers.analysis.ChatGPTAnalyzer.analyze', fake_analyze)
 
     payload = {
         'symbol': 'BTCUSDT',
@@ -140,7 +145,7 @@ def test_analyze_no_nan_values(monkeypatch):
     async def fake_fetch(symbol, interval, limit):
         return df
 
-    def fake_analyze(self, payload):
+    async def fake_analyze(self, payload, cache_ttl=None):
         return {'summary': 'ok'}, False
 
     monkeypatch.setattr('routers.analysis.fetch_ohlcv', fake_fetch)
@@ -159,3 +164,204 @@ def test_analyze_no_nan_values(monkeypatch):
     text = r.text
     assert 'NaN' not in text
     assert 'Infinity' not in text
+
+
+def test_analyze_stream_events_order(monkeypatch):
+    token = jwt.encode({'sub': 'tester'}, app_module.SECRET_KEY, algorithm='HS256')
+
+    df = pd.DataFrame({
+        'Open Time': pd.date_range('2021-01-01', periods=2, freq='h'),
+        'Open': [1, 2],
+        'High': [2, 3],
+        'Low': [0, 1],
+        'Close': [1, 2],
+        'Volume': [10, 11],
+        'Quote Asset Volume': [10, 11],
+    })
+
+    async def fake_fetch(symbol, interval, limit):
+        return df
+
+    async def fake_stream(self, payload, cache_ttl=None):
+        yield 'delta', '{"summary":'
+        yield 'delta', ' "ok"}'
+        yield 'result', ({'summary': 'ok'}, False)
+
+    monkeypatch.setattr('routers.analysis.fetch_ohlcv', fake_fetch)
+    monkeypatch.setattr('routers.analysis.ChatGPTAnalyzer.analyze_stream', fake_stream)
+
+    payload = {'symbol': 'BTCUSDT', 'interval': '1h', 'limit': 2}
+    headers = {'Authorization': f'Bearer {token}'}
+    r = client.post('/api/analyze/stream', json=payload, headers=headers)
+    assert r.status_code == 200
+    assert r.headers['content-type'].startswith('application/x-ndjson')
+    events = [json.loads(line) for line in r.text.splitlines() if line]
+    assert [e['event'] for e in events] == [
+        'ohlc', 'indicators', 'divergence_analysis', 'candlestick_patterns',
+        'delta', 'delta', 'analysis',
+    ]
+    assert len(events[0]['data']) == 2
+    final = events[-1]['data']
+    assert final['analysis']['summary'] == 'ok'
+    assert final['invalid_chatgpt_response'] is False
+
+
+def test_analyze_columnar_ohlc(monkeypatch):
+    token = jwt.encode({'sub': 'tester'}, app_module.SECRET_KEY, algorithm='HS256')
+
+    df = pd.DataFrame({
+        'Open Time': pd.date_range('2021-01-01', periods=3, freq='h'),
+        'Open': [1.0, 2.0, 3.0],
+        'High': [2.0, 3.0, 4.0],
+        'Low': [0.5, 1.0, 2.0],
+        'Close': [1.5, 2.5, 3.5],
+        'Volume': [10, 11, 12],
+        'Quote Asset Volume': [10, 11, 12],
+    })
+
+    async def fake_fetch(symbol, interval, limit):
+        return df
+
+    async def fake_analyze(self, payload, cache_ttl=None):
+        return {'summary': 'ok'}, False
+
+    monkeypatch.setattr('routers.analysis.fetch_ohlcv', fake_fetch)
+    monkeypatch.setattr('routers.analysis.ChatGPTAnalyzer.analyze', fake_analyze)
+
+    headers = {'Authorization': f'Bearer {token}'}
+    base = {'symbol': 'BTCUSDT', 'interval': '1h', 'limit': 2, 'drop_na': False}
+    records = client.post('/api/analyze', json=base, headers=headers).json()['ohlc']
+    r = client.post('/api/analyze', json={**base, 'ohlc_format': 'columnar'}, headers=headers)
+    assert r.status_code == 200
+    ohlc = r.json()['ohlc']
+    assert ohlc['columns'] == list(records[0].keys())
+    for column in ohlc['columns']:
+        assert ohlc['data'][column] == [row[column] for row in records]
+    assert 'NaN' not in r.text
+
+
+def test_screen_ranks_symbols(monkeypatch):
+    token = jwt.encode({'sub': 'tester'}, app_module.SECRET_KEY, algorithm='HS256')
+
+    def make_df(step):
+        n = 300
+        close = [100 + step * i for i in range(n)]
+        return pd.DataFrame({
+            'Open Time': pd.date_range('2021-01-01', periods=n, freq='h'),
+            'Open': close,
+            'High': [c + 1 for c in close],
+            'Low': [c - 1 for c in close],
+            'Close': close,
+            'Volume': [10] * n,
+        })
+
+    async def fake_fetch(symbol, interval, limit):
+        if symbol == 'BADUSDT':
+            raise RuntimeError('boom')
+        return make_df(1 if symbol == 'BTCUSDT' else -0.1)
+
+    async def fail_analyze(self, payload, cache_ttl=None):
+        raise AssertionError('screen must not call the LLM')
+
+    monkeypatch.setattr('services.screener.fetch_ohlcv', fake_fetch)
+    monkeypatch.setattr('services.screener.get_process_pool', lambda: None)
+    monkeypatch.setattr('routers.analysis.ChatGPTAnalyzer.analyze', fail_analyze)
+
+    payload = {'symbols': ['ethusdt', 'BTCUSDT', 'BADUSDT'], 'intervals': ['1h']}
+    headers = {'Authorization': f'Bearer {token}'}
+    r = client.post('/api/screen', json=payload, headers=headers)
+    assert r.status_code == 200
+    data = r.json()
+    results = {row['symbol']: row for row in data['results']}
+    assert set(results) == {'BTCUSDT', 'ETHUSDT'}
+    assert results['BTCUSDT']['trend'] == 'up'
+    assert results['ETHUSDT']['trend'] == 'down'
+    scores = [abs(row['score']) for row in data['results']]
+    assert scores == sorted(scores, reverse=True)
+    assert data['errors'] == [{'symbol': 'BADUSDT', 'interval': '1h', 'error': 'boom'}]
+
+    for bad in ({'lookback': 0}, {'lookback': -3}, {'limit': 0}, {'limit': 10, 'lookback': 11}):
+        r = client.post('/api/screen', json={**payload, **bad}, headers=headers)
+        assert r.status_code == 422, bad
+
+
+def test_metrics_and_server_timing(monkeypatch):
+    token = jwt.encode({'sub': 'tester'}, app_module.SECRET_KEY, algorithm='HS256')
+    df = pd.DataFrame({
+        'Open Time': pd.date_range('2021-01-01', periods=3, freq='h'),
+        'Open': [1.0, 2.0, 3.0],
+        'High': [2.0, 3.0, 4.0],
+        'Low': [0.5, 1.0, 2.0],
+        'Close': [1.5, 2.5, 3.5],
+        'Volume': [10, 11, 12],
+    })
+
+    async def fake_fetch(symbol, interval, limit):
+        return df
+
+    async def fake_analyze(self, payload, cache_ttl=None):
+        return {'summary': 'ok'}, False
+
+    monkeypatch.setattr('routers.analysis.fetch_ohlcv', fake_fetch)
+    monkeypatch.setattr('routers.analysis.ChatGPTAnalyzer.analyze', fake_analyze)
+    monkeypatch.setattr('services.metrics.SERVER_TIMING', True)
+
+    headers = {'Authorization': f'Bearer {token}'}
+    payload = {'symbol': 'BTCUSDT', 'interval': '1h', 'limit': 2, 'drop_na': False}
+    r = client.post('/api/analyze', json=payload, headers=headers)
+    assert r.status_code == 200
+    stages = [item.split(';')[0] for item in r.headers['server-timing'].split(', ')]
+    for stage in ('fetch', 'preprocess', 'indicators', 'rounding', 'patterns', 'divergences', 'serialization'):
+        assert stage in stages
+
+    r = client.get('/metrics')
+    assert r.status_code == 200
+    assert r.headers['content-type'].startswith('text/plain')
+    assert 'geniuso4_stage_seconds_bucket{stage="fetch",le="+Inf"}' in r.text
+    assert 'geniuso4_payload_bytes_count{kind="response"}' in r.text
+
+
+def test_analyze_multi_timeframe_single_fetch(monkeypatch):
+    token = jwt.encode({'sub': 'tester'}, app_module.SECRET_KEY, algorithm='HS256')
+    calls = []
+
+    async def fake_fetch(symbol, interval, limit):
+        calls.append((interval, limit))
+        open_time = pd.date_range('2021-01-01', periods=limit, freq='h')
+        return pd.DataFrame({
+            'Open Time': open_time,
+            'Close Time': open_time + pd.Timedelta('1h'),
+            'Open': [float(i) for i in range(limit)],
+            'High': [i + 1.0 for i in range(limit)],
+            'Low': [i - 1.0 for i in range(limit)],
+            'Close': [float(i) for i in range(limit)],
+            'Volume': [1.0] * limit,
+            'Quote Asset Volume': [1.0] * limit,
+        })
+
+    async def fake_analyze(self, payload, cache_ttl=None):
+        return {'summary': 'ok'}, False
+
+    monkeypatch.setattr('services.resampling.fetch_ohlcv', fake_fetch)
+    monkeypatch.setattr('routers.analysis.ChatGPTAnalyzer.analyze', fake_analyze)
+
+    payload = {
+        'symbol': 'BTCUSDT',
+        'interval': '1h',
+        'limit': 5,
+        'indicators': ['RSI'],
+        'drop_na': False,
+        'timeframes': ['4h'],
+    }
+    headers = {'Authorization': f'Bearer {token}'}
+    r = client.post('/api/analyze', json=payload, headers=headers)
+    assert r.status_code == 200
+    data = r.json()
+    assert [interval for interval, _ in calls] == ['1h']
+    assert set(data['timeframes']) == {'4h'}
+    assert len(data['timeframes']['4h']['ohlc']) == 5
+    assert data['timeframes']['4h']['ohlc'][-1]['High'] > data['ohlc'][-1]['Open']
+    assert len(data['ohlc']) == 5
+
+    payload['timeframes'] = ['7h']
+    assert client.post('/api/analyze', json=payload, headers=headers).status_code == 400
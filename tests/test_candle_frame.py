@@ -0,0 +1,72 @@
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from services.candle_frame import CandleFrame  # noqa: E402
+from services.statistical_analysis import StatisticalAnalyzer  # noqa: E402
+
+
+def make_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({
+        "Open Time": pd.date_range("2022-01-01", periods=n, freq="h"),
+        "Close": close,
+        "Volume": rng.integers(1, 1000, n),
+        "RSI": 50 + rng.normal(0, 10, n),
+        "MACD": rng.normal(0, 1, n),
+        "OBV": np.cumsum(rng.normal(0, 5, n)),
+    })
+
+
+def test_from_pandas_shares_memory_and_round_trips():
+    df = make_frame(50)
+    frame = CandleFrame.from_pandas(df)
+
+    assert frame.columns == list(df.columns)
+    assert frame["Open Time"].dtype == np.int64
+    assert np.shares_memory(frame["Close"], df["Close"].to_numpy())
+    tail = frame.tail(10)
+    assert len(tail) == 10
+    assert np.shares_memory(tail["RSI"], frame["RSI"])
+    assert tail.timestamp("Open Time", 0) == str(df["Open Time"].iloc[40])
+    pd.testing.assert_frame_equal(frame.to_pandas(), df)
+
+
+def test_statistics_match_pandas():
+    df = make_frame(300, seed=3)
+    analyzer = StatisticalAnalyzer(CandleFrame.from_pandas(df))
+
+    correlations = analyzer.calculate_correlations()
+    expected = df.corr().round(2).to_dict()
+    assert correlations.keys() == expected.keys()
+    for column, row in expected.items():
+        for name, value in row.items():
+            assert math.isclose(correlations[column][name], value, abs_tol=1e-9)
+
+    autocorr = analyzer.calculate_autocorrelations()
+    assert autocorr == {c: round(df[c].autocorr(lag=1), 2) for c in ["RSI", "MACD", "OBV"]}
+    assert analyzer.get_moving_averages() == {"MA_50": None, "MA_200": None, "MA_20": None, "MA_100": None}
+
+    # С пропусками корреляции считаются попарно, как в pandas
+    df.loc[::7, "RSI"] = np.nan
+    gapped = StatisticalAnalyzer(df).calculate_correlations()
+    assert math.isclose(gapped["RSI"]["MACD"], df.corr().round(2)["RSI"]["MACD"], abs_tol=1e-9)
+
+
+def test_frame_and_dataframe_inputs_agree():
+    df = make_frame(400, seed=7)
+    from_frame = StatisticalAnalyzer(CandleFrame.from_pandas(df))
+    from_df = StatisticalAnalyzer(df)
+
+    assert from_frame.find_divergences_multi(["RSI", "MACD"], hidden=True) == \
+        from_df.find_divergences_multi(["RSI", "MACD"], hidden=True)
+    assert from_frame.batch_analysis(["RSI", "OBV"]) == from_df.batch_analysis(["RSI", "OBV"])
+    # pandas создаётся только по запросу
+    assert from_frame._df is None
+    pd.testing.assert_frame_equal(from_frame.df, df)
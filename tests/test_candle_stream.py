@@ -0,0 +1,174 @@
+import asyncio
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from services import candle_stream, crypto_compare_provider  # noqa: E402
+from services.candle_stream import CandleRingBuffer, CandleStreamHub, ReplaySource  # noqa: E402
+from services.data_processor import DataProcessor  # noqa: E402
+
+T0 = 1609459200  # 2021-01-01 00:00 UTC
+
+
+def kline(symbol, interval, open_time, close, closed=True):
+    return {
+        "stream": f"{symbol.lower()}@kline_{interval}",
+        "data": {
+            "e": "kline", "s": symbol,
+            "k": {
+                "t": open_time * 1000, "s": symbol, "i": interval,
+                "o": str(close - 1), "h": str(close + 1), "l": str(close - 2), "c": str(close),
+                "v": "10", "q": str(10 * close), "x": closed,
+            },
+        },
+    }
+
+
+def trade(symbol, timestamp, price, quantity):
+    return {"e": "trade", "s": symbol, "T": int(timestamp * 1000), "p": str(price), "q": str(quantity)}
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    hub = CandleStreamHub(capacity=300)
+    monkeypatch.setattr(candle_stream, "_hub", hub)
+    return hub
+
+
+def test_ring_buffer_wraps_and_returns_views():
+    buffer = CandleRingBuffer(capacity=5, step=60)
+    for i in range(8):
+        buffer.upsert(T0 + 60 * i, 1, 2, 0, float(i), 1, 1)
+
+    assert len(buffer) == 5
+    view = buffer.view(3)
+    assert list(view["close"]) == [5.0, 6.0, 7.0]
+    assert np.shares_memory(view["close"], buffer._data)
+    assert not view["close"].flags.writeable
+
+    # Формирующаяся свеча обновляется на месте — срез видит изменение
+    buffer.upsert(T0 + 60 * 7, 1, 2, 0, 7.5, 1, 1)
+    assert view["close"][-1] == 7.5
+    # Свеча, вытесненная из буфера, не записывается
+    buffer.upsert(T0, 1, 2, 0, 99.0, 1, 1)
+    assert 99.0 not in buffer.view()["close"]
+
+
+def test_trades_update_forming_candle():
+    buffer = CandleRingBuffer(capacity=10, step=60)
+    buffer.apply_trade(T0 + 1, 100.0, 1.0)
+    buffer.apply_trade(T0 + 20, 105.0, 2.0)
+    buffer.apply_trade(T0 + 40, 98.0, 1.0)
+    buffer.apply_trade(T0 + 61, 99.0, 0.5)
+    # Запоздавшая сделка закрытой свечи игнорируется
+    buffer.apply_trade(T0 + 50, 1.0, 100.0)
+
+    view = buffer.view()
+    assert list(view["time"]) == [T0, T0 + 60]
+    assert list(view["open"]) == [100.0, 99.0]
+    assert list(view["high"]) == [105.0, 99.0]
+    assert list(view["low"]) == [98.0, 99.0]
+    assert list(view["close"]) == [98.0, 99.0]
+    assert list(view["volume"]) == [4.0, 0.5]
+
+
+def test_replay_feeds_fetch_ohlcv_without_network(hub, monkeypatch):
+    hub.subscribe("BTCUSDT", "1h")
+    messages = [kline("BTCUSDT", "1h", T0 + 3600 * i, 100.0 + i) for i in range(250)]
+    messages.append(kline("ETHUSDT", "1h", T0, 1.0))
+    messages.append(trade("BTCUSDT", T0 + 3600 * 249 + 10, 400.0, 1.0))
+    asyncio.run(hub.run(ReplaySource(messages)))
+
+    async def no_network(*args, **kwargs):
+        raise AssertionError("REST не должен вызываться")
+
+    monkeypatch.setattr(crypto_compare_provider, "_coalesced_payload", no_network)
+    df = asyncio.run(crypto_compare_provider.fetch_ohlcv("BTCUSDT", "1h", 200))
+    # Как REST: limit + 1 свечей и те же столбцы
+    assert len(df) == 201
+    assert list(df.columns) == [
+        "High", "Low", "Open", "Volume", "Quote Asset Volume", "Close",
+        "conversionType", "conversionSymbol", "Open Time", "Close Time",
+    ]
+    assert df["Close"].iloc[-1] == 400.0
+    assert df["High"].iloc[-1] == 400.0
+    assert df["Open Time"].iloc[0].timestamp() == T0 + 3600 * 49
+    assert df.attrs == {"symbol": "BTC/USDT", "interval": "1h"}
+    assert hub.buffer("ETHUSDT", "1h") is None
+
+    # Кадр — копия: новые сделки и пересборка буфера его не меняют
+    closes = df["Close"].to_numpy().copy()
+    hub.ingest(trade("BTCUSDT", T0 + 3600 * 249 + 20, 500.0, 1.0))
+    hub.seed("BTCUSDT", "1h", [{"time": T0 - 3600, "open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0}])
+    assert not np.shares_memory(df["Close"].to_numpy(), hub.buffer("BTCUSDT", "1h")._data)
+    np.testing.assert_array_equal(df["Close"].to_numpy(), closes)
+
+    # Обработка кадра поверх буфера не портит сам буфер
+    processor = DataProcessor.from_stream("BTCUSDT", "1h", 200, indicators=["RSI", "MACD"])
+    result = processor.perform_full_processing(drop_na=False)
+    assert "RSI" in result.columns
+    assert hub.buffer("BTCUSDT", "1h").view(1)["close"][0] == 500.0
+    assert DataProcessor.from_stream("BTCUSDT", "1h", 1000) is None
+
+
+def test_rest_fallback_seeds_buffer(hub, monkeypatch):
+    hub.subscribe("BTCUSDT", "1m")
+    # Поток успел прислать две последние свечи
+    for i in (98, 99):
+        hub.ingest(kline("BTCUSDT", "1m", T0 + 60 * i, 500.0 + i))
+
+    payload = [
+        {"time": T0 + 60 * i, "open": 1.0, "high": 2.0, "low": 0.5, "close": float(i),
+         "volumefrom": 1.0, "volumeto": 1.0}
+        for i in range(100)
+    ]
+
+    async def rest(*args, **kwargs):
+        return payload
+
+    monkeypatch.setattr(crypto_compare_provider, "_coalesced_payload", rest)
+    df = asyncio.run(crypto_compare_provider.fetch_ohlcv("BTCUSDT", "1m", 50))
+    assert len(df) == 100
+
+    # Буфер дозаполнен историей, свечи потока не перезаписаны REST
+    closes = hub.buffer("BTCUSDT", "1m").view()["close"]
+    assert len(closes) == 100
+    assert list(closes[-3:]) == [97.0, 598.0, 599.0]
+    assert asyncio.run(crypto_compare_provider.fetch_ohlcv("BTCUSDT", "1m", 50))["Close"].iloc[-1] == 599.0
+
+
+def test_stale_stream_falls_back(hub):
+    hub.subscribe("BTCUSDT", "1m")
+    for i in range(10):
+        hub.ingest(kline("BTCUSDT", "1m", T0 + 60 * i, 1.0))
+    assert len(hub.frame("BTCUSDT", "1m", 9)) == 10
+    assert hub.frame("BTCUSDT", "1m", 10) is None
+    hub.buffer("BTCUSDT", "1m").updated_at -= hub.max_lag + 1
+    assert hub.frame("BTCUSDT", "1m", 9) is None
+    # Дозаполнение из REST не делает отставший поток свежим
+    hub.seed("BTCUSDT", "1m", [{"time": T0 + 600, "open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0}])
+    assert hub.frame("BTCUSDT", "1m", 9) is None
+
+
+def test_seed_aggregates_finer_rows(hub):
+    hub.subscribe("BTCUSDT", "4h")
+    # Восемь часовых свечей -> две 4h-свечи
+    payload = [
+        {"time": T0 + 3600 * i, "open": float(i), "high": i + 1.0, "low": i - 0.5, "close": i + 0.5,
+         "volumefrom": 1.0, "volumeto": 10.0}
+        for i in range(8)
+    ]
+    assert hub.seed("BTCUSDT", "4h", payload) == 8
+    view = hub.buffer("BTCUSDT", "4h").view()
+    assert list(view["time"]) == [T0, T0 + 4 * 3600]
+    assert list(view["open"]) == [0.0, 4.0]
+    assert list(view["high"]) == [4.0, 8.0]
+    assert list(view["low"]) == [-0.5, 3.5]
+    assert list(view["close"]) == [3.5, 7.5]
+    assert list(view["volume"]) == [4.0, 4.0]
+    assert list(view["quote_volume"]) == [40.0, 40.0]
+    assert crypto_compare_provider.interval_params("4h") == ("hour", 4)
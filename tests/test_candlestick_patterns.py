@@ -0,0 +1,63 @@
+import sys
+import os
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+from services.data_processor import DataProcessor
+
+
+def test_engulfing_and_doji_detected_in_order():
+    df = pd.DataFrame({
+        'Open Time': pd.date_range('2021-01-01', periods=4, freq='h'),
+        'Open': [10.0, 9.0, 10.5, 10.0],
+        'High': [10.5, 10.5, 10.6, 10.5],
+        'Low': [8.5, 8.0, 8.0, 9.5],
+        'Close': [9.0, 10.2, 8.5, 10.0],
+    })
+    patterns = DataProcessor(df).find_candlestick_patterns()
+    assert [(p['type'], p['date']) for p in patterns] == [
+        ('Bullish Engulfing', '2021-01-01 01:00:00'),
+        ('Bearish Engulfing', '2021-01-01 02:00:00'),
+        ('Doji', '2021-01-01 03:00:00'),
+    ]
+    assert patterns[0]['price'] == 10.2
+
+
+def test_zero_range_candles_are_skipped():
+    df = pd.DataFrame({
+        'Open Time': pd.date_range('2021-01-01', periods=3, freq='h'),
+        'Open': [1.0, 1.0, 1.0],
+        'High': [1.0, 1.0, 1.0],
+        'Low': [1.0, 1.0, 1.0],
+        'Close': [1.0, 1.0, 1.0],
+    })
+    assert DataProcessor(df).find_candlestick_patterns() == []
+
+
+def test_morning_star_detected():
+    df = pd.DataFrame({
+        'Open Time': pd.date_range('2021-01-01', periods=4, freq='h'),
+        'Open': [10.0, 10.0, 7.9, 8.0],
+        'High': [10.3, 10.1, 8.0, 9.6],
+        'Low': [9.9, 7.9, 7.7, 7.9],
+        'Close': [10.2, 8.0, 7.8, 9.5],
+    })
+    patterns = DataProcessor(df).find_candlestick_patterns()
+    assert [(p['type'], p['date']) for p in patterns] == [
+        ('Morning Star', '2021-01-01 03:00:00'),
+    ]
+
+
+def test_three_white_soldiers_detected():
+    df = pd.DataFrame({
+        'Open Time': pd.date_range('2021-01-01', periods=4, freq='h'),
+        'Open': [10.0, 10.5, 11.5, 12.5],
+        'High': [11.1, 12.1, 13.1, 14.1],
+        'Low': [9.9, 10.4, 11.4, 12.4],
+        'Close': [11.0, 12.0, 13.0, 14.0],
+    })
+    patterns = DataProcessor(df).find_candlestick_patterns()
+    assert [(p['type'], p['date']) for p in patterns] == [
+        ('Three White Soldiers', '2021-01-01 02:00:00'),
+        ('Three White Soldiers', '2021-01-01 03:00:00'),
+    ]
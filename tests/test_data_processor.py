@@ -0,0 +1,38 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from services.data_processor import DataProcessor, fill_forward_backward  # noqa: E402
+
+
+def test_fill_forward_backward_matches_pandas():
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        values = rng.normal(size=(int(rng.integers(1, 30)), 4))
+        values[rng.random(values.shape) < 0.5] = np.nan
+        expected = pd.DataFrame(values).ffill().bfill().to_numpy()
+        assert np.array_equal(fill_forward_backward(values.copy()), expected, equal_nan=True)
+
+
+def test_clean_numeric_keeps_float_columns():
+    df = pd.DataFrame({
+        'Open Time': pd.date_range('2021-01-01', periods=4, freq='h'),
+        'Close': [1.0, np.inf, 3.0, 4.0],
+        'Volume': [10.4, np.nan, 12.6, 13.0],
+        'RSI': [np.nan, 50.4, 51.6, np.nan],
+    })
+    processor = DataProcessor(df)
+    cleaned = processor.clean_numeric(round_values=True, drop_na=True)
+
+    assert list(cleaned['RSI']) == [50.0, 52.0]
+    # inf и NaN в оставшихся свечах заполняются соседними значениями
+    assert cleaned['Close'].tolist() == [3.0, 3.0]
+    assert cleaned['Volume'].tolist() == [13, 13]
+    assert cleaned['Volume'].dtype == np.int64
+    records = processor.get_ohlc_data(2)
+    assert records[0]['Open Time'] == '2021-01-01T01:00:00'
+    assert records[0]['Close'] == 3.0
@@ -0,0 +1,147 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+from services.data_processor import DataProcessor
+from services.incremental_indicators import IncrementalIndicatorEngine, INDICATOR_COLUMNS
+
+
+def make_ohlcv(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    return pd.DataFrame({
+        'Open Time': pd.date_range('2024-01-01', periods=n, freq='h'),
+        'Open': open_,
+        'High': np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, n)),
+        'Low': np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, n)),
+        'Close': close,
+        'Volume': rng.uniform(10, 1000, n),
+    })
+
+
+def _ta(df):
+    processor = DataProcessor(df.copy())
+    processor._calculate_indicators_ta()
+    return processor.df
+
+
+def assert_same(expected, actual):
+    for col in INDICATOR_COLUMNS:
+        np.testing.assert_array_equal(
+            expected[col].to_numpy(dtype=float), actual[col].to_numpy(dtype=float), err_msg=col
+        )
+
+
+def test_full_history_matches_ta():
+    df = make_ohlcv(400)
+    df.loc[100:140, ['Open', 'High', 'Low', 'Close']] = 100.0
+    engine = IncrementalIndicatorEngine()
+    assert_same(_ta(df), engine.update(df))
+
+
+def test_appended_candles_match_ta():
+    df = make_ohlcv(400, seed=1)
+    engine = IncrementalIndicatorEngine()
+    engine.update(df.iloc[:300])
+    assert_same(_ta(df), engine.update(df))
+    assert len(engine) == 400
+
+
+def test_forming_candle_is_replaced():
+    df = make_ohlcv(300, seed=2)
+    forming = df.iloc[:250].copy()
+    forming.loc[249, 'Close'] *= 1.01
+    forming.loc[249, 'High'] *= 1.02
+    engine = IncrementalIndicatorEngine()
+    engine.update(forming)
+    assert_same(_ta(df), engine.update(df))
+
+
+def test_processor_uses_engine_from_attrs(monkeypatch):
+    from services import data_processor
+
+    df = make_ohlcv(300, seed=3)
+    df.attrs['symbol'] = 'TEST/USD'
+    df.attrs['interval'] = '1h'
+    assert DataProcessor(df.copy()).engine is None
+    monkeypatch.setattr(data_processor, 'INCREMENTAL_INDICATORS', True)
+    processor = DataProcessor(df.copy())
+    assert processor.engine is not None
+    assert DataProcessor(df.iloc[:200].copy()).engine is not processor.engine
+    processor.calculate_indicators()
+    assert_same(_ta(df), processor.df)
+
+
+def test_sliding_window_matches_ta():
+    df = make_ohlcv(500, seed=4)
+    engine = IncrementalIndicatorEngine()
+    engine.update(df.iloc[0:400])
+    # Следующее окно того же размера начинается на свечу позже
+    window = df.iloc[1:401].reset_index(drop=True)
+    assert_same(_ta(window), engine.update(window))
+    # Короткое окно до и после длинного даёт одно и то же
+    short = df.iloc[300:400].reset_index(drop=True)
+    before = engine.update(short)
+    engine.update(df)
+    assert_same(before, engine.update(short))
+    assert_same(_ta(short), before)
+    # Префикс уже посчитанной истории
+    engine.update(df)
+    assert_same(_ta(df.iloc[:450]), engine.update(df.iloc[:450]))
+
+
+def test_engines_are_evicted(monkeypatch):
+    from services import incremental_indicators
+
+    monkeypatch.setattr(incremental_indicators, "INCREMENTAL_MAX_ENGINES", 2)
+    incremental_indicators.reset_engines()
+    first = incremental_indicators.get_engine("AAA", "1h", 300)
+    incremental_indicators.get_engine("AAA", "1h", 200)
+    assert incremental_indicators.get_engine("AAA", "1h", 300) is first
+    incremental_indicators.get_engine("CCC", "1h", 300)
+    assert set(incremental_indicators._engines) == {("AAA", "1h", 300), ("CCC", "1h", 300)}
+    incremental_indicators.reset_engines()
+
+
+def test_full_recompute_uses_indicator_backend(monkeypatch):
+    from services import indicator_kernels
+
+    calls = []
+    parabolic_sar = indicator_kernels.parabolic_sar
+
+    def counting(*args, **kwargs):
+        calls.append(1)
+        return parabolic_sar(*args, **kwargs)
+
+    monkeypatch.setattr(indicator_kernels, "parabolic_sar", counting)
+    df = make_ohlcv(401, seed=5)
+    try:
+        for backend, kernel_calls in (("numpy", 1), ("ta", 0)):
+            indicator_kernels.set_backend(backend)
+            expected_history, expected_next = _ta(df.iloc[:400]), _ta(df)
+            calls.clear()
+            engine = IncrementalIndicatorEngine()
+            # Холодный старт — векторный расчёт реестра (ядра выбранного бэкенда)
+            assert_same(expected_history, engine.update(df.iloc[:400]))
+            assert len(calls) == kernel_calls
+            # Новая свеча досчитывается пошагово, без повторного полного расчёта
+            assert_same(expected_next, engine.update(df))
+            assert len(calls) == kernel_calls
+    finally:
+        indicator_kernels.set_backend("auto")
+
+
+def test_screener_does_not_create_engines():
+    from services import incremental_indicators
+    from services.indicator_registry import INDICATORS
+    from services.screener import screen_candles
+
+    incremental_indicators.reset_engines()
+    df = make_ohlcv(300, seed=6)
+    df.attrs = {'symbol': 'TEST/USD', 'interval': '1h'}
+    result = screen_candles(df, 'TEST/USD', '1h', indicators=list(INDICATORS))
+    assert result['rsi'] is not None
+    assert not incremental_indicators._engines
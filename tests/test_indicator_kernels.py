@@ -0,0 +1,94 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+import ta
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from services import indicator_kernels  # noqa: E402
+from services.indicator_registry import INDICATORS  # noqa: E402
+
+try:
+    import numba  # noqa: F401
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+BACKENDS = [
+    "numpy",
+    pytest.param("numba", marks=pytest.mark.skipif(not HAS_NUMBA, reason="numba не установлена")),
+]
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    indicator_kernels.set_backend(request.param)
+    assert indicator_kernels.get_backend() == request.param
+    yield request.param
+    indicator_kernels.set_backend("auto")
+
+
+def make_hlc(n, seed, gaps=False, flat=False):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    high = close + rng.random(n)
+    low = close - rng.random(n)
+    if flat:
+        high[:] = low[:] = close[:] = 100.0
+    if gaps:
+        high[5] = np.nan
+        close[n // 2] = np.nan
+    return high, low, close
+
+
+def assert_bitwise_equal(actual, expected):
+    """Совпадение до бита: одинаковые позиции NaN и одинаковое представление остальных значений."""
+    actual = np.asarray(actual, dtype=np.float64)
+    expected = np.asarray(expected, dtype=np.float64)
+    assert actual.shape == expected.shape
+    nan = np.isnan(expected)
+    assert (np.isnan(actual) == nan).all()
+    assert (actual[~nan].view(np.int64) == expected[~nan].view(np.int64)).all()
+
+
+CASES = [(28, 0, False, False), (29, 1, False, False), (500, 2, False, False),
+         (5000, 3, False, False), (300, 4, True, False), (100, 5, False, True)]
+
+
+@pytest.mark.parametrize("n,seed,gaps,flat", CASES)
+def test_kernels_match_ta_bit_for_bit(backend, n, seed, gaps, flat):
+    high, low, close = make_hlc(n, seed, gaps, flat)
+    h, l, c = pd.Series(high), pd.Series(low), pd.Series(close)
+
+    assert_bitwise_equal(
+        indicator_kernels.average_true_range(high, low, close),
+        ta.volatility.AverageTrueRange(h, l, c).average_true_range(),
+    )
+    assert_bitwise_equal(
+        indicator_kernels.average_directional_index(high, low, close),
+        ta.trend.ADXIndicator(h, l, c).adx(),
+    )
+    assert_bitwise_equal(
+        indicator_kernels.parabolic_sar(high, low, close),
+        ta.trend.PSARIndicator(h, l, c).psar(),
+    )
+
+
+def test_registry_backends_agree_and_short_history_falls_back(backend):
+    high, low, close = make_hlc(400, seed=9)
+    df = pd.DataFrame({"High": high, "Low": low, "Close": close})
+    names = ["ATR", "ADX", "Parabolic_SAR"]
+    kernel = {name: INDICATORS[name].compute(df) for name in names}
+    indicator_kernels.set_backend("ta")
+    reference = {name: INDICATORS[name].compute(df) for name in names}
+    for name in names:
+        column = INDICATORS[name].outputs[0]
+        assert_bitwise_equal(kernel[name][column], reference[name][column])
+        pd.testing.assert_index_equal(kernel[name][column].index, df.index)
+
+    # Слишком короткая история: ядра не применяются, поведение как у ta
+    assert indicator_kernels.average_directional_index(high[:20], low[:20], close[:20]) is None
+    assert indicator_kernels.average_true_range(high[:5], low[:5], close[:5]) is None
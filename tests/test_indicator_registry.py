@@ -0,0 +1,43 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from services.data_processor import DataProcessor  # noqa: E402
+from services.incremental_indicators import INDICATOR_COLUMNS  # noqa: E402
+from services.indicator_registry import output_columns, required_warmup, resolve_indicators  # noqa: E402
+from test_incremental_indicators import make_ohlcv  # noqa: E402
+
+
+def test_resolve_with_dependencies():
+    assert output_columns(resolve_indicators([])) == INDICATOR_COLUMNS
+    assert [s.name for s in resolve_indicators(['rsi', 'unknown'])] == ['RSI']
+    # столбец индикатора тоже принимается, зависимость MA_20 добавляется
+    specs = resolve_indicators(['Moving_Average_Envelope_Upper'])
+    assert [s.name for s in specs] == ['MA_20', 'Moving_Average_Envelope']
+    assert required_warmup(['RSI', 'Bollinger']) == 100
+    assert required_warmup(['Bollinger']) == 20
+    assert required_warmup([]) == 200
+
+
+def test_processor_computes_only_requested():
+    df = make_ohlcv(120, seed=3)
+    processor = DataProcessor(df.copy(), indicators=['Stochastic_Oscillator', 'MACD_signal'])
+    processor.calculate_indicators()
+    added = [c for c in processor.df.columns if c not in df.columns]
+    assert added == ['MACD', 'MACD_signal', 'MACD_hist', 'Stochastic_Oscillator']
+
+    full = DataProcessor(df.copy())
+    full.calculate_indicators()
+    for column in added:
+        assert processor.df[column].equals(full.df[column])
+
+
+def test_subset_bypasses_incremental_engine(monkeypatch):
+    from services import data_processor
+
+    monkeypatch.setattr(data_processor, 'INCREMENTAL_INDICATORS', True)
+    df = make_ohlcv(120, seed=4)
+    df.attrs = {'symbol': 'TEST/USD', 'interval': '1h'}
+    assert DataProcessor(df.copy(), indicators=['RSI']).engine is None
+    assert DataProcessor(df.copy()).engine is not None
@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import asyncio
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+sys.path.append(os.path.dirname(__file__))
+
+from services import llm_cache, llm_service  # noqa: E402
+from services.llm_cache import MemoryCache, SQLiteCache, make_cache_key, ttl_until_candle_close  # noqa: E402
+from services.chatgpt_analyzer import ChatGPTAnalyzer  # noqa: E402
+from services.llm_service import LLMService  # noqa: E402
+from stub_providers import StubProvider  # noqa: E402
+
+
+def test_backends_ttl_and_lru(tmp_path):
+    for cache in (MemoryCache(max_entries=2), SQLiteCache(str(tmp_path / "c.sqlite"), max_entries=2)):
+        cache.set("a", {"v": 1}, 60)
+        cache.set("b", {"v": 2}, 60)
+        assert cache.get("a") == {"v": 1}  # "a" становится самым свежим
+        cache.set("c", {"v": 3}, 60)
+        assert cache.get("b") is None
+        assert cache.get("a") == {"v": 1}
+        cache.set("d", {"v": 4}, -1)
+        assert cache.get("d") is None
+        # Изменение сохранённого или полученного значения не попадает в кеш
+        value = {"v": 5}
+        cache.set("e", value, 60)
+        value["v"] = 0
+        cache.get("e")["extra"] = 1
+        assert cache.get("e") == {"v": 5}
+
+
+def test_key_and_ttl():
+    assert make_cache_key("m", "s", "p") == make_cache_key("m", "s", "p")
+    assert make_cache_key("m", "s", "p") != make_cache_key("m2", "s", "p")
+    assert ttl_until_candle_close("1h", now=7200 + 600) == 3000
+    assert ttl_until_candle_close("2w") is None
+
+
+def test_analyzer_uses_cache(monkeypatch):
+    monkeypatch.setenv("DEBUG_LOGGING", "false")
+    provider = StubProvider(content='```json{"ok": true}```')
+    analyzer = ChatGPTAnalyzer()
+    analyzer.llm = LLMService(provider)
+    monkeypatch.setattr(analyzer, "save_response", lambda *a, **k: None)
+    monkeypatch.setattr(llm_cache, "_backends", {})
+    payload = {"ohlc": [{"Close": 1.0, "time": time.time()}]}
+
+    first = asyncio.run(analyzer.analyze(payload, cache_ttl=60))
+    second = asyncio.run(analyzer.analyze(payload, cache_ttl=60))
+    assert first == second == ({"ok": True}, False)
+    assert provider.calls == 1
+
+    asyncio.run(analyzer.analyze(payload))
+    assert provider.calls == 2
+
+
+def test_fallback_answer_is_not_cached(monkeypatch):
+    monkeypatch.setenv("DEBUG_LOGGING", "false")
+    llm_service.reset_provider_stats()
+    primary = StubProvider("chatty", content="no json here")
+    fallback = StubProvider("backup", content='```json{"from": "backup"}```')
+    analyzer = ChatGPTAnalyzer()
+    analyzer.llm = LLMService(primary, fallback=fallback)
+    monkeypatch.setattr(analyzer, "save_response", lambda *a, **k: None)
+    monkeypatch.setattr(llm_cache, "_backends", {})
+    payload = {"ohlc": [{"Close": 1.0, "time": time.time()}]}
+
+    for _ in range(2):
+        assert asyncio.run(analyzer.analyze(payload, cache_ttl=60)) == ({"from": "backup"}, False)
+    assert primary.calls == fallback.calls == 2
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+sys.path.append(os.path.dirname(__file__))
+
+from services import llm_service  # noqa: E402
+from services.llm_service import LLMService, backoff_delay  # noqa: E402
+from stub_providers import RateLimitError, StubProvider  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(llm_service, "backoff_delay", lambda attempt, retry_after=None: 0)
+
+
+def test_retries_rate_limits_and_timeouts():
+    provider = StubProvider(errors=[RateLimitError(), asyncio.TimeoutError()])
+    service = LLMService(provider, max_retries=3)
+    assert asyncio.run(service.generate([]))["content"] == '{"ok": true}'
+    assert provider.calls == 3
+
+    provider = StubProvider(errors=[RateLimitError()] * 3)
+    with pytest.raises(RateLimitError):
+        asyncio.run(LLMService(provider, max_retries=2).generate([]))
+    assert provider.calls == 3
+
+    # Ошибки запроса (не лимиты) не повторяются
+    provider = StubProvider(errors=[ValueError("bad request")])
+    with pytest.raises(ValueError):
+        asyncio.run(LLMService(provider).generate([]))
+    assert provider.calls == 1
+
+
+def test_timeout_and_concurrency_limit(monkeypatch):
+    monkeypatch.setenv("LLM_CONCURRENCY_STUB", "3")
+    provider = StubProvider(latency=0.01)
+    service = LLMService(provider)
+
+    async def main():
+        return await asyncio.gather(*(service.generate([]) for _ in range(10)))
+
+    assert len(asyncio.run(main())) == 10
+    assert provider.max_active == 3
+
+    slow = StubProvider(latency=1)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(LLMService(slow, timeout=0.01, max_retries=1).generate([]))
+    assert slow.calls == 2
+
+
+def test_stream_default_and_backoff_bounds():
+    service = LLMService(StubProvider(content="abc"))
+
+    async def collect():
+        return [delta async for delta in service.stream([])]
+
+    assert asyncio.run(collect()) == ["abc"]
+    for attempt in range(8):
+        assert 0 <= backoff_delay(attempt) <= llm_service.LLM_BACKOFF_MAX
+    assert backoff_delay(0, retry_after=2) >= 2
+
+
+def test_hedge_fires_after_deadline_and_takes_first_valid(monkeypatch):
+    llm_service.reset_provider_stats()
+    monkeypatch.setattr(llm_service, "LLM_HEDGE_DELAY", 0.05)
+    primary = StubProvider("slow", latency=0.5)
+    fallback = StubProvider("fast", content='{"from": "fallback"}', latency=0.01)
+    service = LLMService(primary, fallback=fallback)
+
+    async def main():
+        start = asyncio.get_running_loop().time()
+        result = await service.generate([])
+        return result, asyncio.get_running_loop().time() - start
+
+    result, elapsed = asyncio.run(main())
+    assert result["provider"] == "fast"
+    assert elapsed < 0.3
+    assert primary.calls == fallback.calls == 1
+
+    # Быстрый основной провайдер запасного не трогает
+    service = LLMService(StubProvider("quick", latency=0.01), fallback=fallback)
+    assert asyncio.run(service.generate([]))["provider"] == "quick"
+    assert fallback.calls == 1
+
+    # Дедлайн — перцентиль накопленных задержек
+    for i in range(100):
+        llm_service.record_latency("measured", i / 100)
+    assert llm_service.hedge_delay("measured", percentile=95) == 0.95
+
+
+def test_fallback_on_invalid_json_and_circuit_breaker():
+    llm_service.reset_provider_stats()
+    broken = StubProvider("broken", errors=[ValueError("boom")] * 10)
+    chatty = StubProvider("chatty", content="no json here")
+    fallback = StubProvider("backup")
+
+    # Невалидный ответ основного — берётся ответ запасного
+    result = asyncio.run(LLMService(chatty, fallback=fallback).generate([]))
+    assert result["provider"] == "backup"
+
+    # Два сбоя подряд открывают автомат: дальше основной не вызывается
+    llm_service._breakers["broken"] = llm_service.CircuitBreaker(failure_threshold=2, cooldown=60)
+    service = LLMService(broken, fallback=fallback)
+    for _ in range(3):
+        assert asyncio.run(service.generate([]))["provider"] == "backup"
+    assert broken.calls == 2
+    assert llm_service.get_breaker("broken").state == "open"
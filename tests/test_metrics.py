@@ -0,0 +1,28 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from services.metrics import Counter, Histogram, server_timing_header  # noqa: E402
+
+
+def test_histogram_and_counter_render():
+    histogram = Histogram("test_seconds", "Тест", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, "fetch")
+    lines = histogram.render()
+    assert 'test_seconds_bucket{stage="fetch",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="fetch",le="1"} 2' in lines
+    assert 'test_seconds_bucket{stage="fetch",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{stage="fetch"} 3' in lines
+    assert lines[1] == "# TYPE test_seconds histogram"
+
+    counter = Counter("test_total", "Тест", ["cache", "result"])
+    counter.inc("llm", "hit")
+    counter.inc("llm", "hit")
+    assert 'test_total{cache="llm",result="hit"} 2' in counter.render()
+
+
+def test_server_timing_header_sums_repeated_stages():
+    header = server_timing_header([("fetch", 0.01), ("llm", 1.5), ("fetch", 0.02)])
+    assert header == "fetch;dur=30.0, llm;dur=1500.0"
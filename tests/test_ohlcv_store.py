@@ -0,0 +1,103 @@
+import sys
+import os
+import asyncio
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+import services.crypto_compare_provider as provider
+from services.ohlcv_store import OHLCVStore
+
+STEP = 3600
+
+
+def make_upstream(now, calls, skip=()):
+    async def fake_request(period, base, quote, agg, limit, to_ts=None):
+        calls.append((limit, to_ts))
+        end = (to_ts if to_ts is not None else now) // STEP * STEP
+        times = [end - k * STEP for k in range(limit, -1, -1)]
+        return [
+            {'time': t, 'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': float(t % 97),
+             'volumefrom': 10.0, 'volumeto': 20.0, 'conversionType': 'direct', 'conversionSymbol': ''}
+            for t in times if t not in skip
+        ]
+    return fake_request
+
+
+def test_second_fetch_only_downloads_tail(monkeypatch, tmp_path):
+    now = 1_700_000_000
+    calls = []
+    monkeypatch.setattr(provider, '_store', OHLCVStore(str(tmp_path / 'ohlcv.sqlite')))
+    monkeypatch.setattr(provider, 'OHLCV_STORE_ENABLED', True)
+    monkeypatch.setattr(provider, '_request_histo', make_upstream(now, calls))
+    monkeypatch.setattr(provider.time, 'time', lambda: now)
+
+    first = asyncio.run(provider.fetch_ohlcv('BTCUSDT', '1h', 50))
+    assert calls == [(50, None)]
+    assert len(first) == 51
+
+    now += 2 * STEP
+    monkeypatch.setattr(provider.time, 'time', lambda: now)
+    monkeypatch.setattr(provider, '_request_histo', make_upstream(now, calls))
+    second = asyncio.run(provider.fetch_ohlcv('BTCUSDT', '1h', 50))
+    assert calls[1] == (3, None)
+    assert len(second) == 51
+    assert second['Open Time'].diff().dropna().eq(second['Open Time'].diff().iloc[1]).all()
+    assert second.attrs['symbol'] == 'BTC/USDT'
+
+
+def test_gaps_are_backfilled(monkeypatch, tmp_path):
+    now = 1_700_000_000
+    end = now // STEP * STEP
+    calls = []
+    monkeypatch.setattr(provider, '_store', OHLCVStore(str(tmp_path / 'ohlcv.sqlite')))
+    monkeypatch.setattr(provider, 'OHLCV_STORE_ENABLED', True)
+    monkeypatch.setattr(provider.time, 'time', lambda: now)
+    gap = {end - 10 * STEP, end - 11 * STEP}
+    monkeypatch.setattr(provider, '_request_histo', make_upstream(now, calls, skip=gap))
+    asyncio.run(provider.fetch_ohlcv('ETHUSD', '1h', 30))
+
+    monkeypatch.setattr(provider, '_request_histo', make_upstream(now, calls))
+    df = asyncio.run(provider.fetch_ohlcv('ETHUSD', '1h', 30))
+    assert (1, end - 10 * STEP) in calls
+    assert len(df) == 31
+
+
+def test_concurrent_identical_fetches_are_coalesced(monkeypatch):
+    calls = []
+    monkeypatch.setattr(provider, 'OHLCV_STORE_ENABLED', False)
+
+    async def slow_request(period, base, quote, agg, limit, to_ts=None):
+        calls.append(limit)
+        await asyncio.sleep(0.05)
+        return await make_upstream(1_700_000_000, [])(period, base, quote, agg, limit, to_ts)
+
+    monkeypatch.setattr(provider, '_request_histo', slow_request)
+
+    async def run():
+        return await asyncio.gather(*[provider.fetch_ohlcv('BTCUSDT', '4h', 20) for _ in range(5)])
+
+    frames = asyncio.run(run())
+    assert calls == [20]
+    assert all(len(df) == 21 for df in frames)
+    assert frames[0] is not frames[1]
+    assert provider._inflight == {}
+
+
+def test_old_store_drops_hourly_rows_saved_as_4h(tmp_path):
+    path = str(tmp_path / 'ohlcv.sqlite')
+    candle = {'time': 3600, 'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5,
+              'volumefrom': 1.0, 'volumeto': 1.0, 'conversionType': 'direct', 'conversionSymbol': ''}
+    store = OHLCVStore(path)
+    store._conn.execute('PRAGMA user_version = 0')
+    store.save('BTC', 'USDT', '4h', [candle])
+    store.save('BTC', 'USDT', '1h', [candle])
+    store.close()
+
+    # Хранилище до исправления 4h: часовые свечи под ключом 4h удаляются, остальные остаются
+    store = OHLCVStore(path)
+    assert store.load('BTC', 'USDT', '4h', 0) == []
+    assert len(store.load('BTC', 'USDT', '1h', 0)) == 1
+    store.save('BTC', 'USDT', '4h', [dict(candle, time=14400)])
+    store.close()
+
+    # Повторное открытие миграцию не повторяет
+    assert len(OHLCVStore(path).load('BTC', 'USDT', '4h', 0)) == 1
@@ -0,0 +1,33 @@
+import json
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from services.prompt_encoding import encode_ohlc_compact, encode_ohlc_records  # noqa: E402
+
+
+def sample_ohlc():
+    return [
+        {"Open Time": pd.Timestamp("2021-01-01 00:00"), "Open": 27123.45, "Volume": 12.4,
+         "RSI": 55.0, "ADX": 12.3456, "MA_20": float("nan"), "ATR": float("inf"), "MACD": -0.3},
+        {"Open Time": pd.Timestamp("2021-01-01 01:00"), "Open": 27100.0, "Volume": 13.0,
+         "RSI": 56.4, "ADX": 1.0, "MA_20": 27000.123456789, "ATR": 3.0, "MACD": 1.6},
+    ]
+
+
+def test_compact_encoding_is_valid_json_with_rounding():
+    encoded = json.loads(encode_ohlc_compact(sample_ohlc()))
+    assert encoded["columns"] == ["Open Time", "Open", "Volume", "RSI", "ADX", "MA_20", "ATR", "MACD"]
+    assert encoded["rows"] == [
+        ["2021-01-01T00:00:00", 27123.45, 12, 55, 12.35, None, None, 0],
+        ["2021-01-01T01:00:00", 27100, 13, 56, 1, 27000.12346, 3, 2],
+    ]
+
+
+def test_compact_encoding_is_smaller():
+    ohlc = sample_ohlc() * 50
+    assert len(encode_ohlc_compact(ohlc)) < len(encode_ohlc_records(ohlc)) / 2
+    assert json.loads(encode_ohlc_records(ohlc))[0]["MA_20"] is None
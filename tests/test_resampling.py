@@ -0,0 +1,70 @@
+import asyncio
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from services import resampling  # noqa: E402
+from services.resampling import fetch_timeframes, resample_ohlcv  # noqa: E402
+
+
+def make_candles(n, start="2021-01-01 01:00", freq="h", seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    open_ = close + rng.normal(0, 0.5, n)
+    open_time = pd.date_range(start, periods=n, freq=freq)
+    df = pd.DataFrame({
+        "Open Time": open_time,
+        "Close Time": open_time + pd.Timedelta(freq if freq != "h" else "1h"),
+        "Open": open_,
+        "High": np.maximum(open_, close) + rng.random(n),
+        "Low": np.minimum(open_, close) - rng.random(n),
+        "Close": close,
+        "Volume": rng.random(n) * 10,
+        "Quote Asset Volume": rng.random(n) * 1000,
+    })
+    df.attrs = {"symbol": "BTC/USDT", "interval": "1h"}
+    return df
+
+
+def test_resample_matches_pandas():
+    # Первая 4h-свеча (00:00) неполная: в ней нет свечи 00:00
+    df = make_candles(50)
+    result = resample_ohlcv(df, "1h", "4h")
+
+    expected = df.set_index("Open Time").resample("4h").agg({
+        "Open": "first", "High": "max", "Low": "min", "Close": "last",
+        "Volume": "sum", "Quote Asset Volume": "sum",
+    }).iloc[1:]
+    assert result["Open Time"].iloc[0] == pd.Timestamp("2021-01-01 04:00")
+    assert (result["Close Time"] - result["Open Time"] == pd.Timedelta("4h")).all()
+    for column in expected.columns:
+        np.testing.assert_allclose(result[column].to_numpy(), expected[column].to_numpy())
+    assert result.attrs == {"symbol": "BTC/USDT", "interval": "4h"}
+    # Последняя свеча формируется: в ней только часть часовых свечей
+    assert result["Close"].iloc[-1] == df["Close"].iloc[-1]
+
+    with pytest.raises(ValueError):
+        resample_ohlcv(df, "4h", "1h")
+
+
+def test_fetch_timeframes_uses_one_base_request(monkeypatch):
+    calls = []
+
+    async def fake_fetch(symbol, interval, limit):
+        calls.append((interval, limit))
+        return make_candles(limit, start="2021-01-01 00:00", freq="15min" if interval == "15m" else "h")
+
+    monkeypatch.setattr(resampling, "fetch_ohlcv", fake_fetch)
+    monkeypatch.setattr(resampling, "MTF_MAX_BASE_CANDLES", 2000)
+    frames = asyncio.run(fetch_timeframes("BTCUSDT", ["1h", "15m", "4h", "1d"], 100))
+
+    # 1h и 4h строятся из 15m, для 1d понадобилось бы слишком много 15m-свечей
+    assert sorted(calls) == [("15m", 101 * 16), ("1d", 100)]
+    assert list(frames) == ["1h", "15m", "4h", "1d"]
+    assert len(frames["1h"]) == 101 and len(frames["4h"]) == 101
+    assert frames["4h"]["Open Time"].iloc[-1] == frames["15m"]["Open Time"].iloc[-1].floor("4h")
@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.signal import argrelextrema
+from scipy.stats import jarque_bera
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from services.statistical_analysis import StatisticalAnalyzer, analyze_panel  # noqa: E402
+
+
+def make_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    # Осцилляторы повторяют цену с противоположными трендами и шумом,
+    # поэтому их экстремумы часто совпадают или сдвинуты на 1-2 бара
+    drift = 0.05 * np.arange(n)
+    return pd.DataFrame({
+        "Open Time": pd.date_range("2022-01-01", periods=n, freq="h"),
+        "Close": close,
+        "RSI": close + drift + rng.normal(0, 0.3, n),
+        "MACD": close - drift + rng.normal(0, 0.3, n),
+    })
+
+
+def reference(df, oscillator, window, tolerance):
+    """Прямой перебор: экстремум осциллятора в пределах ±tolerance баров."""
+    close, osc = df["Close"].to_numpy(), df[oscillator].to_numpy()
+    result = []
+    for comparator, regular, hidden, sign in (
+        (np.less_equal, "bullish_divergence", "hidden_bullish_divergence", 1),
+        (np.greater_equal, "bearish_divergence", "hidden_bearish_divergence", -1),
+    ):
+        price_ext = argrelextrema(close, comparator, order=window)[0]
+        osc_ext = argrelextrema(osc, comparator, order=window)[0]
+
+        def nearest(p):
+            near = [m for m in osc_ext if abs(m - p) <= tolerance]
+            return min(near, key=lambda m: (abs(m - p), m)) if near else None
+
+        for p1, p2 in zip(price_ext[:-1], price_ext[1:]):
+            m1, m2 = nearest(p1), nearest(p2)
+            if m1 is None or m2 is None:
+                continue
+            price_move = np.sign(close[p2] - close[p1])
+            osc_move = np.sign(osc[m2] - osc[m1])
+            if price_move == -sign and osc_move == sign:
+                result.append((regular, str(df["Open Time"].iloc[p2]), osc[m2]))
+            elif price_move == sign and osc_move == -sign:
+                result.append((hidden, str(df["Open Time"].iloc[p2]), osc[m2]))
+    return sorted(result)
+
+
+def test_divergences_match_brute_force_with_tolerance_and_hidden():
+    df = make_frame(600, seed=4)
+    analyzer = StatisticalAnalyzer(df)
+    for tolerance in (0, 2):
+        found = analyzer.find_divergences_multi(["RSI", "MACD"], window=3, tolerance=tolerance, hidden=True)
+        assert found, "ожидались дивергенции"
+        for oscillator in ("RSI", "MACD"):
+            got = sorted(
+                (d["type"], d["date"], d["oscillator"]) for d in found if d["indicator"] == oscillator
+            )
+            assert got == reference(df, oscillator, 3, tolerance)
+
+
+def test_divergences_scale_to_long_history():
+    analyzer = StatisticalAnalyzer(make_frame(100_000, seed=5))
+    start = time.perf_counter()
+    analyzer.find_divergences_multi(["RSI", "MACD"], tolerance=2, hidden=True)
+    assert time.perf_counter() - start < 5
+
+
+def test_batch_analysis_matches_per_column():
+    df = make_frame(400)
+    df.loc[:9, "RSI"] = np.nan
+    result = StatisticalAnalyzer(df).batch_analysis(["RSI", "MACD", "Missing"], lags=(1, 5))
+
+    assert list(result["autocorrelations"]) == ["RSI", "MACD"]
+    for column in ("RSI", "MACD"):
+        for lag in (1, 5):
+            expected = round(df[column].autocorr(lag=lag), 2)
+            assert result["autocorrelations"][column][f"lag_{lag}"] == expected
+        jb = jarque_bera(df[column].dropna())
+        assert result["normality"][column]["Jarque-Bera"]["Statistic"] == round(jb.statistic, 2)
+        assert 0 <= result["decomposition"][column]["trend_strength"] <= 1
+    assert result["normality"]["RSI"]["observations"] == 390
+
+
+def test_analyze_panel_inline():
+    panel = {f"SYM{i}": make_frame(200, seed=i) for i in range(3)}
+    result = analyze_panel(panel, columns=["RSI"], include_series=True, use_processes=False)
+
+    assert list(result) == ["SYM0", "SYM1", "SYM2"]
+    decomposition = result["SYM1"]["decomposition"]["RSI"]
+    assert len(decomposition["trend"]) == 200
+    assert result["SYM1"] == StatisticalAnalyzer(panel["SYM1"]).batch_analysis(["RSI"], include_series=True)
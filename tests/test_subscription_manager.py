@@ -0,0 +1,88 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+sys.path.append(os.path.dirname(__file__))
+
+import services.subscription_manager as subscriptions  # noqa: E402
+from fake_firestore import FakeFirestore  # noqa: E402
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db = FakeFirestore()
+    monkeypatch.setattr(subscriptions, "get_db", lambda: db)
+    subscriptions.invalidate_subscription()
+    yield db
+    subscriptions.invalidate_subscription()
+
+
+def test_check_subscription_cached_and_invalidated(fake_db):
+    subscriptions.create_subscription("alice", level="premium")
+    assert subscriptions.check_subscription("alice") == "premium"
+    assert subscriptions.check_subscription("alice") == "premium"
+    assert fake_db.calls["get"] == 1
+
+    # Отрицательный ответ тоже кешируется
+    assert subscriptions.check_subscription("bob") == "none"
+    assert subscriptions.check_subscription("bob") == "none"
+    assert fake_db.calls["get"] == 2
+
+    # Запись сбрасывает кеш
+    subscriptions.renew_subscription("alice", level="pro")
+    assert subscriptions.check_subscription("alice") == "pro"
+    assert fake_db.calls["get"] == 3
+
+
+def test_expired_subscription(fake_db):
+    fake_db.data["subscriptions"] = {
+        "carol": {"subscription_level": "premium", "expires_at": datetime.utcnow() - timedelta(days=1)}
+    }
+    assert subscriptions.check_subscription("carol") == "expired"
+
+
+def test_async_lookups_batched(fake_db):
+    subscriptions.create_subscription("alice")
+    subscriptions.create_subscription("dave", level="pro")
+
+    async def main():
+        return await asyncio.gather(*(
+            subscriptions.check_subscription_async(name)
+            for name in ["alice", "dave", "alice", "eve"]
+        ))
+
+    assert asyncio.run(main()) == ["premium", "pro", "premium", "none"]
+    assert fake_db.calls["get_all"] == 1
+    assert fake_db.calls["get"] == 0
+
+    # Повторные проверки обслуживаются кешем
+    assert asyncio.run(main()) == ["premium", "pro", "premium", "none"]
+    assert fake_db.calls["get_all"] == 1
+
+
+def test_async_lookup_failure_is_raised(fake_db):
+    subscriptions.create_subscription("alice")
+
+    def failing_get_all(references):
+        fake_db.calls["get_all"] += 1
+        raise RuntimeError("firestore unavailable")
+
+    fake_db.get_all = failing_get_all
+
+    async def main():
+        return await asyncio.gather(
+            *(subscriptions.check_subscription_async(name) for name in ["alice", "eve"]),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert fake_db.calls["get_all"] == 1
+
+    # Ошибка не кешируется: следующее чтение снова идёт в Firestore
+    del fake_db.get_all
+    assert asyncio.run(main()) == ["premium", "none"]
@@ -0,0 +1,134 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from services import warm_cache  # noqa: E402
+from services.warm_cache import (  # noqa: E402
+    PrecomputeWorker, RequestTracker, closed_intervals, get_warm, next_boundary, warm_key,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(warm_cache, "WARM_CACHE_ENABLED", True)
+    monkeypatch.setattr(warm_cache, "tracker", RequestTracker(decay=0.5))
+    monkeypatch.setattr(warm_cache, "store", warm_cache.WarmStore())
+
+
+def test_tracker_ranks_and_decays():
+    tracker = RequestTracker(decay=0.5)
+    btc = warm_key("BTCUSDT", "4h", 100, True, "records", [])
+    eth = warm_key("ETHUSDT", "4h", 100, True, "records", [])
+    hourly = warm_key("BTCUSDT", "1h", 100, True, "records", [])
+    for key, count in ((btc, 5), (eth, 3), (hourly, 10)):
+        for _ in range(count):
+            tracker.record(key)
+
+    assert tracker.top(2, ["4h"]) == [btc, eth]
+    assert tracker.top(1) == [hourly]
+    tracker.decay_counts(["4h"])
+    assert tracker.counts[btc] == 2.5
+    assert tracker.counts[hourly] == 10
+    # Порядок индикаторов не влияет на ключ
+    assert warm_key("X", "1h", 1, True, "records", ["RSI", "MACD"]) == \
+        warm_key("X", "1h", 1, True, "records", ["MACD", "RSI"])
+
+
+def test_candle_boundaries():
+    # 2021-01-01 00:00 UTC — граница всех интервалов
+    assert closed_intervals(1609459200) == ["1m", "5m", "15m", "1h", "4h", "1d"]
+    assert closed_intervals(1609459200 + 3600) == ["1m", "5m", "15m", "1h"]
+    assert next_boundary(1609459200 + 30) == 1609459200 + 60
+
+
+def test_refresh_serves_warm_results_and_shares_inflight():
+    popular = warm_key("BTCUSDT", "4h", 100, True, "records", [])
+    rare = warm_key("DOGEUSDT", "4h", 100, True, "records", [])
+    calls = []
+    analyzed = []
+
+    async def compute(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return ("ohlc", key[0])
+
+    async def analyze(key, result):
+        analyzed.append(key)
+
+    async def main():
+        for _ in range(3):
+            assert await get_warm(popular) is None
+        assert await get_warm(rare) is None
+
+        worker = PrecomputeWorker(compute, analyze)
+        refresh = asyncio.ensure_future(worker.refresh(["4h"]))
+        await asyncio.sleep(0)
+        # Запросы во время прогрева ждут его результат, а не считают заново
+        during = await asyncio.gather(*(get_warm(popular) for _ in range(5)))
+        warmed = await refresh
+        after = await get_warm(popular)
+        return warmed, during, after, await get_warm(rare)
+
+    warmed, during, after, rare_result = asyncio.run(main())
+    assert warmed == [popular]
+    assert calls == [popular]
+    assert analyzed == [popular]
+    assert during == [("ohlc", "BTCUSDT")] * 5
+    assert after == ("ohlc", "BTCUSDT")
+    assert rare_result is None
+
+
+def test_failed_or_expired_warm_is_not_served(monkeypatch):
+    key = warm_key("BTCUSDT", "1h", 100, True, "records", [])
+
+    async def broken(key):
+        raise RuntimeError("upstream down")
+
+    async def main():
+        for _ in range(2):
+            await get_warm(key)
+        await PrecomputeWorker(broken).refresh(["1h"])
+        return await get_warm(key)
+
+    assert asyncio.run(main()) is None
+
+    monkeypatch.setattr(warm_cache, "WARM_MAX_AGE", -1)
+
+    async def compute(key):
+        return "stale"
+
+    async def expired():
+        for _ in range(2):
+            await get_warm(key)
+        await PrecomputeWorker(compute).refresh(["1h"])
+        return await get_warm(key)
+
+    assert asyncio.run(expired()) is None
+
+
+def test_warm_age_capped_by_candle_and_results_copied(monkeypatch):
+    minute = warm_key("BTCUSDT", "1m", 100, True, "records", [])
+    daily = warm_key("BTCUSDT", "1d", 100, True, "records", [])
+    monkeypatch.setattr(warm_cache, "WARM_MAX_AGE", 120)
+    monkeypatch.setattr(warm_cache.time, "time", lambda: 1609459200 + 5)
+    # 1m-результат живёт только до закрытия текущей минутной свечи
+    assert warm_cache.warm_expiry(minute, now=0) == 55
+    assert warm_cache.warm_expiry(daily, now=0) == 120
+
+    async def compute(key):
+        return ([{"Close": 1.0}], {"rsi": []}, [], ["RSI"])
+
+    async def main():
+        for _ in range(2):
+            await get_warm(daily)
+        await PrecomputeWorker(compute).refresh(["1d"])
+        first = await get_warm(daily)
+        first[0][0]["Close"] = 0.0
+        first[1]["extra"] = True
+        return await get_warm(daily)
+
+    assert asyncio.run(main()) == ([{"Close": 1.0}], {"rsi": []}, [], ["RSI"])